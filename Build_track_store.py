@@ -0,0 +1,28 @@
+# Build the day-partitioned columnar track store from raw metro CSVs (no ArcGIS needed)
+# Query it afterwards from Python / a notebook:
+#   from flight_tracks.query import TrackStore
+#   ts = TrackStore(STORE_DIR)
+#   tracks = ts.select("Boston", "2013-06-01", "2013-06-29", max_km=30, max_alt_100ft=50)
+
+import os
+
+from flight_tracks.airports import metro_airports
+from flight_tracks.store import build_store
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley"
+STORE_DIR = os.path.join(ROOT, "track_store")
+# metro name -> raw CSV(s); see flight_tracks/airports.py METROS for the airports of each metro
+INPUTS = {
+    "Boston": [os.path.join(ROOT, "Boston_2", "IFR_MetroArea1_01jun2013_56days_30kmradius.csv")],
+    "NorCal": [os.path.join(ROOT, "NorCal", "05mar2015", "IFR_MetroArea5_05mar2015_56days.csv")],
+}
+WORKERS = None                         # CSV parser processes (None = all cores, 1 = single-threaded)
+# ==============================
+
+if __name__ == "__main__":
+    for metro, csv_paths in INPUTS.items():
+        build_store(csv_paths, STORE_DIR, metro, metro_airports(metro), workers=WORKERS)
+
+    print("Done.")
+    print(f"Store folder: {STORE_DIR}")
@@ -0,0 +1,33 @@
+# Before/after procedure comparison for one metro from the 56-day CSV, in one run (no ArcGIS needed)
+# Replaces running the first28days / last28days split + shapefile scripts four times and comparing by hand.
+# Same thing from a shell:
+#   python -m flight_tracks.compare <csv> --metro NorCal --max-km 60 --polygons tracts.shp
+
+import datetime
+import os
+
+from flight_tracks.airports import metro_airports
+from flight_tracks.compare import run_comparison
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\NorCal\05mar2015"
+CSV_PATH = os.path.join(ROOT, "IFR_MetroArea5_05mar2015_56days.csv")
+METRO = "NorCal"
+SPLIT_DATE = None                      # e.g. "2015-03-05"; None = first DAYS vs last DAYS days
+DAYS = 28
+MAX_DIST_KM = 60.0
+MAX_ALT_100FT = None                   # e.g. 50.0 for <= 5,000 ft
+CELL_M = 250                           # density grid cell size (m)
+BIN_KM = 2.0                           # distance bins of the altitude profile
+POLYGONS = None                        # tract/county polygons (.shp/.gpkg) for per-polygon deltas
+WORKERS = None                         # CSV parser processes (None = all cores)
+AIRPORT_WORKERS = 1                    # airports in parallel on one shared copy of the data (None = all cores)
+CLEAN = True                           # drop duplicate timestamps and speed/climb-rate spikes
+# ==============================
+
+if __name__ == "__main__":
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    OUT_DIR = os.path.join(ROOT, f"compare_{METRO}_{timestamp}")
+    run_comparison(CSV_PATH, metro_airports(METRO), OUT_DIR, SPLIT_DATE, DAYS, MAX_DIST_KM, MAX_ALT_100FT,
+                   CELL_M, BIN_KM, POLYGONS, WORKERS, CLEAN,
+                   AIRPORT_WORKERS)
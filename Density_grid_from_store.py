@@ -0,0 +1,39 @@
+# Point-density raster (ESRI ASCII grid) around an airport from the track store (no ArcGIS needed)
+# Run Build_track_store.py first. The .asc/.prj pair opens in ArcGIS Pro / QGIS as a raster.
+
+import datetime
+import os
+
+from flight_tracks.airports import AIRPORTS
+from flight_tracks.density import DensityGrid
+from flight_tracks.query import TrackStore
+from flight_tracks.resample import resample_time
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+METRO = "Boston"
+AIRPORT = "BOS"
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+MAX_DIST_KM = 30.0                        # also the grid half-width
+MAX_ALT_100FT = None                      # e.g. 50.0 for <= 5,000 ft
+CELL_M = 250                              # grid cell size in meters
+TIME_WEIGHTED = False                     # True = seconds per cell instead of point counts
+RESAMPLE_S = None                         # e.g. 5 to bin tracks resampled to one point per 5 s
+# ==============================
+
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+OUT_DIR = os.path.join(ROOT, f"density_{METRO}_{AIRPORT}_{timestamp}")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT,
+                                      max_km=MAX_DIST_KM, max_alt_100ft=MAX_ALT_100FT)
+if RESAMPLE_S:
+    tracks = resample_time(tracks, RESAMPLE_S)
+grid = DensityGrid(AIRPORTS[AIRPORT], MAX_DIST_KM * 1000, CELL_M,
+                   name=f"{AIRPORT.lower()}_{'seconds' if TIME_WEIGHTED else 'points'}_{CELL_M}m")
+grid.add_tracks(tracks, time_weighted=TIME_WEIGHTED)
+path = grid.write_ascii_grid(OUT_DIR)
+
+print(f"Binned {grid.points} of {tracks.n_points} points from {len(tracks)} flights.")
+print(f"Raster: {path}")
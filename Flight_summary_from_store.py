@@ -0,0 +1,39 @@
+# Per-flight summary table joined to the flight tracks (no ArcGIS needed)
+# Outputs: <airport>_tracks.shp (one polyline per flight with start/end time, duration,
+# point count, altitude range, path length, entry/exit distance, phase) and the same
+# table as <airport>_tracks.csv for joining on flight_id (flight_id + piece with CLIP = True).
+# Run Build_track_store.py first.
+
+import datetime
+import os
+
+import numpy as np
+
+from flight_tracks.query import TrackStore
+from flight_tracks.summary import flight_summary, write_summary
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+METRO = "Boston"
+AIRPORT = "BOS"
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+MAX_DIST_KM = 30.0
+MAX_ALT_100FT = None                      # e.g. 50.0 for <= 5,000 ft
+CLIP = True                               # cut tracks exactly at the radius/ceiling (one row per piece, keyed flight_id + piece)
+# ==============================
+
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+OUT_DIR = os.path.join(ROOT, f"summary_{METRO}_{AIRPORT}_{timestamp}")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT,
+                                      max_km=MAX_DIST_KM, max_alt_100ft=MAX_ALT_100FT, clip=CLIP)
+summary = flight_summary(tracks, AIRPORT)
+shp, table = write_summary(os.path.join(OUT_DIR, f"{AIRPORT.lower()}_tracks"), tracks, summary)
+
+print(f"Summarized {len(tracks)} flight pieces ({tracks.n_points} points).")
+print(f"Median duration {np.nanmedian(summary['duration_s']) / 60:.1f} min, "
+      f"median path {np.nanmedian(summary['length_km']):.1f} km.")
+print(f"Tracks: {shp}")
+print(f"Table:  {table}")
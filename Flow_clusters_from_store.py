@@ -0,0 +1,49 @@
+# Group flights into flows (arrival / departure streams) and draw one centerline per flow (no ArcGIS needed)
+# Outputs: <airport>_flow_centerlines.shp (cluster, flights, phase) and <airport>_flow_members.csv (flight_id, cluster)
+# Run Build_track_store.py first.
+
+import csv
+import datetime
+import os
+
+import numpy as np
+
+from flight_tracks.airports import AIRPORTS
+from flight_tracks.clustering import cluster_flows
+from flight_tracks.query import TrackStore
+from flight_tracks.vector_io import write_shapefile
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Phoenix"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+METRO = "Phoenix"
+AIRPORT = "PHX"
+START, END = None, None                # e.g. "2013-06-01", "2013-06-29" (END exclusive)
+MAX_DIST_KM = 40.0
+MAX_ALT_100FT = None
+PHASE = "Arrival"                      # cluster one phase at a time (None = all flights)
+EPS_M = 1500                           # mean point-to-point distance for two flights to be neighbors
+MIN_FLIGHTS = 20                       # neighbors needed for a core flight
+N_POINTS = 32                          # resampled points per flight
+# ==============================
+
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+OUT_DIR = os.path.join(ROOT, f"flows_{METRO}_{AIRPORT}_{timestamp}")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT, max_km=MAX_DIST_KM,
+                                      max_alt_100ft=MAX_ALT_100FT, phase=PHASE)
+labels, centerlines, sizes = cluster_flows(tracks, AIRPORTS[AIRPORT], EPS_M, MIN_FLIGHTS, N_POINTS)
+
+base = os.path.join(OUT_DIR, f"{AIRPORT.lower()}_flow")
+write_shapefile(base + "_centerlines.shp", 3, [[line] for line in centerlines],
+                [("cluster", "N", 6, 0), ("flights", "N", 9, 0), ("phase", "C", 16, 0)],
+                [(k, int(sizes[k]), PHASE or "All") for k in range(len(sizes))])
+with open(base + "_members.csv", "w", newline="") as f:
+    w = csv.writer(f)
+    w.writerow(["flight_id", "cluster"])
+    w.writerows(zip(tracks.flight_ids.tolist(), labels.tolist()))
+
+print(f"{len(tracks)} flights -> {len(sizes)} flows, {int(np.sum(labels < 0))} unclustered.")
+print(f"Flow sizes: {sizes.tolist()}")
+print(f"Output folder: {OUT_DIR}")
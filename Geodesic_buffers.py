@@ -0,0 +1,35 @@
+# Geodesic buffers for many points in one call -> one polygon shapefile (no ArcGIS / R needed)
+# Replaces the single- and multi-point st_buffer sections of "Simple Shapefile Creation.R"
+# (which buffer in EPSG:2272 feet everywhere) and the arcpy GEODESIC buffer of bos_center.
+
+import os
+
+from flight_tracks.buffers import write_buffers
+from flight_tracks.vector_io import read_points
+
+# ========= EDIT THESE =========
+OUT_SHP = r"C:\Users\mnguyen\Downloads\Prof Bradley\buffers\receptor_buffers.shp"
+# Either a point layer (e.g. the geojson.io points saved as shapefile) ...
+POINTS = None                          # r"...\Input\Test\Points\POINT.shp" or a .gpkg
+NAME_FIELD = "Label"
+# ... or coordinates typed in as (name, lon, lat)
+COORDS = [
+    ("Shaw_Butte", -112.08691498560191, 33.59400686004827),
+    ("bos_center", -71.00956, 42.36561),
+]
+RADIUS = 3000                          # one value for all, or a list with one per point
+UNITS = "ft"                           # "ft", "m", "km" or "nmi"
+N_VERTICES = 72                        # vertices per buffer circle
+# ==============================
+
+if POINTS:
+    lon, lat, attrs = read_points(POINTS)
+    names = [a.get(NAME_FIELD, i + 1) for i, a in enumerate(attrs)]
+else:
+    names = [c[0] for c in COORDS]
+    lon = [c[1] for c in COORDS]
+    lat = [c[2] for c in COORDS]
+
+os.makedirs(os.path.dirname(OUT_SHP), exist_ok=True)
+path = write_buffers(OUT_SHP, lon, lat, RADIUS, UNITS, N_VERTICES, names)
+print(f"Wrote {len(names)} buffers of {RADIUS} {UNITS} to: {path}")
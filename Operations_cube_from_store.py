@@ -0,0 +1,48 @@
+# Operations count cube: flights per airport x phase x day x hour of day (x altitude band), no ArcGIS needed
+# Outputs: ops_cube.npz (reload with flight_tracks.cube.CountCube.load and slice/roll up in Python)
+# and ops_cube.csv (non-zero cells as a long table for pivot tables).
+# Run Build_track_store.py first.
+
+import datetime
+import os
+
+from flight_tracks.airports import metro_airports
+from flight_tracks.cube import count_cube
+from flight_tracks.query import TrackStore
+from flight_tracks.summary import flight_summary
+from flight_tracks.tract_join import ALT_BANDS_100FT
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+METRO = "Boston"
+AIRPORTS = None                           # e.g. ["BOS"] (None = all of the metro's airports)
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+MAX_DIST_KM = 30.0
+ALT_BANDS = ALT_BANDS_100FT               # band of each flight's lowest point (None = no altitude axis)
+UTC_OFFSET_H = 0                          # hours added to the CSV times for day/hour (e.g. -4: UTC -> Boston summer)
+# ==============================
+
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+OUT_DIR = os.path.join(ROOT, f"ops_cube_{METRO}_{timestamp}")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+store = TrackStore(STORE_DIR)
+summaries = {}
+for code in AIRPORTS or metro_airports(METRO):
+    tracks = store.select(METRO, START, END, airport=code, max_km=MAX_DIST_KM, clean=True)
+    summaries[code] = flight_summary(tracks, code)
+    print(f"[{code}] {len(tracks)} flights")
+
+cube = count_cube(summaries, START, END, ALT_BANDS, UTC_OFFSET_H)
+path = cube.save(os.path.join(OUT_DIR, "ops_cube.npz"))
+table = cube.write_csv(os.path.join(OUT_DIR, "ops_cube.csv"))
+
+print(cube)
+for code in summaries:
+    wk = cube.sel(airport=code, phase="Departure", day=cube.weekdays())
+    per_hour = wk.sum(*[k for k in wk.axes if k != "hour"]).counts / max(len(wk.axes["day"]), 1)
+    print(f"[{code}] departures per weekday, busiest hour {int(per_hour.argmax()):02d}:00 "
+          f"({per_hour.max():.1f} flights)")
+print(f"Cube:  {path}")
+print(f"Table: {table}")
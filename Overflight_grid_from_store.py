@@ -0,0 +1,37 @@
+# Overflight count raster (distinct flights per cell, ESRI ASCII grid) from the track store (no ArcGIS needed)
+# Run Build_track_store.py first. Unlike the point-density grid, each flight counts once per cell.
+
+import datetime
+import os
+
+from flight_tracks.airports import AIRPORTS
+from flight_tracks.overflight import OverflightGrid
+from flight_tracks.query import TrackStore
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+METRO = "Boston"
+AIRPORT = "BOS"
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+MAX_DIST_KM = 30.0                        # also the grid half-width
+MAX_ALT_100FT = None                      # e.g. 50.0 for <= 5,000 ft
+PHASE = None                              # "Departure", "Arrival", "Local", "Overflight" or None
+CELL_M = 250                              # grid cell size in meters
+WORKERS = None                            # processes (None = all cores)
+# ==============================
+
+if __name__ == "__main__":
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    OUT_DIR = os.path.join(ROOT, f"overflights_{METRO}_{AIRPORT}_{timestamp}")
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT, max_km=MAX_DIST_KM,
+                                          max_alt_100ft=MAX_ALT_100FT, phase=PHASE)
+    grid = OverflightGrid(AIRPORTS[AIRPORT], MAX_DIST_KM * 1000, CELL_M,
+                          name=f"{AIRPORT.lower()}_overflights_{CELL_M}m")
+    grid.add_tracks(tracks, workers=WORKERS)
+    path = grid.write_ascii_grid(OUT_DIR)
+
+    print(f"Rasterized {grid.flights} flights; busiest cell: {grid.grid.max()} flights.")
+    print(f"Raster: {path}")
@@ -0,0 +1,48 @@
+# Flights passing near receptor points (homes, schools, monitors) below an altitude cap (no ArcGIS needed)
+# Outputs: <points>_exposure.csv (one row per receptor: flights, flights/day and counts by phase for
+# each period, closest approach) and <points>_exposure_hourly.csv (flights by period, phase and hour).
+# Run Build_track_store.py first.
+
+import datetime
+import os
+
+from flight_tracks.airports import AIRPORTS
+from flight_tracks.exposure import receptor_exposure
+from flight_tracks.query import TrackStore
+from flight_tracks.segment_index import SegmentIndex
+from flight_tracks.vector_io import read_points
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+POINTS = r"C:\Users\mnguyen\Downloads\Prof Bradley\receptors\receptors.shp"   # .shp or .gpkg
+LAYER = None                              # GeoPackage layer name (None = first)
+NAME_FIELD = "Label"
+METRO = "Boston"
+AIRPORT = "BOS"
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+SPLIT = None                              # e.g. "2013-06-15" for before/after counts (None = one period)
+DAYS = 28                                 # days on either side of SPLIT
+RADIUS_M = 1000
+MAX_ALT_100FT = 30.0                      # flights at or below 3,000 ft
+UTC_OFFSET_H = 0                          # hours added to the CSV times for hour of day (e.g. -4: UTC -> Boston summer)
+# ==============================
+
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+OUT_DIR = os.path.join(ROOT, f"exposure_{METRO}_{AIRPORT}_{timestamp}")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+lon, lat, attrs = read_points(POINTS, LAYER)
+labels = [a.get(NAME_FIELD, i + 1) for i, a in enumerate(attrs)]
+tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT, clean=True)
+index = SegmentIndex.build(tracks, AIRPORTS[AIRPORT])
+index.save(os.path.join(OUT_DIR, f"{AIRPORT.lower()}_segments.npz"))
+exp = receptor_exposure(tracks, lon, lat, RADIUS_M, MAX_ALT_100FT, split=SPLIT, days=DAYS,
+                        labels=labels, index=index, utc_offset_h=UTC_OFFSET_H)
+base = os.path.splitext(os.path.basename(POINTS))[0]
+table = exp.write_csv(os.path.join(OUT_DIR, f"{base}_exposure.csv"), NAME_FIELD)
+hourly = exp.write_hourly_csv(os.path.join(OUT_DIR, f"{base}_exposure_hourly.csv"), NAME_FIELD)
+
+print(f"{len(tracks)} flights, {len(labels)} receptors; {int((exp.flights > 0).sum())} receptors overflown.")
+print(f"Receptor table: {table}")
+print(f"Hourly table:   {hourly}")
@@ -0,0 +1,38 @@
+# Distinct flights per census tract (or county / municipality) by phase and altitude band (no ArcGIS needed)
+# Polygons: a local shapefile or GeoPackage in lon/lat, e.g. the tracts saved by "Simple Shapefile Creation.R"
+# Run Build_track_store.py first.
+
+import datetime
+import os
+
+from flight_tracks.query import TrackStore
+from flight_tracks.tract_join import ALT_BANDS_100FT, polygon_overflights
+from flight_tracks.vector_io import read_polygons
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+POLYGONS = r"C:\Users\mnguyen\Downloads\Prof Bradley\census\MA_tracts.shp"   # .shp or .gpkg
+LAYER = None                              # GeoPackage layer name (None = first)
+LABEL_FIELDS = ("GEOID", "NAMELSAD", "NAME")
+METRO = "Boston"
+AIRPORT = "BOS"
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+MAX_DIST_KM = 30.0
+MAX_ALT_100FT = None
+ALT_BANDS = ALT_BANDS_100FT               # band edges in 100 ft
+# ==============================
+
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+OUT_DIR = os.path.join(ROOT, f"polygon_counts_{METRO}_{AIRPORT}_{timestamp}")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+layer = read_polygons(POLYGONS, LAYER)
+tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT,
+                                      max_km=MAX_DIST_KM, max_alt_100ft=MAX_ALT_100FT)
+counts = polygon_overflights(tracks, layer, ALT_BANDS, LABEL_FIELDS)
+base = os.path.splitext(os.path.basename(POLYGONS))[0]
+path = counts.write_csv(os.path.join(OUT_DIR, f"{base}_overflights.csv"), label_field=LABEL_FIELDS[0])
+
+print(f"{len(tracks)} flights over {len(layer)} polygons; {int((counts.flights > 0).sum())} polygons overflown.")
+print(f"Counts table: {path}")
@@ -0,0 +1,33 @@
+# Flight tracks as vector tiles in one .mbtiles file (no ArcGIS needed)
+# Tracks are simplified and clipped per zoom level; tiles carry flight_id and phase.
+# Open the .mbtiles in QGIS (Add Vector Tile Layer) or serve it with any MBTiles tile server.
+# Run Build_track_store.py first.
+
+import datetime
+import os
+
+from flight_tracks.mbtiles import write_mbtiles
+from flight_tracks.query import TrackStore
+
+# ========= EDIT THESE =========
+ROOT = r"C:\Users\mnguyen\Downloads\Prof Bradley\Boston_2"
+STORE_DIR = r"C:\Users\mnguyen\Downloads\Prof Bradley\track_store"
+METRO = "Boston"
+AIRPORT = "BOS"
+START, END = "2013-06-01", "2013-06-29"   # END exclusive
+MAX_DIST_KM = 30.0
+MAX_ALT_100FT = None                      # e.g. 50.0 for <= 5,000 ft
+MIN_ZOOM, MAX_ZOOM = 6, 14
+WORKERS = None                            # tile encoder processes (None = all cores)
+# ==============================
+
+if __name__ == "__main__":
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    OUT_DIR = os.path.join(ROOT, f"tiles_{METRO}_{AIRPORT}_{timestamp}")
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    tracks = TrackStore(STORE_DIR).select(METRO, START, END, airport=AIRPORT, max_km=MAX_DIST_KM,
+                                          max_alt_100ft=MAX_ALT_100FT, clip=True)
+    path = os.path.join(OUT_DIR, f"{AIRPORT.lower()}_tracks.mbtiles")
+    n = write_mbtiles(path, tracks, MIN_ZOOM, MAX_ZOOM, layer=f"{AIRPORT.lower()}_tracks", workers=WORKERS)
+    print(f"{n} tiles from {len(tracks)} flights: {path}")
@@ -0,0 +1,5 @@
+# flight_tracks: arcpy-free building blocks for the metro flight-track scripts
+# (decoding raw IFR CSVs, a day-partitioned columnar store, and track queries).
+#
+# Keep this file light: submodules are imported by the caller, e.g.
+#   from flight_tracks.query import TrackStore
@@ -0,0 +1,71 @@
+# Airport centers, metro groupings and CSV column-name candidates shared by
+# the store builder and the query API.
+
+# (lon, lat) of each airport reference point, WGS 1984
+AIRPORTS = {
+    "BOS": (-71.00956, 42.36561),    # Logan
+    "SEA": (-122.30875, 47.45020),   # Seattle-Tacoma
+    "PHX": (-112.01158, 33.43428),   # Phoenix Sky Harbor
+    "OAK": (-122.22080, 37.72129),   # Oakland
+    "SFO": (-122.37897, 37.62131),   # San Francisco
+    "SJC": (-121.92901, 37.36259),   # San Jose
+    "SMF": (-121.59077, 38.69542),   # Sacramento
+}
+
+# Metro name -> airports whose dist_to_* columns the raw CSV carries
+METROS = {
+    "Boston": ["BOS"],
+    "Seattle": ["SEA"],
+    "Phoenix": ["PHX"],
+    "NorCal": ["OAK", "SFO", "SJC", "SMF"],
+}
+
+NEAR_AIRPORT_M = int(3 * 1852)   # 3 nm, same radius the phase classification uses
+
+# Column-name variants seen across the metro CSVs (matched case-insensitively)
+FLIGHT_CANDIDATES = ("flight_index", "flight_id", "flight")
+DATE_CANDIDATES = ("date", "timestamp", "ts", "time")
+LAT_CANDIDATES = ("lat", "latitude", "y", "lat_dd")
+LON_CANDIDATES = ("long", "longitude", "lon", "x", "lon_dd")
+ALT_CANDIDATES = ("altitudex100ft", "altitude_x100ft", "altitude100ft", "altitude_100ft",
+                  "altitude_x100_ft", "alt100ft", "alt_100ft")
+
+
+def dist_candidates(code, single_airport=False):
+    """Distance-column variants for one airport, including the NorCal 'dis_to_*' spelling."""
+    c = code.lower()
+    cands = [f"dist_to_{c}", f"dis_to_{c}", f"dist_to_{c}_km", f"{c}_km", f"dist_{c}_km",
+             f"distance_to_{c}_km", f"distance_to_{c}", f"dist_{c}"]
+    if single_airport:
+        cands += ["dist_km", "distance_km"]
+    return cands
+
+
+def resolve_column(cols_lower_map, *candidates):
+    """
+    Given a dict {lowername: actualname}, return the actual header that matches
+    the first existing candidate (case-insensitive). Raises KeyError if none.
+    """
+    for cand in candidates:
+        lc = cand.lower()
+        if lc in cols_lower_map:
+            return cols_lower_map[lc]
+    raise KeyError("/".join(candidates))
+
+
+def metro_airports(metro):
+    for name, codes in METROS.items():
+        if name.lower() == metro.lower():
+            return list(codes)
+    raise KeyError(f"Unknown metro {metro!r}. Known: {sorted(METROS)}")
+
+
+def haversine_m(lon, lat, lon0, lat0):
+    """Great-circle distance in meters from (lon0, lat0); works on scalars or NumPy arrays (both ends)."""
+    import numpy as np
+    r = 6371008.8
+    phi1, phi2 = np.radians(lat0), np.radians(lat)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lon) - np.radians(lon0)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * r * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,41 @@
+# Batch geodesic buffers: true circles of a given ground radius around many
+# centers at once, replacing the one-at-a-time st_buffer (R, EPSG:2272 feet)
+# and arcpy.analysis.Buffer(..., method="GEODESIC") steps.
+#
+# Every vertex of every buffer comes from one vectorized direct-geodesic call
+# on an (n_centers x n_vertices) azimuth grid, and all buffers go to a single
+# polygon shapefile in one pass.
+
+import numpy as np
+
+from .geodesy import direct, to_meters
+from .vector_io import write_shapefile
+
+
+def geodesic_buffers(lon, lat, radius, units="m", n_vertices=72):
+    """
+    Buffer rings for each center: array (n, n_vertices + 1, 2) of lon/lat,
+    closed and clockwise (shapefile outer-ring order). radius may be a scalar
+    or one value per center, in units "ft", "m", "km" or "nmi".
+    """
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    r = np.broadcast_to(to_meters(radius, units), lon.shape)
+    az = np.linspace(0.0, 360.0, n_vertices, endpoint=False)
+    x, y = direct(lon[:, None], lat[:, None], az[None, :], r[:, None])
+    rings = np.stack([x, y], axis=2)
+    return np.concatenate([rings, rings[:, :1]], axis=1)
+
+
+def write_buffers(path, lon, lat, radius, units="m", n_vertices=72, names=None):
+    """Build all buffers and write them to one polygon shapefile (name, radius, units fields)."""
+    rings = geodesic_buffers(lon, lat, radius, units, n_vertices)
+    n = len(rings)
+    names = [str(i + 1) for i in range(n)] if names is None else [str(v) for v in names]
+    radii = np.broadcast_to(np.asarray(radius, dtype=np.float64), (n,))
+    fields = [("name", "C", 64, 0), ("radius", "N", 18, 3), ("units", "C", 8, 0),
+              ("center_x", "N", 19, 8), ("center_y", "N", 19, 8)]
+    records = [(names[i], float(radii[i]), units, float(np.atleast_1d(lon)[i]), float(np.atleast_1d(lat)[i]))
+               for i in range(n)]
+    write_shapefile(path, 5, [[ring] for ring in rings], fields, records)
+    return path
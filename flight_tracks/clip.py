@@ -0,0 +1,155 @@
+# Exact clipping of tracks at the distance / altitude thresholds.
+#
+# Filtering points (dist <= R, alt <= A) leaves tracks that stop at the last
+# sample inside and jump across any excursion outside. clip_tracks instead
+# works per segment: each segment's in-bounds part is one interval of its
+# parameter t in [0, 1] (the circle is convex in the AEQD plane around the
+# airport, the altitude limit is a half-space), solved for all segments at
+# once. Crossing points are interpolated, and each flight is split into the
+# pieces that stay in bounds.
+
+import numpy as np
+
+from .airports import AIRPORTS
+from .projection import projection_for
+from .tracks import Tracks
+
+
+def _circle_interval(x0, y0, x1, y1, r):
+    """[lo, hi] of t where |P(t)| <= r on the segment; lo > hi when empty."""
+    dx, dy = x1 - x0, y1 - y0
+    a = dx * dx + dy * dy
+    b = 2.0 * (x0 * dx + y0 * dy)
+    c = x0 * x0 + y0 * y0 - r * r
+    lo = np.full(len(x0), np.inf)
+    hi = np.full(len(x0), -np.inf)
+    still = a == 0
+    inside_still = still & (c <= 0)
+    lo[inside_still], hi[inside_still] = 0.0, 1.0
+    move = ~still
+    disc = b[move] ** 2 - 4.0 * a[move] * c[move]
+    ok = disc >= 0
+    sq = np.sqrt(np.where(ok, disc, 0.0))
+    r1 = (-b[move] - sq) / (2.0 * a[move])
+    r2 = (-b[move] + sq) / (2.0 * a[move])
+    lo[move] = np.where(ok, r1, np.inf)
+    hi[move] = np.where(ok, r2, -np.inf)
+    return lo, hi
+
+
+def _below_interval(v0, v1, limit):
+    """[lo, hi] of t where v(t) <= limit, v linear; NaN ends are out of bounds."""
+    dv = v1 - v0
+    lo = np.full(len(v0), np.inf)
+    hi = np.full(len(v0), -np.inf)
+    flat = dv == 0
+    lo[flat & (v0 <= limit)], hi[flat & (v0 <= limit)] = 0.0, 1.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (limit - v0) / dv
+    up = dv > 0
+    down = dv < 0
+    lo[up], hi[up] = 0.0, t[up]
+    lo[down], hi[down] = t[down], 1.0
+    return lo, hi
+
+
+def clip_tracks(tracks, center=None, max_km=None, max_alt_100ft=None, columns=None):
+    """
+    Pieces of tracks inside the max_km circle around center (airport code or
+    (lon, lat)) and at or below max_alt_100ft, with interpolated boundary
+    points. Returns Tracks with one entry per piece: flight_ids repeat the
+    source id, attrs keep the source's attrs plus "source" (index into the
+    input) and "piece" (0.. within the flight). Numeric columns (and ts) are
+    interpolated at crossings; other columns take the nearest vertex.
+    """
+    n = tracks.n_points
+    cols = list(tracks.columns) if columns is None else list(columns)
+    flight = tracks.flight_index()
+    same = flight[1:] == flight[:-1]
+    seg = np.flatnonzero(same)                        # segment k joins rows seg[k], seg[k] + 1
+    lo = np.zeros(len(seg))
+    hi = np.ones(len(seg))
+    point_in = np.ones(n, dtype=bool)
+
+    if max_km is not None:
+        lon0, lat0 = AIRPORTS[center] if isinstance(center, str) else center
+        x, y = projection_for(lon0, lat0).forward(tracks["lon"], tracks["lat"])
+        r = max_km * 1000.0
+        a, b = _circle_interval(x[seg], y[seg], x[seg + 1], y[seg + 1], r)
+        lo, hi = np.maximum(lo, a), np.minimum(hi, b)
+        point_in &= np.hypot(x, y) <= r
+    if max_alt_100ft is not None:
+        alt = tracks["alt_100ft"].astype(np.float64)
+        a, b = _below_interval(alt[seg], alt[seg + 1], max_alt_100ft)
+        lo, hi = np.maximum(lo, a), np.minimum(hi, b)
+        with np.errstate(invalid="ignore"):
+            point_in &= alt <= max_alt_100ft
+
+    lo[point_in[seg]] = 0.0                           # vertices in bounds are exact ends
+    hi[point_in[seg + 1]] = 1.0
+
+    # Segments with a usable in-bounds stretch; a piece starts where a kept
+    # segment enters mid-way or does not continue the previous kept segment
+    keep = hi > lo
+    seg, lo, hi = seg[keep], np.clip(lo[keep], 0.0, 1.0), np.clip(hi[keep], 0.0, 1.0)
+    continues = np.r_[False, (seg[:-1] + 1 == seg[1:]) & (hi[:-1] == 1.0)]
+    starts_piece = (lo > 0) | ~continues
+
+    # Lone in-bounds points (single-point flights, or vertices whose both
+    # segments were dropped) become one-point pieces
+    covered = np.zeros(n, dtype=bool)
+    covered[seg[lo == 0]] = True
+    covered[seg[hi == 1] + 1] = True
+    lone = np.flatnonzero(point_in & ~covered)
+
+    # Output vertices as (row, t): value = v[row] + t * (v[row + 1] - v[row]),
+    # ordered along the track (piece start, then each kept segment's end)
+    row = np.r_[seg[starts_piece], seg, lone]
+    t = np.r_[lo[starts_piece], hi, np.zeros(len(lone))]
+    new_piece = np.r_[np.ones(starts_piece.sum(), dtype=bool), np.zeros(len(seg), dtype=bool),
+                      np.ones(len(lone), dtype=bool)]
+    order = np.argsort(np.r_[seg[starts_piece] * 4 + 1, seg * 4 + 2, lone * 4], kind="stable")
+    row, t, new_piece = row[order], t[order], new_piece[order]
+    at_next = t == 1.0                                  # land exactly on the next vertex
+    row[at_next] += 1
+    t[at_next] = 0.0
+
+    piece = np.cumsum(new_piece) - 1
+    n_pieces = int(new_piece.sum())
+    offsets = np.zeros(n_pieces + 1, dtype=np.int64)
+    np.cumsum(np.bincount(piece, minlength=n_pieces), out=offsets[1:])
+    source = flight[row[offsets[:-1]]] if n_pieces else np.zeros(0, dtype=np.int64)
+
+    nxt = np.minimum(row + 1, max(n - 1, 0))
+    out = {}
+    for name in cols:
+        v = tracks[name]
+        if v.dtype.kind == "M":
+            base = v.astype("datetime64[ns]").astype(np.int64)
+            d = (base[nxt] - base[row]).astype(np.float64)
+            out[name] = (base[row] + np.round(t * d).astype(np.int64)).astype("datetime64[ns]")
+        elif v.dtype.kind in "fiu":
+            vf = v.astype(np.float64)
+            r = vf[row] + t * (vf[nxt] - vf[row])
+            r[t == 0] = vf[row][t == 0]                 # keep vertices exact (and NaN-safe)
+            out[name] = r.astype(v.dtype if v.dtype.kind == "f" else np.float64)
+        else:
+            out[name] = np.where(t < 0.5, v[row], v[nxt])
+
+    if max_km is not None and "lon" in out and "lat" in out:
+        # crossings interpolated in the AEQD plane, where the circle test was exact
+        px = x[row] + t * (x[nxt] - x[row])
+        py = y[row] + t * (y[nxt] - y[row])
+        mid = t > 0
+        lon_c, lat_c = projection_for(lon0, lat0).inverse(px[mid], py[mid])
+        out["lon"][mid], out["lat"][mid] = lon_c, lat_c
+
+    first_piece = np.r_[True, source[1:] != source[:-1]] if n_pieces else np.zeros(0, dtype=bool)
+    idx = np.arange(n_pieces)
+    piece_no = idx - np.maximum.accumulate(np.where(first_piece, idx, 0)) if n_pieces else idx
+    attrs = {k: np.asarray(v)[source] for k, v in tracks.attrs.items()}
+    attrs["source"] = source
+    attrs["piece"] = piece_no
+    clipped = Tracks(tracks.flight_ids[source], offsets, out, attrs)
+    clipped.removed = dict(tracks.removed)
+    return clipped
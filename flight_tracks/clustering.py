@@ -0,0 +1,111 @@
+# Flight-flow clustering (arrival/departure streams).
+#
+# 1) Project every track around the airport and resample it to n points by
+#    arc length (so flights become comparable fixed-length vectors, start to
+#    end, direction included).
+# 2) Distance between two flights = mean distance between their corresponding
+#    resampled points. That is never less than the distance between their
+#    centroids, so only pairs whose centroids are within eps can be
+#    neighbors: candidates come from a sweep over centroids sorted by x, and
+#    distances are computed in fixed-size blocks of pairs.
+# 3) DBSCAN on the eps-neighbor graph: core flights have >= min_flights
+#    neighbors (self included), clusters are connected components of core
+#    flights (vectorized label propagation), border flights join a neighboring
+#    core's cluster, the rest is noise (-1).
+# Each cluster's centerline is the mean of its members' resampled tracks.
+
+import numpy as np
+
+from .projection import projection_for
+from .resample import resample_fixed_count
+from .tracks import Tracks
+
+
+def _candidate_pairs(cx, cy, eps, block):
+    """Yield (i, j) index blocks, i < j, with |centroid_i - centroid_j| <= eps (Chebyshev prefilter)."""
+    order = np.argsort(cx, kind="stable")
+    sx, sy = cx[order], cy[order]
+    hi = np.searchsorted(sx, sx + eps, side="right")
+    n_after = hi - np.arange(len(sx)) - 1
+    start = 0
+    while start < len(sx):
+        # grow the row block until it holds about `block` pairs
+        cum = np.cumsum(n_after[start:])
+        stop = start + max(1, int(np.searchsorted(cum, block, side="right")))
+        rows = np.arange(start, stop)
+        cnt = n_after[rows]
+        i = np.repeat(rows, cnt)
+        j = np.arange(int(cnt.sum())) - np.repeat(np.cumsum(cnt) - cnt, cnt) + np.repeat(rows + 1, cnt)
+        near = np.abs(sy[i] - sy[j]) <= eps
+        yield order[i[near]], order[j[near]]
+        start = stop
+
+
+def _components(n, u, v):
+    """Connected-component labels (smallest member index) of an undirected graph."""
+    label = np.arange(n)
+    while True:
+        lu, lv = label[u], label[v]
+        m = np.minimum(lu, lv)
+        before = label.copy()
+        np.minimum.at(label, lu, m)
+        np.minimum.at(label, lv, m)
+        while True:
+            jumped = label[label]
+            if np.array_equal(jumped, label):
+                break
+            label = jumped
+        if np.array_equal(label, before):
+            return label
+
+
+def cluster_flows(tracks, center, eps_m=1500.0, min_flights=10, n_points=32, block_pairs=200_000):
+    """
+    DBSCAN flows of tracks. Returns (labels per flight, -1 = noise;
+    centerlines array (clusters, n_points, 2) lon/lat; cluster sizes).
+    Clusters are numbered by size, largest first.
+    """
+    proj = projection_for(*center)
+    x, y = proj.forward(tracks["lon"], tracks["lat"])
+    # local Tracks with only the projected columns; the caller's (possibly cached) tracks stay untouched
+    vec = resample_fixed_count(Tracks(tracks.flight_ids, tracks.offsets, {"x": x, "y": y}), n_points)
+    n = len(tracks)
+    cx, cy = vec[:, :, 0].mean(axis=1), vec[:, :, 1].mean(axis=1)
+
+    eu, ev = [], []
+    degree = np.ones(n, dtype=np.int64)
+    for i, j in _candidate_pairs(cx, cy, eps_m, block_pairs):
+        d = np.hypot(vec[i, :, 0] - vec[j, :, 0], vec[i, :, 1] - vec[j, :, 1]).mean(axis=1)
+        close = d <= eps_m
+        i, j = i[close], j[close]
+        eu.append(i.astype(np.int32))
+        ev.append(j.astype(np.int32))
+        degree += np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+    eu = np.concatenate(eu) if eu else np.zeros(0, dtype=np.int32)
+    ev = np.concatenate(ev) if ev else np.zeros(0, dtype=np.int32)
+
+    core = degree >= min_flights
+    both = core[eu] & core[ev]
+    comp = _components(n, eu[both], ev[both])
+    labels = np.where(core, comp, -1)
+    # border flights: attach to the cluster of any core neighbor
+    for a, b in ((eu, ev), (ev, eu)):
+        m = ~core[a] & core[b] & (labels[a] == -1)
+        labels[a[m]] = comp[b[m]]
+
+    # renumber clusters 0..k-1 by size
+    ids, inv, sizes = np.unique(labels[labels >= 0], return_inverse=True, return_counts=True)
+    rank = np.empty(len(ids), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(ids))
+    out = np.full(n, -1, dtype=np.int64)
+    out[labels >= 0] = rank[inv]
+    sizes = np.bincount(out[out >= 0], minlength=len(ids))
+
+    centers = np.zeros((len(ids), n_points, 2))
+    member = out >= 0
+    np.add.at(centers, out[member], vec[member])
+    if len(ids):
+        centers /= sizes[:, None, None]
+        lon, lat = proj.inverse(centers[:, :, 0], centers[:, :, 1])
+        centers = np.stack([lon, lat], axis=2)
+    return out, centers, sizes
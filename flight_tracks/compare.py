@@ -0,0 +1,233 @@
+# Before/after procedure comparison from one 56-day file.
+#
+# The raw CSV is decoded once, split into two periods (the first and last N
+# days, like the *_first28days / *_last28days scripts, or around a given
+# split date), and both periods' tracks are built in the same process. For
+# each airport it writes:
+#   <code>_density_before/after/delta.asc   traffic seconds per cell per day
+#   <code>_altitude_profile.csv              median altitude by distance bin and phase, and the shift
+#   <code>_polygon_deltas.csv                distinct flights per polygon, before/after/delta (with --polygons)
+#
+#   python -m flight_tracks.compare IFR_MetroArea5_05mar2015_56days.csv --metro NorCal --out cmp --max-km 60
+
+import argparse
+import csv
+import datetime
+import os
+
+import numpy as np
+
+from .airports import AIRPORTS, NEAR_AIRPORT_M, metro_airports
+from .decode import decode_csv
+from .density import DensityGrid, MetricGrid
+from .geodesy import inverse
+from .tracks import CLEAN_REASONS, PHASES, build_tracks, classify_phase
+
+DAY = np.timedelta64(1, "D")
+
+
+def split_periods(ts, split=None, days=28):
+    """
+    (before_mask, after_mask, before_days, after_days). Without split: the first
+    `days` calendar days from the earliest timestamp and the last `days` days
+    ending on the latest one. With split: `days` days on either side of it
+    (all data on each side when days is None).
+    """
+    if split is None:
+        days = days or 28
+        first = ts.min().astype("datetime64[D]")
+        last = ts.max().astype("datetime64[D]")
+        before = ts < first + days * DAY
+        after = (ts >= last - (days - 1) * DAY) & (ts < last + DAY)
+        return before, after, days, days
+    split = np.datetime64(split, "D")
+    before = ts < split
+    after = ts >= split
+    if days is not None:
+        before &= ts >= split - days * DAY
+        after &= ts < split + days * DAY
+        return before, after, days, days
+    n_before = int((split - ts[before].min().astype("datetime64[D]")) / DAY) if before.any() else 0
+    n_after = int((ts[after].max().astype("datetime64[D]") - split) / DAY) + 1 if after.any() else 0
+    return before, after, n_before, n_after
+
+
+def period_tracks(cols, mask, code, max_km=None, max_alt_100ft=None, clean=True):
+    """
+    Tracks for one period and airport, with the scripts' distance/altitude
+    filters and phase; clean drops duplicate timestamps and spikes first.
+    """
+    keep = mask.copy()
+    if max_km is not None:
+        keep &= cols[f"dist_{code}"] <= max_km
+    if max_alt_100ft is not None:
+        keep &= cols["alt_100ft"] <= max_alt_100ft
+    sub = {k: v[keep] for k, v in cols.items() if k != "flight"}
+    tracks = build_tracks(cols["flight"][keep], sub, clean=clean)
+    tracks.attrs["phase"] = classify_phase(tracks, AIRPORTS[code], NEAR_AIRPORT_M)
+    return tracks
+
+
+def altitude_profile(tracks, code, bin_km=2.0, max_km=60.0):
+    """Median altitude (100 ft) and point count per (phase, distance bin); NaN where empty."""
+    dist_col = f"dist_{code}"
+    if dist_col in tracks.columns:
+        dist = tracks[dist_col].astype(np.float64)
+    else:
+        dist = inverse(*AIRPORTS[code], tracks["lon"], tracks["lat"])[0] / 1000
+    n_bins = int(np.ceil(max_km / bin_km))
+    b = np.floor(dist / bin_km).astype(np.int64)
+    phase = np.repeat(np.array([PHASES.index(p) for p in tracks.attrs["phase"]], dtype=np.int64), tracks.counts)
+    alt = tracks["alt_100ft"].astype(np.float64)
+    ok = (b >= 0) & (b < n_bins) & ~np.isnan(alt)
+    key, alt = phase[ok] * n_bins + b[ok], alt[ok]
+    order = np.lexsort((alt, key))
+    key, alt = key[order], alt[order]
+
+    n_keys = len(PHASES) * n_bins
+    count = np.bincount(key, minlength=n_keys)
+    start = np.cumsum(count) - count
+    med = np.full(n_keys, np.nan)
+    has = count > 0
+    lo = start[has] + (count[has] - 1) // 2
+    hi = start[has] + count[has] // 2
+    med[has] = (alt[lo] + alt[hi]) / 2
+    return med.reshape(len(PHASES), n_bins), count.reshape(len(PHASES), n_bins)
+
+
+def _write_profile(path, before, after, bin_km):
+    (mb, nb), (ma, na) = before, after
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["phase", "dist_from_km", "dist_to_km", "before_median_ft", "after_median_ft",
+                    "shift_ft", "before_points", "after_points"])
+        for p, phase in enumerate(PHASES):
+            for i in range(mb.shape[1]):
+                if nb[p, i] == 0 and na[p, i] == 0:
+                    continue
+                ft_b, ft_a = mb[p, i] * 100, ma[p, i] * 100
+                w.writerow([phase, i * bin_km, (i + 1) * bin_km,
+                            "" if np.isnan(ft_b) else round(ft_b), "" if np.isnan(ft_a) else round(ft_a),
+                            "" if np.isnan(ft_a - ft_b) else round(ft_a - ft_b), int(nb[p, i]), int(na[p, i])])
+    return path
+
+
+def compare_airport(cols, before, after, n_before, n_after, code, out_dir, max_km=None,
+                    max_alt_100ft=None, cell_m=250, bin_km=2.0, layer=None, clean=True):
+    tb = period_tracks(cols, before, code, max_km, max_alt_100ft, clean)
+    ta = period_tracks(cols, after, code, max_km, max_alt_100ft, clean)
+    for label, t in (("before", tb), ("after", ta)):
+        by_phase = ", ".join(f"{p}={int((t.attrs['phase'] == p).sum())}" for p in PHASES)
+        print(f"[{code}] {label}: {len(t)} flights ({by_phase})")
+        if t.removed:
+            print(f"[{code}] {label}: cleaned rows " + ", ".join(f"{r}={t.removed[r]}" for r in CLEAN_REASONS))
+
+    half_m = (max_km or 60.0) * 1000
+    grids = []
+    for label, t, n_days in (("before", tb, n_before), ("after", ta, n_after)):
+        g = DensityGrid(AIRPORTS[code], half_m, cell_m, name=f"{code.lower()}_density_{label}")
+        g.add_tracks(t, time_weighted=True)
+        g.grid /= max(n_days, 1)
+        g.write_ascii_grid(out_dir)
+        grids.append(g)
+    delta = MetricGrid(AIRPORTS[code], half_m, cell_m, name=f"{code.lower()}_density_delta")
+    delta.grid = grids[1].grid - grids[0].grid
+    delta.write_ascii_grid(out_dir)
+
+    profile = _write_profile(os.path.join(out_dir, f"{code.lower()}_altitude_profile.csv"),
+                             altitude_profile(tb, code, bin_km, max_km or 60.0),
+                             altitude_profile(ta, code, bin_km, max_km or 60.0), bin_km)
+    print(f"[{code}] density grids (s/day) and altitude profile: {profile}")
+
+    if layer is not None:
+        from .tract_join import polygon_overflights
+        pb, pa = polygon_overflights(tb, layer), polygon_overflights(ta, layer)
+        path = os.path.join(out_dir, f"{code.lower()}_polygon_deltas.csv")
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["polygon", "before_flights", "after_flights", "delta",
+                        "before_per_day", "after_per_day", "delta_per_day"])
+            for i, lab in enumerate(pb.labels):
+                b_, a_ = int(pb.flights[i]), int(pa.flights[i])
+                db, da = b_ / max(n_before, 1), a_ / max(n_after, 1)
+                w.writerow([lab, b_, a_, a_ - b_, round(db, 3), round(da, 3), round(da - db, 3)])
+        print(f"[{code}] polygon deltas: {path}")
+    return tb, ta
+
+
+def _compare_shared(cols, *args):
+    cols = dict(cols)
+    before, after = cols.pop("_before"), cols.pop("_after")
+    compare_airport(cols, before, after, *args)
+    return args[2]
+
+
+def run_comparison(csv_path, airports, out_dir, split=None, days=28, max_km=None, max_alt_100ft=None,
+                   cell_m=250, bin_km=2.0, polygons=None, workers=1, clean=True, airport_workers=1):
+    """
+    Decode csv_path once and write the before/after products for each airport
+    into out_dir. With airport_workers != 1 the airports run in parallel
+    processes attached to one shared-memory copy of the decoded columns.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if workers == 1:
+        cols, _ = decode_csv(csv_path, airports)
+    else:
+        from .parallel_parse import parse_csv_parallel
+        cols, _ = parse_csv_parallel(csv_path, airports, workers=workers)
+    before, after, n_before, n_after = split_periods(cols["ts"], split, days)
+    print(f"Before: {int(before.sum())} rows over {n_before} days; after: {int(after.sum())} rows over {n_after} days")
+
+    layer = None
+    if polygons:
+        from .vector_io import read_polygons
+        layer = read_polygons(polygons)
+    codes = []
+    for code in airports:
+        if max_km is not None and f"dist_{code}" not in cols:
+            print(f"Skip {code}: distance column not found.")
+            continue
+        codes.append(code)
+    args = [(n_before, n_after, code, out_dir, max_km, max_alt_100ft, cell_m, bin_km, layer, clean)
+            for code in codes]
+    if airport_workers == 1 or len(codes) <= 1:
+        for a in args:
+            compare_airport(cols, before, after, *a)
+    else:
+        # One decoded copy in shared memory, one process per airport
+        from .shared import map_shared
+        shared = dict(cols, _before=before, _after=after)
+        map_shared(_compare_shared, shared, args, airport_workers)
+    print(f"Comparison folder: {out_dir}")
+    return out_dir
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Before/after comparison from one raw metro CSV.")
+    ap.add_argument("csv")
+    ap.add_argument("--metro", required=True, help="Boston, Seattle, Phoenix or NorCal")
+    ap.add_argument("--airport", action="append", help="limit to these airports (repeatable)")
+    ap.add_argument("--out", help="output folder (default: next to the CSV, timestamped)")
+    ap.add_argument("--split", help="split date YYYY-MM-DD (default: first vs last --days)")
+    ap.add_argument("--days", type=int, default=28, help="days per period (0 with --split = all data)")
+    ap.add_argument("--max-km", type=float)
+    ap.add_argument("--max-alt-100ft", type=float)
+    ap.add_argument("--cell-m", type=float, default=250)
+    ap.add_argument("--bin-km", type=float, default=2.0)
+    ap.add_argument("--polygons", help="tract/county polygons (.shp or .gpkg) for per-polygon deltas")
+    ap.add_argument("--workers", type=int, default=1, help="CSV parser processes (0 = all cores)")
+    ap.add_argument("--airport-workers", type=int, default=1,
+                    help="airports compared in parallel on shared decoded columns (0 = all cores)")
+    ap.add_argument("--no-clean", action="store_true", help="keep duplicate timestamps and speed/climb spikes")
+    args = ap.parse_args(argv)
+
+    airports = args.airport or metro_airports(args.metro)
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(args.csv)),
+                                   f"compare_{args.metro}_{datetime.datetime.now():%Y%m%d_%H%M%S}")
+    run_comparison(args.csv, airports, out, args.split, args.days or None, args.max_km, args.max_alt_100ft,
+                   args.cell_m, args.bin_km, args.polygons, args.workers or None,
+                   not args.no_clean, args.airport_workers or None)
+
+
+if __name__ == "__main__":
+    main()
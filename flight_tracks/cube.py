@@ -0,0 +1,191 @@
+# Operations count cube: flights per airport x phase x day x hour of day
+# (optionally x altitude band), built from per-flight summaries.
+#
+# Every flight contributes one composite key (np.ravel_multi_index over the
+# axis positions of its airport, phase, start day, start hour and band) and
+# the cube is a single np.bincount reshaped to the axes, stored in the
+# smallest unsigned int that holds the largest count. Axis labels travel with
+# the array, so slicing (sel), rolling up (sum) and regrouping days into
+# weekdays (group) are plain numpy indexing and reductions on a few
+# hundred KB. Rebuilding for another window only re-reads the summaries.
+#
+#   cube = count_cube({"BOS": flight_summary(tracks, "BOS")}, start="2013-06-01", end="2013-06-29")
+#   wk = cube.sel(airport="BOS", phase="Departure", day=cube.weekdays())
+#   wk.sum("day").counts / len(wk.axes["day"])           # departures per weekday by hour
+#   cube.save(os.path.join(out_dir, "ops_cube.npz"))
+
+import csv
+
+import numpy as np
+
+from .tract_join import band_labels
+from .tracks import PHASES
+
+HOURS = 24
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _compact(counts):
+    top = int(counts.max()) if counts.size else 0
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if top <= np.iinfo(dtype).max:
+            return counts.astype(dtype)
+    return counts.astype(np.uint64)
+
+
+class CountCube:
+    """counts[...] = flights, with axes = {name: labels} in array order."""
+
+    def __init__(self, counts, axes):
+        self.counts = counts
+        self.axes = {k: np.asarray(v) for k, v in axes.items()}
+        if tuple(len(v) for v in self.axes.values()) != counts.shape:
+            raise ValueError("axis labels do not match the counts shape")
+
+    def __repr__(self):
+        dims = ", ".join(f"{k}={len(v)}" for k, v in self.axes.items())
+        return f"CountCube({dims}; {int(self.counts.sum())} flights, {self.counts.nbytes} bytes)"
+
+    def _axis(self, name):
+        if name not in self.axes:
+            raise KeyError(f"No axis {name!r}; axes are {list(self.axes)}")
+        return list(self.axes).index(name)
+
+    def _positions(self, name, sel):
+        labels = self.axes[name]
+        if isinstance(sel, slice):                  # label range, stop exclusive
+            keep = np.ones(len(labels), dtype=bool)
+            if sel.start is not None:
+                keep &= labels >= np.asarray(sel.start, dtype=labels.dtype)
+            if sel.stop is not None:
+                keep &= labels < np.asarray(sel.stop, dtype=labels.dtype)
+            return np.flatnonzero(keep)
+        sel = np.asarray(sel)
+        if sel.dtype == bool:
+            return np.flatnonzero(sel)
+        wanted = sel.astype(labels.dtype).ravel()
+        pos = np.flatnonzero(np.isin(labels, wanted))
+        if len(pos) < len(np.unique(wanted)):
+            missing = sorted(set(wanted.tolist()) - set(labels[pos].tolist()))
+            raise KeyError(f"{name} has no label(s) {missing}")
+        return pos
+
+    def sel(self, **selection):
+        """
+        Sub-cube. Each keyword is an axis: a single label drops the axis, a
+        list of labels, a boolean mask or a label slice (stop exclusive,
+        e.g. day=slice("2013-06-01", "2013-06-15")) keeps it.
+        """
+        counts, axes = self.counts, dict(self.axes)
+        for name, sel in selection.items():
+            if name not in axes:
+                raise KeyError(f"No axis {name!r}; axes are {list(axes)}")
+            i = list(axes).index(name)
+            scalar = not isinstance(sel, slice) and np.ndim(sel) == 0
+            pos = self._positions(name, sel)
+            counts = np.take(counts, pos[0] if scalar else pos, axis=i)
+            if scalar:
+                del axes[name]
+            else:
+                axes[name] = self.axes[name][pos]
+        return CountCube(counts, axes)
+
+    def sum(self, *names):
+        """Roll up: sum over the named axes (all axes -> int total)."""
+        if not names:
+            return int(self.counts.sum())
+        idx = tuple(self._axis(n) for n in names)
+        counts = self.counts.sum(axis=idx, dtype=np.int64)
+        return CountCube(_compact(counts), {k: v for k, v in self.axes.items() if k not in names})
+
+    def group(self, name, keys, labels=None):
+        """Sum labels of one axis that share a key (keys: one per label), e.g. days -> weekdays."""
+        i = self._axis(name)
+        keys = np.asarray(keys)
+        groups = np.unique(keys) if labels is None else np.asarray(labels)
+        parts = [np.take(self.counts, np.flatnonzero(keys == g), axis=i).sum(axis=i, dtype=np.int64)
+                 for g in groups]
+        counts = np.stack(parts, axis=i) if parts else np.zeros(
+            self.counts.shape[:i] + (0,) + self.counts.shape[i + 1:], dtype=np.int64)
+        return CountCube(_compact(counts), {k: (groups if k == name else v) for k, v in self.axes.items()})
+
+    def weekday(self):
+        """Day-of-week position (0 = Monday) of every label on the day axis."""
+        return (self.axes["day"].astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+    def weekdays(self):
+        """Day labels falling Monday to Friday."""
+        return self.axes["day"][self.weekday() < 5]
+
+    def by_weekday(self):
+        """Roll the day axis up into Mon..Sun."""
+        cube = self.group("day", self.weekday(), np.arange(7))
+        cube.axes["day"] = np.array(WEEKDAY_NAMES)
+        return cube
+
+    def save(self, path):
+        arrays = {f"axis_{k}": v for k, v in self.axes.items()}
+        np.savez_compressed(path, counts=self.counts, axis_order=np.array(list(self.axes)), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z["counts"], {str(k): z[f"axis_{k}"] for k in z["axis_order"]})
+
+    def write_csv(self, path):
+        """Long table of the non-zero cells, one column per axis, ready for a pivot table."""
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(list(self.axes) + ["flights"])
+            for pos in zip(*np.nonzero(self.counts)):
+                w.writerow([self.axes[k][p] for k, p in zip(self.axes, pos)] + [int(self.counts[pos])])
+        return path
+
+
+def count_cube(summaries, start=None, end=None, band_edges=None, utc_offset_h=0):
+    """
+    Cube of flights by airport, phase, day and hour of their start time
+    (shifted by utc_offset_h), and by altitude band of their lowest point when
+    band_edges (100 ft) are given. summaries: {airport: flight_summary dict}
+    (needs start_time; phase, or all flights count as "All"; min_alt for bands).
+    Days run from start to end (exclusive), default the span of the data.
+    """
+    airports = list(summaries)
+    shift = np.timedelta64(int(round(utc_offset_h * 3600)), "s")
+    local = {a: s["start_time"].astype("datetime64[s]") + shift for a, s in summaries.items()}
+    has_phase = all("phase" in s for s in summaries.values())
+    phases = list(PHASES) if has_phase else ["All"]
+
+    days = np.concatenate([t[~np.isnat(t)].astype("datetime64[D]") for t in local.values()] or [[]])
+    empty = np.datetime64(0, "D")
+    day0 = np.datetime64(start, "D") if start is not None else (days.min() if len(days) else empty)
+    day1 = np.datetime64(end, "D") if end is not None else (days.max() + 1 if len(days) else empty)
+    day_labels = np.arange(day0, day1, dtype="datetime64[D]")
+
+    axes = {"airport": np.array(airports), "phase": np.array(phases), "day": day_labels,
+            "hour": np.arange(HOURS)}
+    if band_edges is not None:
+        axes["alt_band"] = np.array(band_labels(band_edges))
+    shape = tuple(len(v) for v in axes.values())
+
+    keys = []
+    for a, code in enumerate(airports):
+        s, t = summaries[code], local[code]
+        ok = ~np.isnat(t)
+        day = np.full(len(t), -1, dtype=np.int64)
+        hour = np.zeros(len(t), dtype=np.int64)
+        day[ok] = (t[ok].astype("datetime64[D]") - day0).astype(np.int64)
+        hour[ok] = (t[ok] - t[ok].astype("datetime64[D]")) // np.timedelta64(1, "h")
+        ok &= (day >= 0) & (day < len(day_labels))
+        phase = (np.array([PHASES.index(p) for p in s["phase"]], dtype=np.int64) if has_phase
+                 else np.zeros(len(t), dtype=np.int64))
+        pos = [np.full(int(ok.sum()), a), phase[ok], day[ok], hour[ok]]
+        if band_edges is not None:
+            alt = np.nan_to_num(np.asarray(s["min_alt"], dtype=np.float64)[ok], nan=0.0)
+            pos.append(np.clip(np.searchsorted(np.asarray(band_edges), alt, side="right") - 1,
+                               0, len(band_edges) - 1))
+        keys.append(np.ravel_multi_index(pos, shape))
+    key = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+    counts = np.bincount(key, minlength=int(np.prod(shape))).reshape(shape)
+    return CountCube(_compact(counts), axes)
@@ -0,0 +1,204 @@
+# Warm track worker: a long-running process that keeps decoded CSVs and built
+# tracks in memory, so repeated runs (another radius, ceiling or phase on the
+# same file) skip the parse and start in milliseconds.
+#
+#   python -m flight_tracks.daemon serve --max-mb 4096 &
+#   python -m flight_tracks.daemon tracks Boston_first_28_days.csv --metro Boston --max-km 30 --out out
+#   python -m flight_tracks.daemon stats
+#   python -m flight_tracks.daemon stop
+#
+# Requests and replies are one JSON object per line over a UNIX socket
+# (POSIX only). The client side imports only the standard library; numpy and
+# the decoder load once, in the server. Requests are handled one at a time.
+# Cached entries are dropped least-recently-used first once the cache holds
+# more than --max-mb of arrays; a source file is re-read when its size or
+# modification time changes.
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "flight_tracks.sock")
+
+
+def _nbytes(value):
+    if isinstance(value, dict):
+        return sum(v.nbytes for v in value.values())
+    return (value.offsets.nbytes + value.flight_ids.nbytes + _nbytes(value.columns)
+            + sum(getattr(v, "nbytes", 0) for v in value.attrs.values()))
+
+
+class ArrayCache:
+    """LRU of decoded column dicts and Tracks, capped by total array bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()     # key -> (value, nbytes)
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key][0]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        if key in self._items:
+            self.nbytes -= self._items.pop(key)[1]
+        self._items[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes and len(self._items) > 1:
+            _, (_, freed) = self._items.popitem(last=False)
+            self.nbytes -= freed
+            self.evictions += 1
+
+    def stats(self):
+        return {"entries": len(self._items), "cache_mb": round(self.nbytes / 1e6, 1),
+                "max_mb": round(self.max_bytes / 1e6, 1), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+class TrackWorker:
+    def __init__(self, max_bytes):
+        self.cache = ArrayCache(max_bytes)
+        self.requests = 0
+
+    def columns(self, csv_path, airports):
+        from .tracks_cli import decode
+        st = os.stat(csv_path)
+        key = ("columns", os.path.abspath(csv_path), st.st_size, st.st_mtime_ns, tuple(airports))
+        cols = self.cache.get(key)
+        if cols is None:
+            cols = decode(csv_path, list(airports))
+            self.cache.put(key, cols)
+        return key, cols
+
+    def tracks(self, req):
+        from .airports import metro_airports
+        from .tracks_cli import tracks_from_columns, write_tracks
+        t0 = time.perf_counter()
+        airports = metro_airports(req["metro"])
+        airport = req.get("airport") or airports[0]
+        col_key, cols = self.columns(req["csv"], airports)
+        decoded = time.perf_counter()
+        params = (req.get("max_km"), req.get("max_alt_100ft"), req.get("phase"), req.get("clean", True))
+        key = ("tracks", col_key, airport) + params
+        tracks = self.cache.get(key)
+        hit = tracks is not None
+        if tracks is None:
+            tracks = tracks_from_columns(cols, airport, *params)
+            self.cache.put(key, tracks)
+        built = time.perf_counter()
+        path = write_tracks(tracks, airport, req["out"], req.get("backend", "shapefile"), req.get("phase"))
+        done = time.perf_counter()
+        return {"paths": [path],
+                "stats": {"flights": len(tracks), "points": tracks.n_points, "tracks_cached": hit,
+                          "decode_s": round(decoded - t0, 3), "build_s": round(built - decoded, 3),
+                          "write_s": round(done - built, 3), "total_s": round(done - t0, 3)}}
+
+    def handle(self, req):
+        self.requests += 1
+        cmd = req.get("cmd")
+        if cmd == "tracks":
+            return self.tracks(req)
+        if cmd == "stats":
+            return {"stats": dict(self.cache.stats(), requests=self.requests, pid=os.getpid())}
+        if cmd == "ping":
+            return {}
+        raise ValueError(f"Unknown command {cmd!r}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            req = json.loads(line)
+            if req.get("cmd") == "stop":
+                self.server.stopping = True
+                reply = {"ok": True}
+            else:
+                reply = dict(self.server.worker.handle(req), ok=True)
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+def serve(socket_path=DEFAULT_SOCKET, max_mb=2048):
+    """Run the worker on socket_path until a stop request arrives."""
+    if os.path.exists(socket_path):
+        try:
+            request({"cmd": "ping"}, socket_path)
+            raise RuntimeError(f"A worker is already listening on {socket_path}")
+        except OSError:
+            os.unlink(socket_path)              # stale socket from a killed worker
+    server = socketserver.UnixStreamServer(socket_path, _Handler)
+    server.worker = TrackWorker(max_mb * 1e6)
+    server.stopping = False
+    print(f"Track worker {os.getpid()} listening on {socket_path} (cache {max_mb} MB)")
+    try:
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+    print("Track worker stopped.")
+
+
+def request(req, socket_path=DEFAULT_SOCKET):
+    """Send one request to the worker and return its JSON reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socket_path)
+        s.sendall(json.dumps(req).encode() + b"\n")
+        with s.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Warm track worker and its client.")
+    ap.add_argument("--socket", default=DEFAULT_SOCKET)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sv = sub.add_parser("serve", help="run the worker")
+    sv.add_argument("--max-mb", type=float, default=2048, help="cache cap in MB of arrays")
+    tr = sub.add_parser("tracks", help="build and write tracks through the worker")
+    tr.add_argument("csv")
+    tr.add_argument("--metro", required=True)
+    tr.add_argument("--airport")
+    tr.add_argument("--out", required=True, help="output folder (shapefile) or .gdb path (arcpy)")
+    tr.add_argument("--backend", choices=("shapefile", "arcpy", "geoparquet", "flatgeobuf"), default="shapefile")
+    tr.add_argument("--max-km", type=float)
+    tr.add_argument("--max-alt-100ft", type=float)
+    tr.add_argument("--phase")
+    tr.add_argument("--no-clean", action="store_true")
+    sub.add_parser("stats", help="cache statistics")
+    sub.add_parser("stop", help="stop the worker")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        serve(args.socket, args.max_mb)
+        return
+    req = {"cmd": args.cmd}
+    if args.cmd == "tracks":
+        req.update(csv=os.path.abspath(args.csv), metro=args.metro, airport=args.airport,
+                   out=os.path.abspath(args.out), backend=args.backend, max_km=args.max_km,
+                   max_alt_100ft=args.max_alt_100ft, phase=args.phase, clean=not args.no_clean)
+    reply = request(req, args.socket)
+    if not reply.pop("ok"):
+        sys.exit(reply["error"])
+    for path in reply.get("paths", []):
+        print(path)
+    if "stats" in reply:
+        print(", ".join(f"{k}={v}" for k, v in reply["stats"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# Decode a raw metro CSV into typed NumPy columns (no ArcGIS needed).
+#
+# Columns produced:
+#   flight     str     flight_index / flight_id
+#   ts         datetime64[ns]
+#   lat, lon   float64
+#   alt_100ft  float32 (NaN when blank)
+#   dist_<CODE> float32 km to each airport (NaN when blank)
+#   dep_aprt / arr_aprt  str (only when present in the CSV)
+#
+# pandas is imported inside the functions that parse, so importing the
+# package (e.g. for a --dry-run header check) stays fast.
+
+import os
+
+import numpy as np
+
+from .airports import (ALT_CANDIDATES, DATE_CANDIDATES, FLIGHT_CANDIDATES, LAT_CANDIDATES,
+                       LON_CANDIDATES, dist_candidates, resolve_column)
+
+OPTIONAL_TEXT_COLUMNS = ("dep_aprt", "arr_aprt")
+
+# Validation reasons, one bit each in a uint8 per row
+REJECT_REASONS = ("blank_flight", "bad_date", "blank_latlon", "bad_latlon",
+                  "blank_dist", "bad_dist", "blank_alt", "bad_alt")
+REASON_BITS = {name: np.uint8(1 << i) for i, name in enumerate(REJECT_REASONS)}
+
+
+def parse_dates(values):
+    """
+    Parse the date column like the first/last-28-days scripts do (trim, collapse
+    spaces, split on AM/PM, explicit '%m/%d/%Y' formats) but keep seconds when
+    present, since tracks need them. Year-first leftovers ('2013-06-01 13:05',
+    '2013/06/01 ...') go through the ISO parser; everything stays vectorized,
+    so dirty files cost no more than clean ones.
+    Returns datetime64[ns] with NaT for unparseable values.
+    """
+    import pandas as pd
+    s = (pd.Series(values, dtype=str)
+           .str.strip()
+           .str.replace(r'\s+', ' ', regex=True))
+    has_ampm = s.str.contains(r'\b(?:AM|PM)\b', case=False, regex=True)
+    has_sec = s.str.contains(r'\d:\d{2}:\d{2}(?:\s|$)', regex=True)
+
+    parsed = pd.Series(pd.NaT, index=s.index, dtype='datetime64[ns]')
+    for mask, fmt in [(has_ampm & has_sec, '%m/%d/%Y %I:%M:%S %p'),
+                      (has_ampm & ~has_sec, '%m/%d/%Y %I:%M %p'),
+                      (~has_ampm & has_sec, '%m/%d/%Y %H:%M:%S'),
+                      (~has_ampm & ~has_sec, '%m/%d/%Y %H:%M')]:
+        if mask.any():
+            parsed.loc[mask] = pd.to_datetime(s[mask], format=fmt, errors='coerce')
+
+    mask_left = parsed.isna() & s.str.match(r'\d{4}[-/]\d')
+    if mask_left.any():
+        iso = s[mask_left].str.replace('/', '-', regex=False).str.replace('Z', '', case=False, regex=False)
+        parsed.loc[mask_left] = pd.to_datetime(iso, format='ISO8601', errors='coerce')
+    return parsed.to_numpy(dtype='datetime64[ns]')
+
+
+def resolve_columns(fieldnames, airports):
+    """Map logical column names (flight, ts, lat, ...) to the CSV's actual headers."""
+    cols_map = {h.strip().lower(): h for h in fieldnames}
+    resolved = {
+        "flight": resolve_column(cols_map, *FLIGHT_CANDIDATES),
+        "ts": resolve_column(cols_map, *DATE_CANDIDATES),
+        "lat": resolve_column(cols_map, *LAT_CANDIDATES),
+        "lon": resolve_column(cols_map, *LON_CANDIDATES),
+    }
+    try:
+        resolved["alt_100ft"] = resolve_column(cols_map, *ALT_CANDIDATES)
+    except KeyError:
+        print("Warning: no altitude column found; alt_100ft will be blank.")
+    for code in airports:
+        try:
+            resolved[f"dist_{code}"] = resolve_column(
+                cols_map, *dist_candidates(code, single_airport=len(airports) == 1))
+        except KeyError:
+            print(f"Warning: No distance column found for {code}. Checked: {dist_candidates(code)}")
+    for name in OPTIONAL_TEXT_COLUMNS:
+        if name in cols_map:
+            resolved[name] = cols_map[name]
+    return resolved
+
+
+class RejectReport:
+    """
+    Per-row validation outcome of one decode: how many rows carry each reason
+    (a row can carry several), and the line number + reason bits of every
+    rejected row for the sidecar file.
+    """
+
+    def __init__(self, counts, line, reasons, required_bits, source=""):
+        self.counts = counts
+        self.line = line
+        self.reasons = reasons
+        self.required_bits = required_bits
+        self.source = source
+
+    @property
+    def rejected(self):
+        return len(self.line)
+
+    @classmethod
+    def concat(cls, reports):
+        reports = list(reports)
+        counts = {r: sum(rep.counts[r] for rep in reports) for r in REJECT_REASONS}
+        return cls(counts, np.concatenate([rep.line for rep in reports]),
+                   np.concatenate([rep.reasons for rep in reports]),
+                   reports[0].required_bits, reports[0].source)
+
+    def table(self):
+        lines = [f"{'reason':<14}{'rows':>10}  action"]
+        for i, name in enumerate(REJECT_REASONS):
+            if self.counts[name]:
+                action = "rejected" if self.required_bits & (1 << i) else "kept (NaN)"
+                lines.append(f"{name:<14}{self.counts[name]:>10}  {action}")
+        lines.append(f"{'total rejected':<14}{self.rejected:>10}")
+        return "\n".join(lines)
+
+    def write(self, path):
+        """Compact sidecar: line numbers (header = line 1) and reason bitmasks of rejected rows."""
+        np.savez_compressed(path, line=self.line, reasons=self.reasons,
+                            reason_names=np.array(REJECT_REASONS), source=np.array(self.source))
+        return path
+
+
+def load_rejects(path):
+    """Read a sidecar written by RejectReport.write -> (line, list of reason-name tuples)."""
+    with np.load(path) as z:
+        names = [str(n) for n in z["reason_names"]]
+        line, bits = z["line"], z["reasons"]
+    return line, [tuple(n for i, n in enumerate(names) if b & (1 << i)) for b in bits]
+
+
+def required_bits(require=()):
+    """Reason bits that reject a row: flight/date/lat/lon always, plus "dist" and/or "alt"."""
+    bits = REASON_BITS["blank_flight"] | REASON_BITS["bad_date"] | REASON_BITS["blank_latlon"] | REASON_BITS["bad_latlon"]
+    if "dist" in require:
+        bits |= REASON_BITS["blank_dist"] | REASON_BITS["bad_dist"]
+    if "alt" in require:
+        bits |= REASON_BITS["blank_alt"] | REASON_BITS["bad_alt"]
+    return bits
+
+
+def _numeric(values, blank_bit, bad_bit, reasons, dtype):
+    """Vectorized float conversion: blank -> blank_bit, non-numeric -> bad_bit, both NaN."""
+    import pandas as pd
+    text = values.str.strip()
+    blank = (text == "").to_numpy()
+    out = pd.to_numeric(text, errors='coerce').to_numpy(dtype)
+    reasons[blank] |= blank_bit
+    reasons[np.isnan(out) & ~blank] |= bad_bit
+    return out
+
+
+def decode_frame(df, resolved, require=(), first_line=2, source=""):
+    """
+    Turn a str-typed DataFrame into typed columns. Validation runs as column
+    masks, one reason bit per problem; rows whose bits intersect
+    required_bits(require) are dropped and reported, the others keep NaN in
+    the offending optional column. Returns (columns, RejectReport).
+    """
+    n = len(df)
+    reasons = np.zeros(n, dtype=np.uint8)
+    cols = {"flight": df[resolved["flight"]].str.strip().to_numpy(dtype=str)}
+    reasons[cols["flight"] == ""] |= REASON_BITS["blank_flight"]
+    cols["ts"] = parse_dates(df[resolved["ts"]].to_numpy())
+    reasons[np.isnat(cols["ts"])] |= REASON_BITS["bad_date"]
+    for name in ("lat", "lon"):
+        cols[name] = _numeric(df[resolved[name]], REASON_BITS["blank_latlon"], REASON_BITS["bad_latlon"],
+                              reasons, np.float64)
+    for name, src in resolved.items():
+        if name.startswith("dist_"):
+            cols[name] = _numeric(df[src], REASON_BITS["blank_dist"], REASON_BITS["bad_dist"], reasons, np.float32)
+        elif name == "alt_100ft":
+            cols[name] = _numeric(df[src], REASON_BITS["blank_alt"], REASON_BITS["bad_alt"], reasons, np.float32)
+        elif name in OPTIONAL_TEXT_COLUMNS:
+            cols[name] = df[src].str.strip().str.upper().to_numpy(dtype=str)
+    if "alt_100ft" not in cols:
+        cols["alt_100ft"] = np.full(n, np.nan, dtype=np.float32)
+
+    bits = required_bits(require)
+    rejected = (reasons & bits) != 0
+    counts = {name: int(np.count_nonzero(reasons & REASON_BITS[name])) for name in REJECT_REASONS}
+    line = np.flatnonzero(rejected).astype(np.int64) + first_line
+    report = RejectReport(counts, line, reasons[rejected], bits, source)
+    if rejected.any():
+        cols = {k: v[~rejected] for k, v in cols.items()}
+    return cols, report
+
+
+def decode_csv(path, airports, require=(), reject_path=None):
+    """
+    Read a raw CSV (all columns as text, like the split scripts) and decode it.
+    Blank lines are kept as rows so reported line numbers match the file.
+    Returns (columns, RejectReport); the sidecar is written when reject_path is given.
+    """
+    import pandas as pd
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig", skip_blank_lines=False)
+    resolved = resolve_columns(df.columns, airports)
+    print("Resolved columns:", ", ".join(f"{k}={v}" for k, v in resolved.items()))
+    cols, report = decode_frame(df, resolved, require, source=os.path.abspath(path))
+    if report.rejected:
+        print(f"Rejected {report.rejected} of {len(df)} rows:")
+        print(report.table())
+        if reject_path:
+            report.write(reject_path)
+            print(f"Rejected rows written to: {reject_path}")
+    return cols, report
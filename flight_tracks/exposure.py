@@ -0,0 +1,119 @@
+# Receptor exposure: flights passing within a radius of many points (homes,
+# schools, monitors) below an altitude cap.
+#
+# All receptors go through one SegmentIndex.query_many call, which returns
+# each (receptor, flight) pair once with the flight's closest approach. The
+# pairs are then counted with np.bincount on a composite key
+# (receptor, period, phase, hour of day), so thousands of receptors over a
+# 28-day window cost one index build plus one batched query.
+
+import csv
+
+import numpy as np
+
+from .compare import DAY, split_periods
+from .segment_index import SegmentIndex
+from .tracks import PHASES
+
+HOURS = 24
+
+
+class ReceptorExposure:
+    """
+    counts[receptor, period, phase, hour] = distinct flights; flights[receptor]
+    = distinct flights in all periods; closest_m[receptor] = nearest approach
+    (NaN when none); days[period] = calendar days in each period.
+    """
+
+    def __init__(self, labels, lon, lat, periods, days, phases, counts, flights, closest_m):
+        self.labels = labels
+        self.lon, self.lat = lon, lat
+        self.periods = periods
+        self.days = days
+        self.phases = phases
+        self.counts = counts
+        self.flights = flights
+        self.closest_m = closest_m
+
+    def write_csv(self, path, label_field="receptor"):
+        """One row per receptor: totals, flights/day per period and per phase, closest approach."""
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow([label_field, "lon", "lat", "flights", "closest_m"]
+                       + [f"{p}_flights" for p in self.periods] + [f"{p}_per_day" for p in self.periods]
+                       + [f"{p}_{ph}" for p in self.periods for ph in self.phases])
+            by_period = self.counts.sum(axis=(2, 3))
+            by_phase = self.counts.sum(axis=3)
+            for i, lab in enumerate(self.labels):
+                d = self.closest_m[i]
+                w.writerow([lab, round(float(self.lon[i]), 6), round(float(self.lat[i]), 6), int(self.flights[i]),
+                            "" if np.isnan(d) else round(float(d))]
+                           + by_period[i].astype(int).tolist()
+                           + [round(by_period[i, p] / max(self.days[p], 1), 2) for p in range(len(self.periods))]
+                           + by_phase[i].ravel().astype(int).tolist())
+        return path
+
+    def write_hourly_csv(self, path, label_field="receptor"):
+        """Long table of the non-zero (receptor, period, phase, hour) counts."""
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow([label_field, "period", "phase", "hour", "flights", "per_day"])
+            for i, p, ph, h in zip(*np.nonzero(self.counts)):
+                n = int(self.counts[i, p, ph, h])
+                w.writerow([self.labels[i], self.periods[p], self.phases[ph], int(h), n,
+                            round(n / max(self.days[p], 1), 3)])
+        return path
+
+
+def receptor_exposure(tracks, lon, lat, radius_m, max_alt_100ft=None, center=None, split=None, days=28,
+                      labels=None, index=None, utc_offset_h=0):
+    """
+    Distinct flights within radius_m (scalar or one per receptor) of each
+    receptor at or below max_alt_100ft, by period, phase (tracks.attrs
+    ["phase"], or "All") and hour of day of the closest approach (shifted by
+    utc_offset_h). Without split there is one period, "all"; with split the
+    flights are divided into "before"/"after" by start time as in
+    compare.split_periods. Pass index to reuse a built/loaded SegmentIndex
+    (it must have been built from these tracks). Returns ReceptorExposure.
+    """
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    if index is None:
+        if center is None:
+            center = (float(np.mean(tracks["lon"])), float(np.mean(tracks["lat"])))
+        index = SegmentIndex.build(tracks, center)
+    hits = index.query_many(lon, lat, radius_m, max_alt_100ft=max_alt_100ft)
+
+    starts = tracks["ts"][tracks.offsets[:-1]].astype("datetime64[s]")
+    if split is None:
+        periods = ["all"]
+        period_idx = np.zeros(len(tracks), dtype=np.int64)
+        span = (starts.max().astype("datetime64[D]") - starts.min().astype("datetime64[D]")) if len(tracks) else 0
+        n_days = [int(span / DAY) + 1 if len(tracks) else 0]
+    else:
+        before, after, n_before, n_after = split_periods(starts, split, days)
+        periods = ["before", "after"]
+        period_idx = np.where(before, 0, np.where(after, 1, -1))
+        n_days = [n_before, n_after]
+    if "phase" in tracks.attrs:
+        phases = list(PHASES)
+        phase_idx = np.array([PHASES.index(p) for p in tracks.attrs["phase"]], dtype=np.int64)
+    else:
+        phases = ["All"]
+        phase_idx = np.zeros(len(tracks), dtype=np.int64)
+
+    r, fl = hits["query"], hits["flight"]
+    local = hits["ts"] + np.timedelta64(int(round(utc_offset_h * 3600)), "s")
+    hour = ((local - local.astype("datetime64[D]")) // np.timedelta64(1, "h")).astype(np.int64)
+    per = period_idx[fl]
+    ok = per >= 0
+    shape = (len(lon), len(periods), len(phases), HOURS)
+    key = ((r[ok] * len(periods) + per[ok]) * len(phases) + phase_idx[fl[ok]]) * HOURS + hour[ok]
+    counts = np.bincount(key, minlength=int(np.prod(shape))).reshape(shape)
+    flights = np.bincount(r[ok], minlength=len(lon))
+    closest = np.full(len(lon), np.inf)
+    np.minimum.at(closest, r[ok], hits["dist_m"][ok])
+    closest[np.isinf(closest)] = np.nan
+    if labels is None:
+        labels = list(range(1, len(lon) + 1))
+    return ReceptorExposure(labels, lon, lat, periods, n_days, phases, counts, flights, closest)
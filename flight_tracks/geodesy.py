@@ -0,0 +1,106 @@
+# Vectorized geodesics on the WGS84 ellipsoid (Vincenty's direct and inverse
+# formulas). All functions take and return NumPy arrays (degrees, meters) and
+# broadcast.
+
+import numpy as np
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+METERS_PER_UNIT = {"m": 1.0, "meters": 1.0, "ft": 0.3048, "feet": 0.3048,
+                   "nmi": 1852.0, "nm": 1852.0, "km": 1000.0}
+
+
+def to_meters(dist, units):
+    try:
+        return np.asarray(dist, dtype=np.float64) * METERS_PER_UNIT[units.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown distance units {units!r}; use one of {sorted(METERS_PER_UNIT)}") from None
+
+
+def direct(lon, lat, azimuth, dist_m, max_iter=20):
+    """
+    Destination (lon, lat) after travelling dist_m meters from (lon, lat) on the
+    initial azimuth (degrees clockwise from north). Sub-millimeter accuracy for
+    the distances used here; iterations stop once every element has converged.
+    """
+    lon, lat, azimuth, dist_m = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                                      for v in (lon, lat, azimuth, dist_m)))
+    a, b, f = WGS84_A, WGS84_B, WGS84_F
+    alpha1 = np.radians(azimuth)
+    sin_a1, cos_a1 = np.sin(alpha1), np.cos(alpha1)
+    tan_u1 = (1 - f) * np.tan(np.radians(lat))
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 ** 2)
+    sin_u1 = tan_u1 * cos_u1
+    sigma1 = np.arctan2(tan_u1, cos_a1)
+    sin_alpha = cos_u1 * sin_a1
+    cos2_alpha = 1 - sin_alpha ** 2
+    u2 = cos2_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+    sigma = dist_m / (b * big_a)
+    for _ in range(max_iter):
+        cos_2sm = np.cos(2 * sigma1 + sigma)
+        sin_s, cos_s = np.sin(sigma), np.cos(sigma)
+        d_sigma = big_b * sin_s * (cos_2sm + big_b / 4 * (
+            cos_s * (-1 + 2 * cos_2sm ** 2) - big_b / 6 * cos_2sm * (-3 + 4 * sin_s ** 2) * (-3 + 4 * cos_2sm ** 2)))
+        new = dist_m / (b * big_a) + d_sigma
+        done = np.all(np.abs(new - sigma) < 1e-12)
+        sigma = new
+        if done:
+            break
+    cos_2sm = np.cos(2 * sigma1 + sigma)
+    sin_s, cos_s = np.sin(sigma), np.cos(sigma)
+
+    tmp = sin_u1 * sin_s - cos_u1 * cos_s * cos_a1
+    lat2 = np.arctan2(sin_u1 * cos_s + cos_u1 * sin_s * cos_a1, (1 - f) * np.sqrt(sin_alpha ** 2 + tmp ** 2))
+    lam = np.arctan2(sin_s * sin_a1, cos_u1 * cos_s - sin_u1 * sin_s * cos_a1)
+    c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+    big_l = lam - (1 - c) * f * sin_alpha * (sigma + c * sin_s * (cos_2sm + c * cos_s * (-1 + 2 * cos_2sm ** 2)))
+    lon2 = (lon + np.degrees(big_l) + 540) % 360 - 180
+    return lon2, np.degrees(lat2)
+
+
+def inverse(lon1, lat1, lon2, lat2, max_iter=50):
+    """
+    Geodesic distance (m) and initial azimuth (degrees clockwise from north)
+    from (lon1, lat1) to (lon2, lat2). Coincident points give distance 0,
+    azimuth 0. Not meant for nearly antipodal pairs.
+    """
+    lon1, lat1, lon2, lat2 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                                   for v in (lon1, lat1, lon2, lat2)))
+    a, b, f = WGS84_A, WGS84_B, WGS84_F
+    big_l = np.radians((lon2 - lon1 + 540) % 360 - 180)
+    u1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1, sin_u2, cos_u2 = np.sin(u1), np.cos(u1), np.sin(u2), np.cos(u2)
+
+    lam = big_l
+    for _ in range(max_iter):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_s = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_s = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_s, cos_s)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sin_alpha = np.where(sin_s > 0, cos_u1 * cos_u2 * sin_lam / sin_s, 0.0)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sm = np.where(cos2_alpha > 0, cos_s - 2 * sin_u1 * sin_u2 / cos2_alpha, 0.0)
+        c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        new = big_l + (1 - c) * f * sin_alpha * (
+            sigma + c * sin_s * (cos_2sm + c * cos_s * (-1 + 2 * cos_2sm ** 2)))
+        done = np.all(np.abs(new - lam) < 1e-12)
+        lam = new
+        if done:
+            break
+
+    u_sq = cos2_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    d_sigma = big_b * sin_s * (cos_2sm + big_b / 4 * (
+        cos_s * (-1 + 2 * cos_2sm ** 2) - big_b / 6 * cos_2sm * (-3 + 4 * sin_s ** 2) * (-3 + 4 * cos_2sm ** 2)))
+    dist = b * big_a * (sigma - d_sigma)
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    azi = np.degrees(np.arctan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam))
+    return dist, np.where(dist > 0, azi, 0.0)
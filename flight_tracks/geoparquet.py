@@ -0,0 +1,244 @@
+# GeoParquet export of tracks: one LineString row per flight
+# (write_geoparquet) or one Point row per vertex (write_geoparquet_points).
+#
+# Rows are ordered by flight id and written in row groups of row_group_flights
+# whole flights, so the flight_id min/max statistics of each row group let
+# readers skip groups; a bbox struct column (GeoParquet 1.1 "covering") does
+# the same for spatial filters. Geometry is WKB (default, what GeoPandas/GDAL/
+# ArcGIS Pro read) or native coordinates (list<struct<x, y>> for lines,
+# struct<x, y> for points). Per-vertex altitude and time ride along as list
+# columns on the lines and as plain columns on the points.
+#
+# Each row group is built directly from the flat Tracks arrays (WKB bytes are
+# assembled with NumPy, list columns reuse the offsets) and streamed to disk.
+# Needs pyarrow, which is imported only when writing.
+#
+#   python -m flight_tracks.geoparquet      # write/read-back round trip check
+
+import json
+
+import numpy as np
+
+WKB_POINT = 1
+WKB_LINESTRING = 2
+BBOX_FIELDS = ("xmin", "ymin", "xmax", "ymax")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("GeoParquet export needs pyarrow (pip install pyarrow)") from None
+    return pa, pq
+
+
+def point_wkb(x, y):
+    """(data bytes, byte offsets) of little-endian WKB Points, one per x/y."""
+    rec = np.zeros(len(x), dtype=[("order", "u1"), ("type", "<u4"), ("x", "<f8"), ("y", "<f8")])
+    rec["order"], rec["type"], rec["x"], rec["y"] = 1, WKB_POINT, x, y
+    return rec.view(np.uint8), np.arange(len(x) + 1, dtype=np.int64) * rec.itemsize
+
+
+def linestring_wkb(x, y, offsets):
+    """(data bytes, byte offsets) of little-endian WKB LineStrings, one per offsets span."""
+    counts = np.diff(offsets)
+    n_lines = len(counts)
+    sizes = 9 + 16 * counts
+    byte_off = np.zeros(n_lines + 1, dtype=np.int64)
+    np.cumsum(sizes, out=byte_off[1:])
+    data = np.zeros(int(byte_off[-1]), dtype=np.uint8)
+
+    head = np.zeros(n_lines, dtype=[("order", "u1"), ("type", "<u4"), ("n", "<u4")])
+    head["order"], head["type"], head["n"] = 1, WKB_LINESTRING, counts
+    data[(byte_off[:-1, None] + np.arange(9)).ravel()] = head.view(np.uint8)
+
+    xy = np.empty((len(x), 2), dtype="<f8")
+    xy[:, 0], xy[:, 1] = x, y
+    line = np.repeat(np.arange(n_lines), counts)
+    k = np.arange(len(x)) - (offsets[:-1] - offsets[0])[line]
+    start = byte_off[:-1][line] + 9 + 16 * k
+    data[(start[:, None] + np.arange(16)).ravel()] = xy.view(np.uint8).ravel()
+    return data, byte_off
+
+
+def _geo_metadata(encoding, geometry_type, bbox):
+    return {"version": "1.1.0", "primary_column": "geometry",
+            "columns": {"geometry": {
+                "encoding": encoding, "geometry_types": [geometry_type], "bbox": bbox,
+                "covering": {"bbox": {k: ["bbox", k] for k in BBOX_FIELDS}}}}}
+
+
+def _attr_type(pa, v):
+    v = np.asarray(v)
+    return pa.string() if v.dtype.kind == "U" else pa.from_numpy_dtype(v.dtype)
+
+
+def _attr_array(pa, v):
+    v = np.asarray(v)
+    return pa.array(v.astype(str) if v.dtype.kind == "U" else v)
+
+
+def write_geoparquet(path, tracks, geometry="wkb", row_group_flights=5000, vertex_columns=("alt_100ft", "ts"),
+                     compression="zstd"):
+    """
+    Write tracks to path as GeoParquet, one row per flight. geometry is "wkb"
+    or "coords"; attrs (e.g. phase) become columns. Returns the row count.
+    """
+    pa, pq = _pyarrow()
+    if geometry not in ("wkb", "coords"):
+        raise ValueError('geometry must be "wkb" or "coords"')
+
+    tracks = tracks.take(np.argsort(tracks.flight_ids, kind="stable"))
+    lon, lat = tracks["lon"], tracks["lat"]
+    first = tracks.offsets[:-1]
+    has = tracks.counts > 0
+    bbox = {}
+    for name, ufunc, v in (("xmin", np.minimum, lon), ("ymin", np.minimum, lat),
+                           ("xmax", np.maximum, lon), ("ymax", np.maximum, lat)):
+        b = np.full(len(tracks), np.nan)
+        if has.any():
+            b[has] = ufunc.reduceat(v, first[has])
+        bbox[name] = b
+    total = [float(np.nanmin(bbox["xmin"])), float(np.nanmin(bbox["ymin"])),
+             float(np.nanmax(bbox["xmax"])), float(np.nanmax(bbox["ymax"]))] if has.any() else []
+
+    point_type = pa.struct([("x", pa.float64()), ("y", pa.float64())])
+    geom_type = pa.binary() if geometry == "wkb" else pa.list_(point_type)
+    vcols = [c for c in vertex_columns if c in tracks.columns]
+    fields = [("flight_id", pa.string())]
+    fields += [(k, _attr_type(pa, v)) for k, v in tracks.attrs.items()]
+    fields += [(c, pa.list_(pa.from_numpy_dtype(tracks[c].dtype))) for c in vcols]
+    fields += [("bbox", pa.struct([(k, pa.float64()) for k in bbox])), ("geometry", geom_type)]
+    schema = pa.schema(fields, metadata={"geo": json.dumps(_geo_metadata(
+        "WKB" if geometry == "wkb" else "linestring", "LineString", total))})
+
+    with pq.ParquetWriter(path, schema, compression=compression, write_statistics=True) as writer:
+        for a in range(0, len(tracks), row_group_flights):
+            b = min(a + row_group_flights, len(tracks))
+            r0, r1 = tracks.offsets[a], tracks.offsets[b]
+            offs = (tracks.offsets[a:b + 1] - r0).astype(np.int32)
+            arrays = [pa.array(tracks.flight_ids[a:b].astype(str))]
+            arrays += [_attr_array(pa, np.asarray(v)[a:b]) for v in tracks.attrs.values()]
+            for c in vcols:
+                arrays.append(pa.ListArray.from_arrays(pa.array(offs), pa.array(tracks[c][r0:r1])))
+            arrays.append(pa.StructArray.from_arrays([pa.array(bbox[k][a:b]) for k in bbox], list(bbox)))
+            if geometry == "wkb":
+                data, byte_off = linestring_wkb(lon[r0:r1], lat[r0:r1], tracks.offsets[a:b + 1])
+                arrays.append(pa.Array.from_buffers(pa.binary(), b - a,
+                                                    [None, pa.py_buffer(byte_off.astype(np.int32)),
+                                                     pa.py_buffer(data)]))
+            else:
+                pts = pa.StructArray.from_arrays([pa.array(lon[r0:r1]), pa.array(lat[r0:r1])], ["x", "y"])
+                arrays.append(pa.ListArray.from_arrays(pa.array(offs), pts))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return len(tracks)
+
+
+def write_geoparquet_points(path, tracks, geometry="wkb", row_group_flights=2000, compression="zstd"):
+    """
+    Write tracks to path as GeoParquet, one Point row per vertex, sorted by
+    flight id and then time. geometry is "wkb" or "coords"; every non-lon/lat
+    column and the attrs (repeated per vertex) become columns. Returns the row
+    count.
+    """
+    pa, pq = _pyarrow()
+    if geometry not in ("wkb", "coords"):
+        raise ValueError('geometry must be "wkb" or "coords"')
+
+    tracks = tracks.take(np.argsort(tracks.flight_ids, kind="stable"))
+    lon, lat = tracks["lon"], tracks["lat"]
+    total = [float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())] if len(lon) else []
+    cols = [c for c in tracks.columns if c not in ("lon", "lat")]
+
+    point_type = pa.struct([("x", pa.float64()), ("y", pa.float64())])
+    fields = [("flight_id", pa.string())]
+    fields += [(k, _attr_type(pa, v)) for k, v in tracks.attrs.items()]
+    fields += [(c, pa.from_numpy_dtype(tracks[c].dtype)) for c in cols]
+    fields += [("bbox", pa.struct([(k, pa.float64()) for k in BBOX_FIELDS])),
+               ("geometry", pa.binary() if geometry == "wkb" else point_type)]
+    schema = pa.schema(fields, metadata={"geo": json.dumps(_geo_metadata(
+        "WKB" if geometry == "wkb" else "point", "Point", total))})
+
+    with pq.ParquetWriter(path, schema, compression=compression, write_statistics=True) as writer:
+        for a in range(0, len(tracks), row_group_flights):
+            b = min(a + row_group_flights, len(tracks))
+            r0, r1 = tracks.offsets[a], tracks.offsets[b]
+            counts = np.diff(tracks.offsets[a:b + 1])
+            x, y = lon[r0:r1], lat[r0:r1]
+            arrays = [_attr_array(pa, np.repeat(tracks.flight_ids[a:b].astype(str), counts))]
+            arrays += [_attr_array(pa, np.repeat(np.asarray(v)[a:b], counts)) for v in tracks.attrs.values()]
+            arrays += [pa.array(tracks[c][r0:r1]) for c in cols]
+            arrays.append(pa.StructArray.from_arrays([pa.array(x), pa.array(y), pa.array(x), pa.array(y)],
+                                                     list(BBOX_FIELDS)))
+            if geometry == "wkb":
+                data, byte_off = point_wkb(x, y)
+                arrays.append(pa.Array.from_buffers(pa.binary(), r1 - r0,
+                                                    [None, pa.py_buffer(byte_off.astype(np.int32)),
+                                                     pa.py_buffer(data)]))
+            else:
+                arrays.append(pa.StructArray.from_arrays([pa.array(x), pa.array(y)], ["x", "y"]))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return int(tracks.n_points)
+
+
+def _self_check(n_flights=250, seed=0):
+    """Write random tracks both ways, read them back and compare; returns the files' row counts."""
+    import os
+    import tempfile
+
+    from .tracks import Tracks
+    _, pq = _pyarrow()
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 40, n_flights)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    n = int(offsets[-1])
+    ts = np.datetime64("2013-06-03T12:00:00", "s") + np.arange(n).astype("timedelta64[s]")
+    tracks = Tracks(rng.permutation(n_flights).astype(str).astype(object), offsets,
+                    {"lon": rng.uniform(-71.5, -70.5, n), "lat": rng.uniform(42.0, 42.7, n),
+                     "alt_100ft": rng.uniform(0, 100, n).astype(np.float32), "ts": ts},
+                    {"phase": rng.choice(["Arrival", "Departure"], n_flights)})
+    ref = tracks.take(np.argsort(tracks.flight_ids, kind="stable"))
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for geometry in ("wkb", "coords"):
+            lines = os.path.join(tmp, f"lines_{geometry}.parquet")
+            points = os.path.join(tmp, f"points_{geometry}.parquet")
+            write_geoparquet(lines, tracks, geometry, row_group_flights=60)
+            write_geoparquet_points(points, tracks, geometry, row_group_flights=60)
+
+            t = pq.read_table(lines)
+            assert t.column("flight_id").to_pylist() == ref.flight_ids.astype(str).tolist()
+            assert t.column("phase").to_pylist() == ref.attrs["phase"].tolist()
+            assert np.array_equal(np.concatenate(t.column("ts").to_pylist() or [[]]).astype("datetime64[s]"),
+                                  ref["ts"])
+
+            f = pq.ParquetFile(points)
+            assert f.metadata.num_row_groups == -(-n_flights // 60)
+            ends = [f.metadata.row_group(i).column(0).statistics for i in range(f.metadata.num_row_groups)]
+            assert all(a.max < b.min for a, b in zip(ends[:-1], ends[1:]))   # no flight spans row groups
+            p = f.read()
+            g = p.column("geometry")
+            if geometry == "wkb":
+                rec = np.frombuffer(b"".join(g.to_pylist()), dtype=[("order", "u1"), ("type", "<u4"),
+                                                                   ("x", "<f8"), ("y", "<f8")])
+                assert (rec["order"] == 1).all() and (rec["type"] == WKB_POINT).all()
+                x, y = rec["x"], rec["y"]
+            else:
+                x = g.combine_chunks().field("x").to_numpy()
+                y = g.combine_chunks().field("y").to_numpy()
+            assert np.array_equal(x, ref["lon"]) and np.array_equal(y, ref["lat"])
+            assert np.array_equal(p.column("bbox").combine_chunks().field("ymax").to_numpy(), ref["lat"])
+            assert p.column("flight_id").to_pylist() == np.repeat(ref.flight_ids.astype(str), ref.counts).tolist()
+            assert p.column("phase").to_pylist() == np.repeat(ref.attrs["phase"], ref.counts).tolist()
+            assert np.array_equal(p.column("alt_100ft").to_numpy(), ref["alt_100ft"])
+            assert np.array_equal(p.column("ts").to_numpy().astype("datetime64[s]"), ref["ts"])
+            assert json.loads(f.schema_arrow.metadata[b"geo"])["columns"]["geometry"]["geometry_types"] == ["Point"]
+            rows[geometry] = (t.num_rows, p.num_rows)
+    return rows
+
+
+if __name__ == "__main__":
+    for geometry, (n_lines, n_points) in _self_check().items():
+        print(f"{geometry:<7} {n_lines} flight rows, {n_points} point rows")
+    print("GeoParquet round trips OK.")
@@ -0,0 +1,98 @@
+# Multi-resolution (LOD) tracks.
+#
+# One Douglas-Peucker run (simplify_importance) gives every vertex the largest
+# tolerance at which it survives, so all levels of detail come out of a single
+# pass as vertex-index lists into the same full-resolution point columns: the
+# coordinates are stored once, each level only adds an int32 row list and its
+# per-flight offsets. for_scale picks the coarsest level whose tolerance is
+# still under about one screen pixel at the requested map scale, so a
+# metro overview reads roughly a tenth of the vertices of a runway close-up.
+#
+#   lods = TrackLODs.build(tracks, center=AIRPORTS["BOS"])
+#   lods.save(os.path.join(out_dir, "bos_tracks_lods.npz"))
+#   overview = TrackLODs.load(path).for_scale(500000)     # Tracks at 1:500,000
+
+import numpy as np
+
+from .projection import projection_for
+from .simplify import simplify_importance
+from .tracks import Tracks
+
+LOD_TOLERANCES_M = (10.0, 50.0, 250.0)
+METERS_PER_INCH = 0.0254
+
+
+class TrackLODs:
+    def __init__(self, tracks, tolerances, rows, offsets):
+        self.tracks = tracks                    # full resolution, shared by every level
+        self.tolerances = tuple(float(t) for t in tolerances)
+        self.rows = list(rows)                  # per level: int32 vertex rows into tracks
+        self.offsets = list(offsets)            # per level: per-flight offsets into rows
+
+    @classmethod
+    def build(cls, tracks, tolerances=LOD_TOLERANCES_M, center=None):
+        """LODs of tracks at the given tolerances (meters, in the AEQD plane around center)."""
+        tolerances = sorted(tolerances)
+        if center is None:
+            center = (float(np.mean(tracks["lon"])), float(np.mean(tracks["lat"])))
+        x, y = projection_for(*center).forward(tracks["lon"], tracks["lat"])
+        imp = simplify_importance(x, y, tracks.offsets, tolerances[0])
+        rows, offsets = [], []
+        for tol in tolerances:
+            keep = np.flatnonzero(imp > tol).astype(np.int32)
+            rows.append(keep)
+            offsets.append(np.searchsorted(keep, tracks.offsets).astype(np.int64))
+        return cls(tracks, tolerances, rows, offsets)
+
+    def __len__(self):
+        return len(self.tolerances)
+
+    def vertex_counts(self):
+        """Vertices per level, full resolution first."""
+        return [self.tracks.n_points] + [len(r) for r in self.rows]
+
+    def level(self, i, columns=None):
+        """Tracks of level i (-1 = full resolution), with the selected columns gathered."""
+        if i < 0:
+            return self.tracks
+        names = list(self.tracks.columns) if columns is None else list(columns)
+        rows = self.rows[i]
+        t = Tracks(self.tracks.flight_ids, self.offsets[i], {k: self.tracks[k][rows] for k in names},
+                   self.tracks.attrs)
+        t.removed = dict(self.tracks.removed)
+        return t
+
+    def level_for_scale(self, scale, dpi=96, pixels=1.0):
+        """Coarsest level whose tolerance is at most `pixels` screen pixels at 1:scale (-1 = full)."""
+        pixel_m = scale * METERS_PER_INCH / dpi * pixels
+        ok = [i for i, t in enumerate(self.tolerances) if t <= pixel_m]
+        return ok[-1] if ok else -1
+
+    def for_scale(self, scale, dpi=96, pixels=1.0, columns=None):
+        """Tracks at the right level of detail for a map drawn at 1:scale."""
+        return self.level(self.level_for_scale(scale, dpi, pixels), columns)
+
+    def save(self, path):
+        """One .npz: the full-resolution columns once, then each level's rows and offsets."""
+        arrays = {"flight_ids": self.tracks.flight_ids, "offsets": self.tracks.offsets,
+                  "tolerances": np.array(self.tolerances)}
+        for k, v in self.tracks.columns.items():
+            arrays[f"col_{k}"] = v
+        for k, v in self.tracks.attrs.items():
+            arrays[f"attr_{k}"] = np.asarray(v)
+        for i in range(len(self)):
+            arrays[f"rows_{i}"] = self.rows[i]
+            arrays[f"offsets_{i}"] = self.offsets[i]
+        np.savez(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            cols = {k[4:]: z[k] for k in z.files if k.startswith("col_")}
+            attrs = {k[5:]: z[k] for k in z.files if k.startswith("attr_")}
+            tracks = Tracks(z["flight_ids"], z["offsets"], cols, attrs)
+            tol = z["tolerances"]
+            rows = [z[f"rows_{i}"] for i in range(len(tol))]
+            offsets = [z[f"offsets_{i}"] for i in range(len(tol))]
+        return cls(tracks, tol, rows, offsets)
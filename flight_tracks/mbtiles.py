@@ -0,0 +1,292 @@
+# Vector tiles (MBTiles of Mapbox Vector Tiles) of flight tracks.
+#
+# For every zoom level the tracks are projected to Web Mercator pixel space,
+# simplified with Douglas-Peucker at about one tile pixel, and every segment
+# is clipped against each tile (plus a small buffer) it touches, all
+# vectorized over segments. Clipped pieces are regrouped per (tile, flight)
+# into one MultiLineString feature. Each zoom's tiles are then encoded in
+# parallel worker processes with the small protobuf encoder below (no
+# mapbox-vector-tile or protobuf dependency) and written gzip-compressed into
+# the MBTiles SQLite file (TMS row order, as the spec asks) before the next
+# zoom is clipped. A job ships only its own vertices and the properties of the
+# flights they belong to; gzip headers carry no timestamp, so the same tracks
+# give the same bytes.
+#
+#   write_mbtiles("tracks.mbtiles", tracks, min_zoom=6, max_zoom=14)
+
+import gzip
+import json
+import math
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .simplify import simplify_lines
+
+EXTENT = 4096
+EARTH_R = 6378137.0
+MAX_LAT = 85.0511287798
+
+
+# ---------- protobuf / MVT encoding ----------
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _key(field, wire):
+    return _varint((field << 3) | wire)
+
+
+def _bytes_field(field, data):
+    return _key(field, 2) + _varint(len(data)) + data
+
+
+def _packed(field, values):
+    return _bytes_field(field, b"".join(_varint(int(v)) for v in values))
+
+
+def _zigzag(v):
+    return (v << 1) ^ (v >> 63)
+
+
+def _value(v):
+    if isinstance(v, str):
+        return _bytes_field(1, v.encode("utf-8"))
+    if isinstance(v, (bool, np.bool_)):
+        return _key(7, 0) + _varint(int(v))
+    if isinstance(v, (int, np.integer)):
+        return _key(6, 0) + _varint(_zigzag(int(v)) & 0xFFFFFFFFFFFFFFFF)
+    return _key(3, 1) + np.float64(v).tobytes()
+
+
+def line_geometry(parts):
+    """MVT command stream for a (multi)linestring given as a list of (k, 2) int arrays."""
+    cmds = []
+    cx = cy = 0
+    for p in parts:
+        # drop repeated points after rounding; a part needs two distinct points
+        p = p[np.r_[True, np.any(p[1:] != p[:-1], axis=1)]]
+        if len(p) < 2:
+            continue
+        d = np.diff(np.vstack([[cx, cy], p]), axis=0).astype(np.int64)
+        z = (d << 1) ^ (d >> 63)
+        cmds.append((1 << 3) | 1)
+        cmds.extend(z[0].tolist())
+        cmds.append(((len(p) - 1) << 3) | 2)
+        cmds.extend(z[1:].ravel().tolist())
+        cx, cy = int(p[-1, 0]), int(p[-1, 1])
+    return cmds
+
+
+def encode_layer(name, features, extent=EXTENT):
+    """
+    One MVT layer; features = [(id, properties dict, list of (k, 2) int parts)].
+    Returns the encoded layer bytes (empty when no feature has geometry).
+    """
+    keys, values, key_idx, val_idx = [], [], {}, {}
+    body = bytearray()
+    for fid, props, parts in features:
+        geom = line_geometry(parts)
+        if not geom:
+            continue
+        tags = []
+        for k, v in props.items():
+            if k not in key_idx:
+                key_idx[k] = len(keys)
+                keys.append(k)
+            vk = (type(v).__name__, v)
+            if vk not in val_idx:
+                val_idx[vk] = len(values)
+                values.append(v)
+            tags += [key_idx[k], val_idx[vk]]
+        feat = _key(1, 0) + _varint(int(fid)) + _packed(2, tags) + _key(3, 0) + _varint(2) + _packed(4, geom)
+        body += _bytes_field(2, feat)
+    if not body:
+        return b""
+    layer = (_key(15, 0) + _varint(2) + _bytes_field(1, name.encode("utf-8")) + bytes(body)
+             + b"".join(_bytes_field(3, k.encode("utf-8")) for k in keys)
+             + b"".join(_bytes_field(4, _value(v)) for v in values)
+             + _key(5, 0) + _varint(extent))
+    return _bytes_field(3, layer)
+
+
+# ---------- projection and clipping ----------
+
+def mercator(lon, lat):
+    """Web Mercator meters (EPSG:3857)."""
+    lat = np.clip(lat, -MAX_LAT, MAX_LAT)
+    x = EARTH_R * np.radians(lon)
+    y = EARTH_R * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return x, y
+
+
+def _to_pixels(mx, my, zoom):
+    scale = (1 << zoom) * EXTENT / (2 * math.pi * EARTH_R)
+    return (mx + math.pi * EARTH_R) * scale, (math.pi * EARTH_R - my) * scale
+
+
+def clip_to_tiles(px, py, offsets, buffer_px=64):
+    """
+    Clip lines (global pixel coordinates at one zoom) to every tile they cross.
+    Returns (tile_x, tile_y, line, part_start, x, y) per output vertex, sorted
+    by tile then line; x/y are tile-local integer coordinates and part_start
+    marks the first vertex of each piece.
+    """
+    line_of = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    seg = np.flatnonzero(line_of[1:] == line_of[:-1]) if len(px) else np.zeros(0, dtype=np.int64)
+    x0, y0, x1, y1 = px[seg], py[seg], px[seg + 1], py[seg + 1]
+    tx0 = np.floor((np.minimum(x0, x1) - buffer_px) / EXTENT).astype(np.int64)
+    tx1 = np.floor((np.maximum(x0, x1) + buffer_px) / EXTENT).astype(np.int64)
+    ty0 = np.floor((np.minimum(y0, y1) - buffer_px) / EXTENT).astype(np.int64)
+    ty1 = np.floor((np.maximum(y0, y1) + buffer_px) / EXTENT).astype(np.int64)
+    nx, ny = tx1 - tx0 + 1, ty1 - ty0 + 1
+    k = np.repeat(np.arange(len(seg)), nx * ny)
+    j = np.arange(len(k)) - np.repeat(np.cumsum(nx * ny) - nx * ny, nx * ny)
+    tx = tx0[k] + j % nx[k]
+    ty = ty0[k] + j // nx[k]
+
+    # Liang-Barsky against the buffered tile box
+    bx0, by0 = tx * EXTENT - buffer_px, ty * EXTENT - buffer_px
+    bx1, by1 = (tx + 1) * EXTENT + buffer_px, (ty + 1) * EXTENT + buffer_px
+    sx, sy = x0[k], y0[k]
+    dx, dy = x1[k] - sx, y1[k] - sy
+    lo = np.zeros(len(k))
+    hi = np.ones(len(k))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, sx - bx0), (dx, bx1 - sx), (-dy, sy - by0), (dy, by1 - sy)):
+            r = q / p
+            lo = np.where(p < 0, np.maximum(lo, r), lo)
+            hi = np.where(p > 0, np.minimum(hi, r), hi)
+            outside = (p == 0) & (q < 0)
+            hi = np.where(outside, -1.0, hi)
+    ok = hi >= lo
+    k, tx, ty, lo, hi = k[ok], tx[ok], ty[ok], lo[ok], hi[ok]
+
+    order = np.lexsort((seg[k], ty, tx))
+    k, tx, ty, lo, hi = k[order], tx[order], ty[order], lo[order], hi[order]
+    s = seg[k]
+    same_tile = np.r_[False, (tx[1:] == tx[:-1]) & (ty[1:] == ty[:-1])]
+    continues = same_tile & np.r_[False, (s[1:] == s[:-1] + 1) & (hi[:-1] == 1.0)] & (lo == 0.0)
+    starts = ~continues
+
+    # vertices: piece start (segment at lo) then every segment end (at hi)
+    n_start = int(starts.sum())
+    src = np.r_[np.flatnonzero(starts), np.arange(len(k))]
+    t = np.r_[lo[starts], hi]
+    first = np.r_[np.ones(n_start, dtype=bool), np.zeros(len(k), dtype=bool)]
+    order = np.lexsort((~first, src))
+    src, t, first = src[order], t[order], first[order]
+    vx = x0[k][src] + t * (x1[k][src] - x0[k][src]) - tx[src] * EXTENT
+    vy = y0[k][src] + t * (y1[k][src] - y0[k][src]) - ty[src] * EXTENT
+    return (tx[src], ty[src], line_of[s[src]], first,
+            np.round(vx).astype(np.int64), np.round(vy).astype(np.int64))
+
+
+# ---------- tiling ----------
+
+def _encode_tiles(layer, zoom, tile_x, tile_y, line, part_start, x, y, ids, props):
+    """Encode the tiles of one chunk (whole tiles only); returns [(z, x, y, gzip bytes)]."""
+    out = []
+    tile_key = tile_x * (1 << zoom) + tile_y
+    bounds = np.flatnonzero(np.r_[True, tile_key[1:] != tile_key[:-1], True])
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        features = []
+        ln = line[a:b]
+        cut = np.flatnonzero(np.r_[True, ln[1:] != ln[:-1], True])
+        for fa, fb in zip(cut[:-1], cut[1:]):
+            fa, fb = a + fa, a + fb
+            starts = np.flatnonzero(part_start[fa:fb])
+            xy = np.column_stack([x[fa:fb], y[fa:fb]])
+            parts = np.split(xy, starts[1:])
+            i = int(line[fa])
+            features.append((int(ids[i]), {k: v[i].item() if hasattr(v[i], "item") else v[i]
+                                           for k, v in props.items()}, parts))
+        data = encode_layer(layer, features)
+        if data:
+            out.append((zoom, int(tile_x[a]), int(tile_y[a]), gzip.compress(data, mtime=0)))
+    return out
+
+
+def _job(layer, zoom, cols, a, b, ids, props):
+    """
+    Arguments of _encode_tiles for clipped vertices a:b, carrying only the
+    ids/props rows of the flights they reference (line renumbered to match).
+    """
+    tile_x, tile_y, line, part_start, x, y = (c[a:b] for c in cols)
+    used, line = np.unique(line, return_inverse=True)
+    return (layer, zoom, tile_x, tile_y, line, part_start, x, y, ids[used],
+            {k: v[used] for k, v in props.items()})
+
+
+def write_mbtiles(path, tracks, min_zoom=6, max_zoom=14, layer="tracks", tolerance_px=1.0,
+                  buffer_px=64, workers=None, tiles_per_job=256):
+    """
+    Write tracks as vector tiles to an MBTiles file (replaced if it exists).
+    Features carry flight_id and every entry of tracks.attrs. Returns the
+    number of tiles written.
+    """
+    mx, my = mercator(tracks["lon"], tracks["lat"])
+    props = {"flight_id": np.asarray(tracks.flight_ids).astype(str)}
+    for k, v in tracks.attrs.items():
+        v = np.asarray(v)
+        props[k] = v.astype(str) if v.dtype.kind in "UOM" else v
+    ids = np.arange(len(tracks)) + 1
+
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE metadata (name text, value text)")
+    db.execute("CREATE TABLE tiles (zoom_level integer, tile_column integer, tile_row integer, tile_data blob)")
+    n = 0
+    workers = workers or os.cpu_count() or 1
+    ex = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # one zoom at a time, so only that zoom's clipped vertices are in memory
+        for zoom in range(min_zoom, max_zoom + 1):
+            tol_m = tolerance_px * 2 * math.pi * EARTH_R / ((1 << zoom) * EXTENT)
+            rows, offs = simplify_lines(mx, my, tracks.offsets, tol_m)
+            px, py = _to_pixels(mx[rows], my[rows], zoom)
+            cols = clip_to_tiles(px, py, offs, buffer_px)
+            del rows, offs, px, py
+            tile_key = cols[0] * (1 << zoom) + cols[1]
+            bounds = np.flatnonzero(np.r_[True, tile_key[1:] != tile_key[:-1]])
+            print(f"z{zoom}: {len(bounds)} tiles")
+            cuts = list(bounds[::tiles_per_job]) + [len(tile_key)]
+            jobs = [_job(layer, zoom, cols, a, b, ids, props) for a, b in zip(cuts[:-1], cuts[1:])]
+            if ex is None or len(jobs) <= 1:
+                results = (_encode_tiles(*job) for job in jobs)
+            else:
+                results = ex.map(_encode_tiles, *zip(*jobs))
+            for tiles in results:
+                db.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                               [(z, x, (1 << z) - 1 - y, data) for z, x, y, data in tiles])
+                n += len(tiles)
+            del cols, jobs, results
+    finally:
+        if ex is not None:
+            ex.shutdown()
+    db.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+
+    lon, lat = tracks["lon"], tracks["lat"]
+    bounds = [float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())] if len(lon) else [0, 0, 0, 0]
+    fields = {k: "String" if np.asarray(v).dtype.kind == "U" else "Number" for k, v in props.items()}
+    meta = {"name": layer, "format": "pbf", "type": "overlay", "minzoom": str(min_zoom), "maxzoom": str(max_zoom),
+            "bounds": ",".join(f"{b:.6f}" for b in bounds),
+            "center": f"{(bounds[0] + bounds[2]) / 2:.6f},{(bounds[1] + bounds[3]) / 2:.6f},{min_zoom}",
+            "json": json.dumps({"vector_layers": [{"id": layer, "fields": fields,
+                                                   "minzoom": min_zoom, "maxzoom": max_zoom}]})}
+    db.executemany("INSERT INTO metadata VALUES (?, ?)", list(meta.items()))
+    db.commit()
+    db.close()
+    return n
@@ -0,0 +1,118 @@
+# Overflight count raster: distinct flights per grid cell.
+#
+# Every track segment is rasterized with an exact supercover traversal: the
+# parameters t where a segment crosses vertical and horizontal grid lines are
+# generated for all segments at once, sorted per segment, and the midpoint of
+# each piece gives the cell it lies in. (flight, cell) pairs are then made
+# unique, so a flight counts at most once per cell however many of its
+# points or segments fall there. Flights are processed in chunks across worker
+# processes and the partial grids are summed.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .density import MetricGrid
+from .projection import aeqd_forward
+
+
+def _ranges(lo, hi):
+    """Concatenate the integer ranges lo[i]..hi[i] (inclusive); returns (group, value)."""
+    n = np.maximum(hi - lo + 1, 0)
+    grp = np.repeat(np.arange(len(n)), n)
+    start = np.repeat(np.cumsum(n) - n, n)
+    return grp, np.arange(int(n.sum())) - start + np.repeat(lo, n)
+
+
+def _clip_to_box(x0, y0, x1, y1, size):
+    """Liang-Barsky clip of segments to [0, size]^2 -> (keep mask, t_enter, t_exit)."""
+    t0 = np.zeros(len(x0))
+    t1 = np.ones(len(x0))
+    keep = np.ones(len(x0), dtype=bool)
+    for p, q in ((-(x1 - x0), x0), (x1 - x0, size - x0), (-(y1 - y0), y0), (y1 - y0, size - y0)):
+        par = p == 0
+        keep &= ~(par & (q < 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = q / p
+        t0 = np.where(~par & (p < 0), np.maximum(t0, r), t0)
+        t1 = np.where(~par & (p > 0), np.minimum(t1, r), t1)
+    return keep & (t0 <= t1), t0, t1
+
+
+def segment_cells(gx, gy, offsets, n):
+    """
+    Cells touched by each flight's track in grid coordinates gx, gy (cell units,
+    origin at the lower-left corner of an n x n grid). Returns (flight, cell)
+    arrays, not yet unique.
+    """
+    n_flights = len(offsets) - 1
+    counts = np.diff(offsets)
+    flight_of_point = np.repeat(np.arange(n_flights), counts)
+
+    # Each point's own cell covers single-point flights and zero-length segments
+    ix = np.floor(gx).astype(np.int64)
+    iy = np.floor(gy).astype(np.int64)
+    inside = (ix >= 0) & (ix < n) & (iy >= 0) & (iy < n)
+    out_f = [flight_of_point[inside]]
+    out_c = [iy[inside] * n + ix[inside]]
+
+    seg = np.ones(len(gx), dtype=bool)
+    seg[offsets[1:] - 1] = False              # last point of a flight starts no segment
+    seg = np.flatnonzero(seg[:len(gx)])
+    x0, y0, x1, y1 = gx[seg], gy[seg], gx[seg + 1], gy[seg + 1]
+    keep, te, tx = _clip_to_box(x0, y0, x1, y1, n)
+    seg, x0, y0, x1, y1, te, tx = seg[keep], x0[keep], y0[keep], x1[keep], y1[keep], te[keep], tx[keep]
+    dx, dy = x1 - x0, y1 - y0
+    cx0, cy0 = x0 + te * dx, y0 + te * dy
+    cx1, cy1 = x0 + tx * dx, y0 + tx * dy
+
+    # grid lines strictly inside each clipped segment's x / y extent
+    gxs, kx = _ranges(np.floor(np.minimum(cx0, cx1)).astype(np.int64) + 1,
+                      np.ceil(np.maximum(cx0, cx1)).astype(np.int64) - 1)
+    gys, ky = _ranges(np.floor(np.minimum(cy0, cy1)).astype(np.int64) + 1,
+                      np.ceil(np.maximum(cy0, cy1)).astype(np.int64) - 1)
+    m = len(seg)
+    sid = np.concatenate([np.arange(m), np.arange(m), gxs, gys])
+    t = np.concatenate([te, tx, (kx - x0[gxs]) / dx[gxs], (ky - y0[gys]) / dy[gys]])
+    order = np.lexsort((t, sid))
+    sid, t = sid[order], t[order]
+    piece = (sid[1:] == sid[:-1]) & (t[1:] > t[:-1])
+    s = sid[:-1][piece]
+    tm = (t[:-1][piece] + t[1:][piece]) / 2
+    px = np.clip(np.floor(x0[s] + tm * dx[s]).astype(np.int64), 0, n - 1)
+    py = np.clip(np.floor(y0[s] + tm * dy[s]).astype(np.int64), 0, n - 1)
+    out_f.append(flight_of_point[seg[s]])
+    out_c.append(py * n + px)
+    return np.concatenate(out_f), np.concatenate(out_c)
+
+
+def _count_chunk(lon, lat, offsets, center, x0, y0, cell, n):
+    x, y = aeqd_forward(lon, lat, *center)
+    f, c = segment_cells((x - x0) / cell, (y - y0) / cell, offsets, n)
+    keys = np.unique(f.astype(np.int64) * (n * n) + c)
+    return np.bincount(keys % (n * n), minlength=n * n).astype(np.int32)
+
+
+class OverflightGrid(MetricGrid):
+    def __init__(self, center, half_width_m, cell_m=250.0, name="overflights"):
+        super().__init__(center, half_width_m, cell_m, name, dtype=np.int64)
+        self.flights = 0
+
+    def add_tracks(self, tracks, workers=None, chunk_flights=2000):
+        """Add distinct-flight counts for every flight in tracks (chunks in parallel when workers != 1)."""
+        bounds = list(range(0, len(tracks), chunk_flights)) + [len(tracks)]
+        jobs = []
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            r0, r1 = tracks.offsets[a], tracks.offsets[b]
+            jobs.append((np.ascontiguousarray(tracks["lon"][r0:r1]), np.ascontiguousarray(tracks["lat"][r0:r1]),
+                         tracks.offsets[a:b + 1] - r0, self.center, self.x0, self.y0, self.cell, self.n))
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            parts = [_count_chunk(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+                parts = list(ex.map(_count_chunk, *zip(*jobs)))
+        for part in parts:
+            self.grid += part
+        self.flights += len(tracks)
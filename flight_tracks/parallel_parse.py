@@ -0,0 +1,123 @@
+# Parallel CSV decoding over newline-aligned byte ranges.
+#
+# The file is cut into N byte ranges whose boundaries fall just after a
+# newline that is outside any quoted field (quote parity is tracked from the
+# end of the header). Each range is parsed in its own worker process with the
+# same decode_frame used for single-threaded reads, and the typed columns come
+# back in file order. On Windows, call this from under `if __name__ == "__main__":`.
+
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .decode import RejectReport, decode_frame, resolve_columns
+
+MIN_PART_BYTES = 8 * 1024 * 1024   # below this a range isn't worth a process
+SCAN_BLOCK = 64 * 1024 * 1024
+
+
+def _count(mm, a, b, token):
+    n = 0
+    for s in range(a, b, SCAN_BLOCK):
+        n += mm[s:min(b, s + SCAN_BLOCK)].count(token)
+    return n
+
+
+def _record_end(mm, pos, quotes, quoted):
+    """Index just past the first newline at or after pos that ends a record, and the updated quote count."""
+    while True:
+        nl = mm.find(b"\n", pos)
+        if nl == -1:
+            return -1, quotes
+        if quoted:
+            quotes += _count(mm, pos, nl, b'"')
+        pos = nl + 1
+        if quotes % 2 == 0:
+            return pos, quotes
+
+
+def split_ranges(path, n_parts, quoted=True):
+    """
+    Byte ranges [(start, end), ...] covering the data rows of a CSV, plus the
+    header end offset. With quoted=False the quote-parity scan is skipped (only
+    safe when no field contains a newline).
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size == 0:
+            return 0, []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end, _ = _record_end(mm, 0, 0, quoted)
+            if header_end == -1:
+                return size, []
+            bounds = [header_end]
+            quotes, pos = 0, header_end
+            for i in range(1, n_parts):
+                target = header_end + (size - header_end) * i // n_parts
+                if target <= bounds[-1]:
+                    continue
+                if quoted:
+                    quotes += _count(mm, pos, target, b'"')
+                end, quotes = _record_end(mm, target, quotes, quoted)
+                if end == -1 or end >= size:
+                    break
+                bounds.append(end)
+                pos = end
+            bounds.append(size)
+    return header_end, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_range(path, header_end, start, end, resolved, require):
+    import pandas as pd
+    with open(path, "rb") as f:
+        header = f.read(header_end)
+        f.seek(start)
+        body = f.read(end - start)
+    df = pd.read_csv(io.BytesIO(header + body), dtype=str, keep_default_na=False,
+                     encoding="utf-8-sig", skip_blank_lines=False)
+    cols, report = decode_frame(df, resolved, require, first_line=2, source=os.path.abspath(path))
+    return cols, report, len(df)
+
+
+def parse_csv_parallel(path, airports, require=(), workers=None, reject_path=None, quoted=True):
+    """
+    Drop-in for decode.decode_csv that parses byte ranges in worker processes.
+    Returns (columns, RejectReport) with rows and reject line numbers in file order.
+    """
+    import pandas as pd
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    n_parts = max(1, min(workers, size // MIN_PART_BYTES))
+    header_end, ranges = split_ranges(path, n_parts, quoted)
+    header = pd.read_csv(path, nrows=0, dtype=str, encoding="utf-8-sig").columns
+    resolved = resolve_columns(header, airports)
+    print("Resolved columns:", ", ".join(f"{k}={v}" for k, v in resolved.items()))
+    if not ranges:
+        raise RuntimeError("CSV has no data rows.")
+
+    if len(ranges) == 1:
+        results = [_parse_range(path, header_end, *ranges[0], resolved, require)]
+    else:
+        print(f"Parsing {len(ranges)} byte ranges on {min(workers, len(ranges))} processes...")
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as ex:
+            futures = [ex.submit(_parse_range, path, header_end, a, b, resolved, require) for a, b in ranges]
+            results = [fut.result() for fut in futures]
+
+    # Shift per-range line numbers by the records parsed before each range
+    offset = 0
+    for _, report, n_rows in results:
+        report.line += offset
+        offset += n_rows
+    names = list(results[0][0])
+    cols = {k: np.concatenate([r[0][k] for r in results]) for k in names}
+    report = RejectReport.concat(r[1] for r in results)
+    if report.rejected:
+        print(f"Rejected {report.rejected} of {offset} rows:")
+        print(report.table())
+        if reject_path:
+            report.write(reject_path)
+            print(f"Rejected rows written to: {reject_path}")
+    return cols, report
@@ -0,0 +1,295 @@
+# Overlapped read -> parse -> write pipeline.
+#
+#   reader thread      reads record-aligned byte blocks from the CSV
+#   parser threads     decode blocks into typed columns (decode_frame)
+#   writer thread      puts batches back in file order and drains them into a sink
+#
+# Stages are linked by bounded queues, so a fast stage waits (backpressure)
+# instead of buffering the whole file. Each stage records how long it was busy
+# and how long it sat blocked on its input or output queue; the summary says
+# whether a run is I/O-bound, parse-bound or sink-bound.
+
+import io
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .decode import RejectReport, decode_frame, resolve_columns
+
+BLOCK_BYTES = 4 * 1024 * 1024
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.wait_in = 0.0
+        self.wait_out = 0.0
+        self.items = 0
+
+    def row(self):
+        return f"{self.name:<8}{self.items:>8}{self.busy:>10.2f}{self.wait_in:>10.2f}{self.wait_out:>10.2f}"
+
+
+def _put(q, item, stop, stats):
+    t = time.perf_counter()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            break
+        except queue.Full:
+            continue
+    stats.wait_out += time.perf_counter() - t
+
+
+def _get(q, stop, stats):
+    t = time.perf_counter()
+    while True:
+        try:
+            item = q.get(timeout=0.1)
+            break
+        except queue.Empty:
+            if stop.is_set():
+                item = _DONE
+                break
+    stats.wait_in += time.perf_counter() - t
+    return item
+
+
+def _complete_records(buf, quoted):
+    """Length of the longest prefix of buf that ends on a record boundary (0 if none)."""
+    pos = buf.rfind(b"\n")
+    if not quoted or pos == -1:
+        return pos + 1
+    total = buf.count(b'"')
+    while pos != -1:
+        if (total - buf.count(b'"', pos)) % 2 == 0:
+            return pos + 1
+        pos = buf.rfind(b"\n", 0, pos)
+    return 0
+
+
+class MemorySink:
+    """Collects batches in memory; columns() concatenates them."""
+
+    def __init__(self):
+        self.batches = []
+
+    def open(self, names):
+        self.batches = []
+
+    def write(self, cols):
+        self.batches.append(cols)
+
+    def close(self):
+        pass
+
+    def columns(self):
+        names = list(self.batches[0]) if self.batches else []
+        return {k: np.concatenate([b[k] for b in self.batches]) for k in names}
+
+
+class TeeSink:
+    """Hands every batch to several sinks, e.g. a point feature class and a MemorySink."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def open(self, names):
+        for s in self.sinks:
+            s.open(names)
+
+    def write(self, cols):
+        for s in self.sinks:
+            s.write(cols)
+
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+
+class ArcpyPointSink:
+    """
+    Inserts batches into a point feature class with an InsertCursor, like step
+    2 of the track scripts. field_map maps FC field names to decoded columns,
+    e.g. {"flight_id": "flight", "ts": "ts", "lat": "lat", "lon": "lon"}.
+    arcpy is only imported when the sink is opened.
+    """
+
+    def __init__(self, fc, field_map):
+        self.fc = fc
+        self.field_map = dict(field_map)
+        self.inserted = 0
+        self._cur = None
+
+    def open(self, names):
+        import arcpy
+        self._cur = arcpy.da.InsertCursor(self.fc, list(self.field_map) + ["SHAPE@XY"])
+
+    def write(self, cols):
+        values = []
+        for col in self.field_map.values():
+            v = cols[col]
+            if v.dtype.kind == "M":
+                v = v.astype("datetime64[us]").astype(object)
+            values.append(v.tolist() if v.dtype != object else list(v))
+        xy = list(zip(cols["lon"].tolist(), cols["lat"].tolist()))
+        for row in zip(*values, xy):
+            self._cur.insertRow(row)
+        self.inserted += len(xy)
+
+    def close(self):
+        if self._cur is not None:
+            del self._cur
+            self._cur = None
+
+
+def run_pipeline(path, airports, sink, require=(), batch_filter=None, parse_workers=2,
+                 queue_size=4, block_bytes=BLOCK_BYTES, quoted=True, reject_path=None):
+    """
+    Stream a raw CSV through reader -> parser(s) -> writer into sink.
+    batch_filter(cols) -> cols runs in the parser threads (e.g. distance/altitude
+    limits). Returns (RejectReport, {stage: StageStats}).
+    """
+    import pandas as pd
+    with open(path, "rb") as f:
+        header = f.readline()
+    resolved = resolve_columns(pd.read_csv(io.BytesIO(header), nrows=0, dtype=str,
+                                           encoding="utf-8-sig").columns, airports)
+    print("Resolved columns:", ", ".join(f"{k}={v}" for k, v in resolved.items()))
+
+    raw_q = queue.Queue(maxsize=queue_size)
+    parsed_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    stats = {"read": StageStats("read"), "write": StageStats("write")}
+    parse_stats = [StageStats(f"parse{i}") for i in range(parse_workers)]
+    reports = {}
+
+    def guarded(fn):
+        def run(*args):
+            try:
+                fn(*args)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+        return run
+
+    @guarded
+    def reader():
+        st = stats["read"]
+        seq = 0
+        carry = b""
+        with open(path, "rb") as f:
+            f.readline()
+            while not stop.is_set():
+                t = time.perf_counter()
+                block = f.read(block_bytes)
+                buf = carry + block
+                cut = len(buf) if not block else _complete_records(buf, quoted)
+                st.busy += time.perf_counter() - t
+                if not buf:
+                    break
+                if cut:
+                    st.items += 1
+                    _put(raw_q, (seq, buf[:cut]), stop, st)
+                    seq += 1
+                carry = buf[cut:]
+                if not block:
+                    break
+        for _ in range(parse_workers):
+            _put(raw_q, _DONE, stop, st)
+
+    @guarded
+    def parser(st):
+        while True:
+            item = _get(raw_q, stop, st)
+            if item is _DONE:
+                break
+            seq, body = item
+            t = time.perf_counter()
+            df = pd.read_csv(io.BytesIO(header + body), dtype=str, keep_default_na=False,
+                             encoding="utf-8-sig", skip_blank_lines=False)
+            cols, report = decode_frame(df, resolved, require, first_line=2, source=os.path.abspath(path))
+            if batch_filter is not None:
+                cols = batch_filter(cols)
+            st.busy += time.perf_counter() - t
+            st.items += 1
+            _put(parsed_q, (seq, cols, report, len(df)), stop, st)
+        _put(parsed_q, _DONE, stop, st)
+
+    @guarded
+    def writer():
+        st = stats["write"]
+        pending = {}
+        next_seq, done, offset = 0, 0, 0
+        sink.open(None)
+        try:
+            while done < parse_workers:
+                item = _get(parsed_q, stop, st)
+                if item is _DONE:
+                    done += 1
+                    if stop.is_set():
+                        break
+                    continue
+                pending[item[0]] = item[1:]
+                while next_seq in pending:
+                    cols, report, n_rows = pending.pop(next_seq)
+                    report.line += offset
+                    offset += n_rows
+                    reports[next_seq] = report
+                    t = time.perf_counter()
+                    if len(cols["ts"]):
+                        sink.write(cols)
+                    st.busy += time.perf_counter() - t
+                    st.items += 1
+                    next_seq += 1
+        finally:
+            sink.close()
+
+    threads = [threading.Thread(target=reader, name="read"),
+               threading.Thread(target=writer, name="write")]
+    threads += [threading.Thread(target=parser, args=(s,), name=s.name) for s in parse_stats]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - t0
+    if errors:
+        raise errors[0]
+
+    for s in parse_stats:
+        stats[s.name] = s
+    print(pipeline_summary(stats, elapsed))
+    report = RejectReport.concat(reports[k] for k in sorted(reports)) if reports else None
+    if report is not None and report.rejected:
+        print(report.table())
+        if reject_path:
+            report.write(reject_path)
+            print(f"Rejected rows written to: {reject_path}")
+    return report, stats
+
+
+def pipeline_summary(stats, elapsed):
+    """Per-stage busy / blocked seconds and a one-line verdict on the bottleneck."""
+    lines = [f"Pipeline finished in {elapsed:.2f} s",
+             f"{'stage':<8}{'batches':>8}{'busy s':>10}{'wait in':>10}{'wait out':>10}"]
+    lines += [s.row() for s in stats.values()]
+    read, write = stats["read"], stats["write"]
+    parse_busy = sum(s.busy for k, s in stats.items() if k.startswith("parse"))
+    n_parse = max(1, sum(1 for k in stats if k.startswith("parse")))
+    if read.wait_out > read.busy and write.wait_in > write.busy:
+        verdict = "parse-bound (reader and writer wait on the parsers)"
+    elif write.busy >= max(read.busy, parse_busy / n_parse):
+        verdict = "sink-bound (writer busy, parsers wait to hand off batches)"
+    elif read.busy >= parse_busy / n_parse:
+        verdict = "I/O-bound (parsers wait on the reader)"
+    else:
+        verdict = "parse-bound"
+    lines.append(f"Bottleneck: {verdict}")
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+# Local metric projections around an airport, on NumPy arrays.
+#
+#   "aeqd"  azimuthal equidistant on the WGS84 ellipsoid, centered on the
+#           airport: distance and azimuth from the center are exact (geodesic),
+#           which is what radius filters and airport-centered grids need.
+#   "utm"   transverse Mercator in the airport's UTM zone (Krueger series,
+#           sub-millimeter inside the zone), for layers that must match a
+#           standard EPSG:326xx/327xx CRS.
+#
+# Projection objects hold their precomputed constants and are cached per
+# airport/center, so scripts can call for_airport("BOS") freely. forward and
+# inverse work on whole arrays and accept out= buffers for in-place use.
+#
+# Cost: AEQD forward is a vectorized Vincenty inverse (iterated until every
+# point converges) and inverse a Vincenty direct, about 0.6 s per million
+# points each; UTM is closed-form and two to three times faster. The density,
+# clustering and segment-index stages project once per call, so project a
+# selection once and reuse x/y rather than calling forward in a loop. A
+# closed-form ellipsoidal series (Snyder) is ~2x faster but already ~1 cm off
+# at 100 km, which would break the exact-distance guarantee above.
+# Run `python -m flight_tracks.projection` for the round-trip self-check
+# (about a second).
+
+import functools
+import math
+
+import numpy as np
+
+from .airports import AIRPORTS
+from .geodesy import WGS84_A, WGS84_F, direct, inverse
+
+UTM_K0 = 0.9996
+UTM_FALSE_EASTING = 500000.0
+UTM_FALSE_NORTHING_SOUTH = 10000000.0
+
+WGS84_GEOGCS = ('GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+                'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]')
+
+
+def _store(values, out):
+    if out is None:
+        return values
+    for dst, src in zip(out, values):
+        dst[...] = src
+    return out
+
+
+class AzimuthalEquidistant:
+    kind = "aeqd"
+
+    def __init__(self, lon0, lat0):
+        self.lon0, self.lat0 = float(lon0), float(lat0)
+
+    def forward(self, lon, lat, out=None):
+        """lon/lat degrees -> x (east), y (north) meters; out=(x_buf, y_buf) fills in place."""
+        dist, azi = inverse(self.lon0, self.lat0, lon, lat)
+        a = np.radians(azi)
+        return _store((dist * np.sin(a), dist * np.cos(a)), out)
+
+    def inverse(self, x, y, out=None):
+        """x/y meters -> lon, lat degrees."""
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        return _store(direct(self.lon0, self.lat0, np.degrees(np.arctan2(x, y)), np.hypot(x, y)), out)
+
+    def prj(self, name="AEQD"):
+        return (f'PROJCS["{name}",{WGS84_GEOGCS},PROJECTION["Azimuthal_Equidistant"],'
+                f'PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],'
+                f'PARAMETER["Central_Meridian",{self.lon0}],PARAMETER["Latitude_Of_Origin",{self.lat0}],'
+                f'UNIT["Meter",1.0]]')
+
+
+class UTM:
+    kind = "utm"
+
+    def __init__(self, lon0, lat0, zone=None):
+        self.zone = zone or int(math.floor((lon0 + 180) / 6)) + 1
+        self.south = lat0 < 0
+        self.lon0 = self.zone * 6 - 183.0
+        n = WGS84_F / (2 - WGS84_F)
+        self._n = n
+        self._a = WGS84_A / (1 + n) * (1 + n ** 2 / 4 + n ** 4 / 64)
+        self._alpha = (n / 2 - 2 * n ** 2 / 3 + 5 * n ** 3 / 16 + 41 * n ** 4 / 180,
+                       13 * n ** 2 / 48 - 3 * n ** 3 / 5 + 557 * n ** 4 / 1440,
+                       61 * n ** 3 / 240 - 103 * n ** 4 / 140,
+                       49561 * n ** 4 / 161280)
+        self._beta = (n / 2 - 2 * n ** 2 / 3 + 37 * n ** 3 / 96 - n ** 4 / 360,
+                      n ** 2 / 48 + n ** 3 / 15 - 437 * n ** 4 / 1440,
+                      17 * n ** 3 / 480 - 37 * n ** 4 / 840,
+                      4397 * n ** 4 / 161280)
+        self._delta = (2 * n - 2 * n ** 2 / 3 - 2 * n ** 3 + 116 * n ** 4 / 45,
+                       7 * n ** 2 / 3 - 8 * n ** 3 / 5 - 227 * n ** 4 / 45,
+                       56 * n ** 3 / 15 - 136 * n ** 4 / 35,
+                       4279 * n ** 4 / 630)
+        self._false_n = UTM_FALSE_NORTHING_SOUTH if self.south else 0.0
+
+    @property
+    def epsg(self):
+        return (32700 if self.south else 32600) + self.zone
+
+    def forward(self, lon, lat, out=None):
+        """lon/lat degrees -> easting, northing meters in this zone."""
+        phi = np.radians(lat)
+        lam = np.radians(np.asarray(lon, dtype=np.float64) - self.lon0)
+        c = 2 * math.sqrt(self._n) / (1 + self._n)
+        t = np.sinh(np.arctanh(np.sin(phi)) - c * np.arctanh(c * np.sin(phi)))
+        xi_p = np.arctan2(t, np.cos(lam))
+        eta_p = np.arctanh(np.sin(lam) / np.sqrt(1 + t * t))
+        xi, eta = xi_p.copy(), eta_p.copy()
+        for j, a in enumerate(self._alpha, start=1):
+            xi += a * np.sin(2 * j * xi_p) * np.cosh(2 * j * eta_p)
+            eta += a * np.cos(2 * j * xi_p) * np.sinh(2 * j * eta_p)
+        k = UTM_K0 * self._a
+        return _store((UTM_FALSE_EASTING + k * eta, self._false_n + k * xi), out)
+
+    def inverse(self, x, y, out=None):
+        """easting, northing meters -> lon, lat degrees."""
+        k = UTM_K0 * self._a
+        xi = (np.asarray(y, dtype=np.float64) - self._false_n) / k
+        eta = (np.asarray(x, dtype=np.float64) - UTM_FALSE_EASTING) / k
+        xi_p, eta_p = xi.copy(), eta.copy()
+        for j, b in enumerate(self._beta, start=1):
+            xi_p -= b * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+            eta_p -= b * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        chi = np.arcsin(np.sin(xi_p) / np.cosh(eta_p))
+        phi = chi.copy()
+        for j, d in enumerate(self._delta, start=1):
+            phi += d * np.sin(2 * j * chi)
+        lam = np.arctan2(np.sinh(eta_p), np.cos(xi_p))
+        return _store((self.lon0 + np.degrees(lam), np.degrees(phi)), out)
+
+    def prj(self, name=None):
+        name = name or f"WGS_1984_UTM_Zone_{self.zone}{'S' if self.south else 'N'}"
+        return (f'PROJCS["{name}",{WGS84_GEOGCS},PROJECTION["Transverse_Mercator"],'
+                f'PARAMETER["False_Easting",{UTM_FALSE_EASTING}],PARAMETER["False_Northing",{self._false_n}],'
+                f'PARAMETER["Central_Meridian",{self.lon0}],PARAMETER["Scale_Factor",{UTM_K0}],'
+                f'PARAMETER["Latitude_Of_Origin",0.0],UNIT["Meter",1.0]]')
+
+
+@functools.lru_cache(maxsize=None)
+def projection_for(lon0, lat0, kind="aeqd"):
+    """Cached projection centered on (lon0, lat0); kind "aeqd" or "utm"."""
+    if kind == "aeqd":
+        return AzimuthalEquidistant(lon0, lat0)
+    if kind == "utm":
+        return UTM(lon0, lat0)
+    raise ValueError(f"Unknown projection kind {kind!r}")
+
+
+def for_airport(code, kind="aeqd"):
+    """Cached projection for an airport code from airports.AIRPORTS (BOS, SEA, PHX, OAK, ...)."""
+    return projection_for(*AIRPORTS[code.upper()], kind)
+
+
+# Functional forms used by the grid stages (airport-centered AEQD)
+def aeqd_forward(lon, lat, lon0, lat0):
+    """WGS84 lon/lat (degrees, arrays) -> x, y meters from (lon0, lat0)."""
+    return projection_for(lon0, lat0).forward(lon, lat)
+
+
+def aeqd_prj(lon0, lat0, name="AEQD"):
+    """ESRI .prj text for the airport-centered AEQD, so ArcGIS places grids correctly."""
+    return projection_for(lon0, lat0).prj(name)
+
+
+def _self_check(n=20000, radius_m=100000.0, seed=0):
+    """Round-trip every airport projection on random points within radius_m; returns max errors (m)."""
+    rng = np.random.default_rng(seed)
+    worst = {}
+    for code in AIRPORTS:
+        lon0, lat0 = AIRPORTS[code]
+        lon, lat = direct(lon0, lat0, rng.uniform(0, 360, n), radius_m * np.sqrt(rng.uniform(0, 1, n)))
+        for kind in ("aeqd", "utm"):
+            proj = for_airport(code, kind)
+            x, y = proj.forward(lon, lat)
+            lon2, lat2 = proj.inverse(x, y)
+            err, _ = inverse(lon, lat, lon2, lat2)
+            worst[(code, kind)] = float(err.max())
+        # AEQD must preserve the geodesic distance from the center
+        x, y = for_airport(code).forward(lon, lat)
+        d, _ = inverse(lon0, lat0, lon, lat)
+        worst[(code, "aeqd_dist")] = float(np.abs(np.hypot(x, y) - d).max())
+    return worst
+
+
+if __name__ == "__main__":
+    errors = _self_check()
+    for (code, kind), err in sorted(errors.items()):
+        print(f"{code} {kind:<10} max error {err:.2e} m")
+    assert max(errors.values()) < 1e-3, "round-trip error above 1 mm"
+    # Known UTM point: the zone 31 central meridian at the equator
+    e, n = UTM(3.0, 0.0).forward(np.array([3.0]), np.array([0.0]))
+    assert abs(e[0] - 500000.0) < 1e-6 and abs(n[0]) < 1e-6
+    print("Projection round trips OK.")
@@ -0,0 +1,149 @@
+# Query API over a store written by store.build_store.
+#
+#   ts = TrackStore(r"C:\...\track_store")
+#   tracks = ts.select("Boston", "2013-06-01", "2013-06-29", max_km=30, max_alt_100ft=50)
+#   deps = ts.select("NorCal", airport="SFO", max_km=60, phase="Departure")
+#
+# Filters are pushed down: the day window and the distance/altitude limits
+# prune whole partitions via the manifest stats, and only the columns a query
+# needs are read. Recent results are kept in an LRU cache per TrackStore.
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .airports import AIRPORTS, NEAR_AIRPORT_M
+from .clip import clip_tracks
+from .store import ColumnStore
+from .tracks import PHASES, build_tracks, classify_phase
+
+BASE_COLUMNS = ("flight", "ts", "lat", "lon", "alt_100ft")
+
+
+def _freeze(result):
+    """Mark cached arrays read-only so callers can't corrupt the cache."""
+    arrays = result.values() if isinstance(result, dict) else [
+        result.flight_ids, result.offsets, *result.columns.values(), *result.attrs.values()]
+    for a in arrays:
+        a.flags.writeable = False
+    return result
+
+
+class TrackStore:
+    def __init__(self, store_dir, cache_size=32):
+        self.store_dir = store_dir
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._metros = {}
+
+    def metro(self, metro):
+        if metro not in self._metros:
+            path = os.path.join(self.store_dir, metro)
+            if not os.path.isdir(path):
+                raise KeyError(f"No store for metro {metro!r} under {self.store_dir}")
+            self._metros[metro] = ColumnStore(path)
+        return self._metros[metro]
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def select(self, metro, start=None, end=None, airport=None, max_km=None,
+               max_alt_100ft=None, phase=None, dep_aprt=None, points=False, columns=(), clean=False,
+               clip=False):
+        """
+        Rows with start <= ts < end, dist_to_<airport> <= max_km and
+        altitudex100ft <= max_alt_100ft (None = no limit), optionally only
+        flights departing dep_aprt (dep_aprt column) or of the given phase
+        (Departure/Arrival/Local/Overflight, classified on the filtered track
+        against the 3 nm circle around the airport).
+
+        Returns Tracks (flight-grouped, attrs["phase"] when airport is known),
+        or with points=True a dict of point columns including "flight".
+        Extra stored columns can be requested via columns. clean=True drops
+        duplicate timestamps and speed/vertical-rate spikes (see build_tracks);
+        the per-reason counts are in tracks.removed. clip=True cuts tracks
+        exactly at the max_km circle / max_alt_100ft ceiling instead of
+        dropping the points outside, one entry per in-bounds piece
+        (see clip_tracks).
+        """
+        key = (metro, None if start is None else str(np.datetime64(start, "ns")),
+               None if end is None else str(np.datetime64(end, "ns")),
+               airport, max_km, max_alt_100ft, phase, dep_aprt, points, tuple(columns), clean, clip)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        result = _freeze(self._select(metro, start, end, airport, max_km, max_alt_100ft,
+                                      phase, dep_aprt, points, columns, clean, clip))
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _select(self, metro, start, end, airport, max_km, max_alt_100ft, phase, dep_aprt, points, columns, clean, clip):
+        cs = self.metro(metro)
+        if airport is None and len(cs.airports) == 1:
+            airport = cs.airports[0]
+        if airport is None and (max_km is not None or phase is not None):
+            raise ValueError(f"{metro} has several airports {cs.airports}; pass airport=")
+        if airport is not None and airport not in cs.airports:
+            raise ValueError(f"{airport} is not one of {metro}'s airports {cs.airports}")
+        if phase is not None and phase not in PHASES:
+            raise ValueError(f"phase must be one of {PHASES}")
+
+        dist_col = f"dist_{airport}" if airport else None
+        bounds = []
+        if max_km is not None:
+            if dist_col not in cs.columns:
+                raise KeyError(f"Store has no distance column for {airport}")
+            bounds.append((dist_col, None, max_km))
+        if max_alt_100ft is not None:
+            bounds.append(("alt_100ft", None, max_alt_100ft))
+        parts = cs.partitions(start, end, bounds)
+
+        wanted = list(BASE_COLUMNS)
+        for extra in ([dist_col] if dist_col in cs.columns else []) + list(columns):
+            if extra not in wanted:
+                wanted.append(extra)
+        if dep_aprt is not None:
+            if "dep_aprt" not in cs.columns:
+                raise KeyError("Store has no dep_aprt column")
+            wanted.append("dep_aprt")
+        cols = cs.read(wanted, parts)
+
+        # Row-level predicates on what survived partition pruning
+        keep = np.ones(len(cols["ts"]), dtype=bool)
+        if start is not None:
+            keep &= cols["ts"] >= np.datetime64(start, "ns")
+        if end is not None:
+            keep &= cols["ts"] < np.datetime64(end, "ns")
+        if max_km is not None and not clip:
+            keep &= cols[dist_col] <= max_km
+        if max_alt_100ft is not None and not clip:
+            keep &= cols["alt_100ft"] <= max_alt_100ft
+        if dep_aprt is not None:
+            codes = np.flatnonzero(cs.dictionary("dep_aprt") == dep_aprt.upper())
+            keep &= np.isin(cols["dep_aprt"], codes)
+        cols = {k: v[keep] for k, v in cols.items()}
+
+        flight = cols.pop("flight")
+        tracks = build_tracks(flight, cols, clean=clean)
+        tracks.flight_ids = cs.dictionary("flight")[tracks.flight_ids]
+        for name in ("dep_aprt", "arr_aprt"):
+            if name in tracks.columns:
+                tracks.columns[name] = cs.dictionary(name)[tracks.columns[name]]
+        if clip and (max_km is not None or max_alt_100ft is not None):
+            tracks = clip_tracks(tracks, airport, max_km, max_alt_100ft)
+        if airport is not None:
+            tracks.attrs["phase"] = classify_phase(tracks, AIRPORTS[airport], NEAR_AIRPORT_M)
+            if phase is not None:
+                tracks = tracks.take(tracks.attrs["phase"] == phase)
+
+        if not points:
+            return tracks
+        out = {"flight": np.repeat(tracks.flight_ids, tracks.counts)}
+        out.update(tracks.columns)
+        if "phase" in tracks.attrs:
+            out["phase"] = np.repeat(tracks.attrs["phase"], tracks.counts)
+        return out
@@ -0,0 +1,129 @@
+# Batched track resampling on flight-grouped arrays.
+#
+# Every flight is parameterized by u in [0, 1] (elapsed time or arc length
+# over its total) and shifted by 2 * its index, which keeps the concatenated
+# parameter increasing with flights kept apart; one np.interp call per column
+# then resamples all flights at once. Resampling is by
+#   resample_time       fixed time step (seconds)
+#   resample_distance   fixed along-track distance (meters)
+#   resample_fixed_count  n points per flight (for clustering)
+# and carries lon, lat, altitude and time (plus any other numeric column).
+
+import numpy as np
+
+from .projection import projection_for
+from .tracks import Tracks
+
+
+def _flight_starts(tracks):
+    has = tracks.counts > 0
+    return has, tracks.offsets[:-1][has]
+
+
+def along_track_m(tracks, x="x", y="y"):
+    """Cumulative along-track distance (m) of every point from its flight's first point."""
+    px, py = tracks[x], tracks[y]
+    step = np.zeros(len(px))
+    step[1:] = np.hypot(np.diff(px), np.diff(py))
+    has, first = _flight_starts(tracks)
+    step[first] = 0.0
+    cum = np.cumsum(step)
+    return cum - np.repeat(cum[first], tracks.counts[has])
+
+
+def elapsed_s(tracks):
+    """Seconds since each flight's first point, for every point."""
+    t = tracks["ts"].astype("datetime64[ns]").astype(np.int64)
+    has, first = _flight_starts(tracks)
+    return (t - np.repeat(t[first], tracks.counts[has])) / 1e9
+
+
+def _numeric_columns(tracks, columns):
+    if columns is None:
+        columns = [k for k, v in tracks.columns.items() if v.dtype.kind in "fiuM"]
+    return list(columns)
+
+
+def _interp(tracks, s, targets_flight, targets_s, columns):
+    """Interpolate columns at (flight, s) targets; s is the per-point parameter from flight start."""
+    has, first = _flight_starts(tracks)
+    total = np.zeros(len(tracks))
+    total[has] = s[tracks.offsets[1:][has] - 1]
+    flight = tracks.flight_index()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        u = np.where(total[flight] > 0, s / total[flight], 0.0)
+        tu = np.where(total[targets_flight] > 0, targets_s / total[targets_flight], 0.0)
+    param = 2.0 * flight + u
+    targets = 2.0 * targets_flight + tu
+    flat = total[targets_flight] == 0           # zero-length/duration flights repeat their first point
+    out = {}
+    for name in columns:
+        v = tracks[name]
+        if v.dtype.kind == "M":
+            base = v.astype("datetime64[ns]").astype(np.int64)
+            t0 = np.repeat(base[first], tracks.counts[has])
+            rel = np.interp(targets, param, (base - t0).astype(np.float64))
+            rel[flat] = 0.0
+            out[name] = (base[first][np.cumsum(has)[targets_flight] - 1] + np.round(rel).astype(np.int64)
+                         ).astype("datetime64[ns]")
+        else:
+            r = np.interp(targets, param, v.astype(np.float64))
+            if flat.any():
+                r[flat] = v[tracks.offsets[:-1][targets_flight[flat]]]
+            out[name] = r.astype(v.dtype if v.dtype.kind == "f" else np.float64)
+    return out
+
+
+def _uniform_targets(tracks, s, step, keep_end):
+    """Per-flight targets 0, step, 2*step, ... (plus the end point when keep_end)."""
+    has = tracks.counts > 0
+    total = np.zeros(len(tracks))
+    total[has] = s[tracks.offsets[1:][has] - 1]
+    n = np.where(has, np.floor(total / step).astype(np.int64) + 1, 0)
+    if keep_end:
+        n += (has & (total - (n - 1) * step > 1e-9)).astype(np.int64)
+    flight = np.repeat(np.arange(len(tracks)), n)
+    k = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+    ts = np.minimum(k * step, total[flight])
+    offsets = np.zeros(len(tracks) + 1, dtype=np.int64)
+    np.cumsum(n, out=offsets[1:])
+    return flight, ts, offsets
+
+
+def resample_time(tracks, step_s, columns=None, keep_end=True):
+    """New Tracks sampled every step_s seconds from each flight's first point."""
+    s = elapsed_s(tracks)
+    flight, ts, offsets = _uniform_targets(tracks, s, float(step_s), keep_end)
+    cols = _interp(tracks, s, flight, ts, _numeric_columns(tracks, columns))
+    return Tracks(tracks.flight_ids, offsets, cols, tracks.attrs)
+
+
+def resample_distance(tracks, step_m, center=None, columns=None, keep_end=True):
+    """
+    New Tracks sampled every step_m meters of along-track distance. Distances
+    are measured in the AEQD projection around center (default: the data's
+    mean position), which is exact enough at metro scale.
+    """
+    if center is None:
+        center = (float(np.mean(tracks["lon"])), float(np.mean(tracks["lat"])))
+    x, y = projection_for(*center).forward(tracks["lon"], tracks["lat"])
+    tmp = Tracks(tracks.flight_ids, tracks.offsets, {"x": x, "y": y})
+    s = along_track_m(tmp)
+    flight, ts, offsets = _uniform_targets(tracks, s, float(step_m), keep_end)
+    cols = _interp(tracks, s, flight, ts, _numeric_columns(tracks, columns))
+    return Tracks(tracks.flight_ids, offsets, cols, tracks.attrs)
+
+
+def resample_fixed_count(tracks, n, x="x", y="y"):
+    """
+    n points per flight evenly spaced by arc length, first and last point
+    included: array (flights, n, 2).
+    """
+    s = along_track_m(tracks, x, y)
+    has = tracks.counts > 0
+    total = np.zeros(len(tracks))
+    total[has] = s[tracks.offsets[1:][has] - 1]
+    flight = np.repeat(np.arange(len(tracks)), n)
+    ts = (np.linspace(0.0, 1.0, n)[None, :] * total[:, None]).ravel()
+    cols = _interp(tracks, s, flight, ts, [x, y])
+    return np.stack([cols[x], cols[y]], axis=1).reshape(len(tracks), n, 2)
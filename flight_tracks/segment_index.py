@@ -0,0 +1,257 @@
+# Segment index for "which flights passed near here, then" questions.
+#
+# Every track segment (two consecutive points of a flight) is stored with its
+# AEQD coordinates around the airport, its time span and end altitudes, and
+# is registered in a uniform grid under every cell its bbox touches (CSR:
+# cell -> segment rows). A query (point, radius, time window, altitude cap)
+# reads the cells around the point, keeps the segments whose time span
+# overlaps the window, limits each one to the part inside the window and at
+# or below the cap (linear in the segment parameter), and takes the closest
+# point of that part. Results are per flight: closest approach distance, time
+# and altitude. query_many does the same for many points at once.
+#
+#   idx = SegmentIndex.build(tracks, AIRPORTS["BOS"])
+#   idx.save(os.path.join(out_dir, "bos_segments.npz"))
+#   SegmentIndex.load(path).query(-71.06, 42.35, 1000, "2013-06-03 17:30", "2013-06-03 18:30", 30)
+#
+#   python -m flight_tracks.segment_index bos_segments.npz --lon -71.06 --lat 42.35 --radius-m 1000 \
+#       --start "2013-06-03 17:30" --end "2013-06-03 18:30" --max-alt-100ft 30
+
+import argparse
+import time
+
+import numpy as np
+
+from .projection import projection_for
+
+CELL_M = 2000.0
+MAX_PAIRS = 2_000_000
+
+
+def _time_s(t):
+    return np.asarray(t).astype("datetime64[ns]").astype(np.int64) / 1e9
+
+
+def _cell_ranges(lo, hi, cell, n):
+    a = np.clip(np.floor(lo / cell).astype(np.int64), 0, n - 1)
+    b = np.clip(np.floor(hi / cell).astype(np.int64), 0, n - 1)
+    return a, b
+
+
+class SegmentIndex:
+    def __init__(self, center, cell_m, x0, y0, nx, ny, seg, flight_ids, cell_offsets, cell_segments):
+        self.center = tuple(center)
+        self.cell_m = float(cell_m)
+        self.x0, self.y0 = float(x0), float(y0)
+        self.nx, self.ny = int(nx), int(ny)
+        self.seg = seg                          # dict of per-segment arrays
+        self.flight_ids = np.asarray(flight_ids)
+        self.cell_offsets = cell_offsets
+        self.cell_segments = cell_segments
+        self.proj = projection_for(*self.center)
+
+    @classmethod
+    def build(cls, tracks, center, cell_m=CELL_M):
+        """Index every segment of tracks (needs lon, lat, ts; alt_100ft when present)."""
+        x, y = projection_for(*center).forward(tracks["lon"], tracks["lat"])
+        t = _time_s(tracks["ts"])
+        alt = tracks["alt_100ft"].astype(np.float64) if "alt_100ft" in tracks.columns \
+            else np.zeros(len(x))
+        flight = tracks.flight_index()
+        s = np.flatnonzero(flight[1:] == flight[:-1]) if len(x) else np.zeros(0, dtype=np.int64)
+        # single-point flights become zero-length segments so they stay findable
+        single = tracks.offsets[:-1][tracks.counts == 1]
+        a = np.r_[s, single]
+        b = np.r_[s + 1, single]
+        seg = {"x0": x[a], "y0": y[a], "x1": x[b], "y1": y[b], "t0": t[a], "t1": t[b],
+               "alt0": alt[a], "alt1": alt[b], "flight": flight[a].astype(np.int32)}
+
+        xmin = np.minimum(seg["x0"], seg["x1"])
+        xmax = np.maximum(seg["x0"], seg["x1"])
+        ymin = np.minimum(seg["y0"], seg["y1"])
+        ymax = np.maximum(seg["y0"], seg["y1"])
+        x0 = float(xmin.min()) if len(a) else 0.0
+        y0 = float(ymin.min()) if len(a) else 0.0
+        nx = int((xmax.max() - x0) // cell_m) + 1 if len(a) else 1
+        ny = int((ymax.max() - y0) // cell_m) + 1 if len(a) else 1
+        cx0, cx1 = _cell_ranges(xmin - x0, xmax - x0, cell_m, nx)
+        cy0, cy1 = _cell_ranges(ymin - y0, ymax - y0, cell_m, ny)
+        wx, wy = cx1 - cx0 + 1, cy1 - cy0 + 1
+        rows = np.repeat(np.arange(len(a)), wx * wy)
+        j = np.arange(len(rows)) - np.repeat(np.cumsum(wx * wy) - wx * wy, wx * wy)
+        cells = (cy0[rows] + j // wx[rows]) * nx + cx0[rows] + j % wx[rows]
+        order = np.argsort(cells, kind="stable")
+        cell_offsets = np.zeros(nx * ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=nx * ny), out=cell_offsets[1:])
+        return cls(center, cell_m, x0, y0, nx, ny, seg, tracks.flight_ids, cell_offsets,
+                   rows[order].astype(np.int32))
+
+    def __len__(self):
+        return len(self.seg["x0"])
+
+    def save(self, path):
+        arrays = {f"seg_{k}": v for k, v in self.seg.items()}
+        np.savez(path, center=np.array(self.center), grid=np.array([self.cell_m, self.x0, self.y0,
+                                                                    self.nx, self.ny]),
+                 flight_ids=self.flight_ids, cell_offsets=self.cell_offsets,
+                 cell_segments=self.cell_segments, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            cell_m, x0, y0, nx, ny = z["grid"]
+            seg = {k[4:]: z[k] for k in z.files if k.startswith("seg_")}
+            return cls(z["center"], cell_m, x0, y0, nx, ny, seg, z["flight_ids"],
+                       z["cell_offsets"], z["cell_segments"])
+
+    def _cells(self, qx, qy, radius_m):
+        """(query, cell) for the grid cells overlapping the bbox of each query circle."""
+        cx0, cx1 = _cell_ranges(qx - radius_m - self.x0, qx + radius_m - self.x0, self.cell_m, self.nx)
+        cy0, cy1 = _cell_ranges(qy - radius_m - self.y0, qy + radius_m - self.y0, self.cell_m, self.ny)
+        outside = ((qx + radius_m < self.x0) | (qx - radius_m > self.x0 + self.nx * self.cell_m)
+                   | (qy + radius_m < self.y0) | (qy - radius_m > self.y0 + self.ny * self.cell_m))
+        wx, wy = cx1 - cx0 + 1, cy1 - cy0 + 1
+        wx[outside] = 0
+        q = np.repeat(np.arange(len(qx)), wx * wy)
+        j = np.arange(len(q)) - np.repeat(np.cumsum(wx * wy) - wx * wy, wx * wy)
+        return q, (cy0[q] + j // wx[q]) * self.nx + cx0[q] + j % wx[q]
+
+    def candidates(self, qx, qy, radius_m, unique=True):
+        """
+        (query, segment) pairs whose grid cells are within radius of each query
+        point. A segment sits in every cell its bbox touches; unique=False
+        skips removing those repeats (the per-flight reduction absorbs them).
+        """
+        q, cells = self._cells(qx, qy, radius_m)
+        start, end = self.cell_offsets[cells], self.cell_offsets[cells + 1]
+        n = end - start
+        qq = np.repeat(q, n)
+        k = np.arange(len(qq)) - np.repeat(np.cumsum(n) - n, n)
+        segs = self.cell_segments[np.repeat(start, n) + k].astype(np.int64)
+        if not unique:
+            return qq, segs
+        key = np.unique(qq.astype(np.int64) * max(len(self), 1) + segs)
+        return key // max(len(self), 1), key % max(len(self), 1)
+
+    def query_many(self, lon, lat, radius_m, start=None, end=None, max_alt_100ft=None,
+                   max_pairs=MAX_PAIRS):
+        """
+        Closest approach of every flight that passes within radius_m (scalar
+        or one per point) of each point, inside [start, end) and at or below
+        max_alt_100ft. Returns a dict of arrays, one row per (query, flight):
+        query, flight (index into flight_ids), dist_m, ts (datetime64[s]),
+        alt_100ft. Points are processed in batches of about max_pairs
+        candidate segments so thousands of points near the runways stay
+        within memory.
+        """
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        qx, qy = self.proj.forward(lon, lat)
+        radius = np.array(np.broadcast_to(np.asarray(radius_m, dtype=np.float64), qx.shape))
+        q, cells = self._cells(qx, qy, radius)
+        load = np.bincount(q, weights=np.diff(self.cell_offsets)[cells], minlength=len(qx))
+        batch = np.floor(np.cumsum(load) / max(max_pairs, 1)).astype(np.int64)
+        bounds = np.r_[0, np.flatnonzero(np.diff(batch)) + 1, len(qx)]
+        parts = []
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if b > a:
+                r = self._closest(qx[a:b], qy[a:b], radius[a:b], start, end, max_alt_100ft)
+                r["query"] += a
+                parts.append(r)
+        if not parts:
+            parts.append(self._closest(qx, qy, radius, start, end, max_alt_100ft))
+        return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+    def _closest(self, qx, qy, radius, start, end, max_alt_100ft):
+        q, s = self.candidates(qx, qy, radius, unique=False)
+        # cheap rejections on the segment columns before gathering the geometry
+        keep = np.ones(len(s), dtype=bool)
+        if start is not None:
+            keep &= self.seg["t1"][s] >= float(_time_s(np.datetime64(start)))
+        if end is not None:
+            keep &= self.seg["t0"][s] < float(_time_s(np.datetime64(end)))
+        if max_alt_100ft is not None:
+            keep &= np.fmin(self.seg["alt0"][s], self.seg["alt1"][s]) <= max_alt_100ft
+        q, s = q[keep], s[keep]
+
+        # distance to the whole segment is a lower bound for the clipped part
+        x0, y0 = self.seg["x0"][s], self.seg["y0"][s]
+        dx, dy = self.seg["x1"][s] - x0, self.seg["y1"][s] - y0
+        px, py = qx[q] - x0, qy[q] - y0
+        den = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.clip(np.where(den > 0, (px * dx + py * dy) / den, 0.0), 0.0, 1.0)
+        ex, ey = px - u * dx, py - u * dy
+        near = ex * ex + ey * ey <= radius[q] ** 2
+        q, s, u, dx, dy, px, py = q[near], s[near], u[near], dx[near], dy[near], px[near], py[near]
+        g = {k: self.seg[k][s] for k in ("t0", "t1", "alt0", "alt1", "flight")}
+
+        lo = np.zeros(len(s))
+        hi = np.ones(len(s))
+        dt = g["t1"] - g["t0"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if start is not None:
+                ts0 = float(_time_s(np.datetime64(start)))
+                lo = np.maximum(lo, np.where(dt > 0, (ts0 - g["t0"]) / dt, np.where(g["t0"] >= ts0, 0.0, np.inf)))
+            if end is not None:
+                ts1 = float(_time_s(np.datetime64(end)))
+                hi = np.minimum(hi, np.where(dt > 0, (ts1 - g["t0"]) / dt, np.where(g["t0"] < ts1, 1.0, -np.inf)))
+                hi = np.where(g["t0"] + hi * dt >= ts1, np.nextafter(hi, -np.inf), hi)
+            if max_alt_100ft is not None:
+                da = g["alt1"] - g["alt0"]
+                r = (max_alt_100ft - g["alt0"]) / da
+                lo = np.where(da < 0, np.maximum(lo, r), lo)
+                hi = np.where(da > 0, np.minimum(hi, r), hi)
+                flat_bad = (da == 0) & ~(g["alt0"] <= max_alt_100ft)
+                bad = np.isnan(g["alt0"]) | np.isnan(g["alt1"]) | flat_bad
+                hi = np.where(bad, -np.inf, hi)
+        u = np.clip(u, lo, hi)
+        dist = np.hypot(px - u * dx, py - u * dy)
+        near = (hi >= lo) & (dist <= radius[q])
+        q, u, dist = q[near], u[near], dist[near]
+        g = {k: v[near] for k, v in g.items()}
+
+        # keep the closest segment per (query, flight); one float sort key (dist <= radius < span)
+        key = q.astype(np.int64) * len(self.flight_ids) + g["flight"]
+        span = float(radius.max()) + 1.0 if len(radius) else 1.0
+        order = np.argsort(key * span + dist)
+        first = order[np.r_[True, key[order][1:] != key[order][:-1]]] if len(order) else order
+        ts = g["t0"][first] + u[first] * (g["t1"][first] - g["t0"][first])
+        return {"query": q[first], "flight": g["flight"][first].astype(np.int64), "dist_m": dist[first],
+                "ts": (np.round(ts)).astype(np.int64).astype("datetime64[s]"),
+                "alt_100ft": g["alt0"][first] + u[first] * (g["alt1"][first] - g["alt0"][first])}
+
+    def query(self, lon, lat, radius_m, start=None, end=None, max_alt_100ft=None):
+        """Flights within radius_m of one point, closest first: dict of arrays incl. flight_id."""
+        r = self.query_many(lon, lat, radius_m, start, end, max_alt_100ft)
+        order = np.argsort(r["dist_m"], kind="stable")
+        out = {k: v[order] for k, v in r.items() if k != "query"}
+        out["flight_id"] = self.flight_ids[out["flight"]]
+        return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Flights near a point and time from a saved segment index.")
+    ap.add_argument("index", help="<airport>_segments.npz")
+    ap.add_argument("--lon", type=float, required=True)
+    ap.add_argument("--lat", type=float, required=True)
+    ap.add_argument("--radius-m", type=float, default=1000)
+    ap.add_argument("--start", help="e.g. '2013-06-03 17:30' (same clock as the CSV times)")
+    ap.add_argument("--end")
+    ap.add_argument("--max-alt-100ft", type=float)
+    args = ap.parse_args(argv)
+
+    idx = SegmentIndex.load(args.index)
+    t = time.perf_counter()
+    r = idx.query(args.lon, args.lat, args.radius_m, args.start and args.start.replace(" ", "T"),
+                  args.end and args.end.replace(" ", "T"), args.max_alt_100ft)
+    ms = (time.perf_counter() - t) * 1000
+    print(f"{len(r['flight_id'])} flights within {args.radius_m:g} m ({ms:.1f} ms)")
+    print("flight_id, closest_m, time, alt_ft")
+    for fid, d, ts, alt in zip(r["flight_id"], r["dist_m"], r["ts"], r["alt_100ft"]):
+        print(f"{fid}, {d:.0f}, {str(ts).replace('T', ' ')}, {'' if np.isnan(alt) else round(alt * 100)}")
+
+
+if __name__ == "__main__":
+    main()
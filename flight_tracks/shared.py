@@ -0,0 +1,114 @@
+# Decoded columns shared between processes without copies.
+#
+# publish_columns copies a dict of NumPy columns once into a single
+# multiprocessing.shared_memory block (64-byte aligned slices) and returns a
+# handle whose .descriptor is a small picklable dict: block name plus
+# (column, dtype, shape, offset) entries. attach_columns turns a descriptor
+# back into read-only NumPy views on that block in any process, so N parallel
+# variants of a run hold about one copy of the data instead of N.
+#
+# The publishing process owns the block: keep the handle open until the
+# workers are done, then close() it (which also unlinks the block).
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+ALIGN = 64
+
+_attached = {}          # block name -> SharedMemory, kept alive while views exist in this process
+_published = set()      # block names created by this process
+
+
+class SharedColumns:
+    def __init__(self, cols):
+        arrays = {}
+        for k, v in cols.items():
+            v = np.asarray(v)
+            if v.dtype.kind == "O":
+                v = v.astype(str)
+            arrays[k] = np.ascontiguousarray(v)
+        layout, size = [], 0
+        for k, v in arrays.items():
+            size = -(-size // ALIGN) * ALIGN
+            layout.append((k, v.dtype.str, v.shape, size))
+            size += v.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        _published.add(self.shm.name)
+        for (k, dtype, shape, offset) in layout:
+            v = arrays[k]
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)[...] = v
+        self.descriptor = {"name": self.shm.name, "size": size, "columns": layout}
+
+    @property
+    def nbytes(self):
+        return self.descriptor["size"]
+
+    def close(self):
+        """Release and unlink the block (views attached elsewhere stay valid until those processes exit)."""
+        if self.shm is not None:
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def publish_columns(cols):
+    """Copy cols into one shared-memory block; returns a SharedColumns handle (close() when done)."""
+    return SharedColumns(cols)
+
+
+def attach_columns(descriptor):
+    """Read-only zero-copy views of the columns described by a SharedColumns descriptor."""
+    name = descriptor["name"]
+    shm = _attached.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and name not in _published:
+            # Only the publisher may unlink; stop this process's tracker from doing it at exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+        _attached[name] = shm
+    cols = {}
+    for k, dtype, shape, offset in descriptor["columns"]:
+        v = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        v.flags.writeable = False
+        cols[k] = v
+    return cols
+
+
+_worker_cols = None
+
+
+def _init_worker(descriptor):
+    global _worker_cols
+    _worker_cols = attach_columns(descriptor)
+
+
+def _call(fn, args):
+    return fn(_worker_cols, *args)
+
+
+def map_shared(fn, cols, arg_list, workers=None):
+    """
+    [fn(cols, *args) for args in arg_list], run in worker processes that all
+    attach to one shared copy of cols. fn must be a module-level function.
+    """
+    arg_list = list(arg_list)
+    workers = min(workers or os.cpu_count() or 1, max(len(arg_list), 1))
+    if workers == 1:
+        return [fn(cols, *args) for args in arg_list]
+    with publish_columns(cols) as shared:
+        print(f"Shared {shared.nbytes / 1e6:.1f} MB of columns with {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.descriptor,)) as ex:
+            return list(ex.map(_call, [fn] * len(arg_list), arg_list))
@@ -0,0 +1,67 @@
+# Douglas-Peucker simplification of many lines at once.
+#
+# The recursion is run breadth-first over all lines together: every pass
+# takes the open (start, end) vertex ranges of every line, finds the
+# farthest interior vertex of each range with one segmented reduction, keeps
+# it when it is farther than the tolerance and splits the range there. The
+# number of passes is the recursion depth (about log2 of the points per line).
+# Coordinates must be planar (projected meters, or pixels).
+
+import numpy as np
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    den = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / den, 0.0, 1.0)
+    t = np.where(den > 0, t, 0.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def simplify_importance(x, y, offsets, min_tolerance=0.0):
+    """
+    Per-vertex tolerance below which Douglas-Peucker keeps it: a vertex is
+    kept at tolerance t exactly when importance > t (first/last vertex of a
+    line: inf). A vertex's importance is its split distance capped by that of
+    the vertex whose split opened its range, so one run serves every
+    tolerance >= min_tolerance; vertices never split above min_tolerance get 0.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    imp = np.zeros(len(x))
+    counts = np.diff(offsets)
+    has = counts > 0
+    imp[offsets[:-1][has]] = np.inf
+    imp[offsets[1:][has] - 1] = np.inf
+    a = offsets[:-1][counts > 2]
+    b = offsets[1:][counts > 2] - 1
+    cap = np.full(len(a), np.inf)
+    while len(a):
+        n_inner = b - a - 1
+        rid = np.repeat(np.arange(len(a)), n_inner)
+        first = np.cumsum(n_inner) - n_inner
+        idx = a[rid] + 1 + np.arange(len(rid)) - first[rid]
+        d = _segment_distance(x[idx], y[idx], x[a[rid]], y[a[rid]], x[b[rid]], y[b[rid]])
+        order = np.lexsort((-d, rid))
+        best = order[first]                     # farthest interior vertex of each range
+        split = d[best] > min_tolerance
+        m = idx[best][split]
+        imp[m] = np.minimum(d[best][split], cap[split])
+        a, b = np.r_[a[split], m], np.r_[m, b[split]]
+        cap = np.r_[imp[m], imp[m]]
+        wide = b - a > 1
+        a, b, cap = a[wide], b[wide], cap[wide]
+    return imp
+
+
+def simplify_mask(x, y, offsets, tolerance):
+    """Boolean mask of the vertices kept by Douglas-Peucker (first and last vertex of every line kept)."""
+    return simplify_importance(x, y, offsets, tolerance) > tolerance
+
+
+def simplify_lines(x, y, offsets, tolerance):
+    """(kept vertex rows, new offsets) of the simplified lines."""
+    keep = simplify_mask(x, y, offsets, tolerance)
+    rows = np.flatnonzero(keep)
+    new_offsets = np.searchsorted(rows, offsets)
+    return rows, new_offsets
@@ -0,0 +1,158 @@
+# Day-partitioned columnar store for decoded metro CSVs.
+#
+# Layout (one directory per metro):
+#   <store>/<metro>/manifest.json        columns, dtypes, dictionaries, per-day stats
+#   <store>/<metro>/dict_<col>.npy       category values for text columns (flight, dep_aprt, ...)
+#   <store>/<metro>/rejects_<csv>.npz    rejected rows (line numbers + reason bits), see decode.py
+#   <store>/<metro>/day=YYYY-MM-DD/<col>.npy
+#
+# Text columns are stored as int32 codes into their dictionary. Rows inside a
+# day are sorted by flight then ts, so a query only has to merge partitions.
+# Columns are memory-mapped on read, so unused columns never touch the disk.
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .decode import decode_csv
+from .parallel_parse import parse_csv_parallel
+
+MANIFEST = "manifest.json"
+TEXT_COLUMNS = ("flight", "dep_aprt", "arr_aprt")
+
+
+def _day_str(day):
+    return str(np.datetime64(day, "D"))
+
+
+def build_store(csv_paths, store_dir, metro, airports, workers=1):
+    """
+    Decode one or more raw CSVs for a metro and (re)write its store directory.
+    workers > 1 (or None for all cores) parses each CSV in parallel byte ranges.
+    Returns the path of the metro directory.
+    """
+    if isinstance(csv_paths, str):
+        csv_paths = [csv_paths]
+    out_dir = os.path.join(store_dir, metro)
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    parts, rejects = [], {}
+    for p in csv_paths:
+        base = os.path.splitext(os.path.basename(p))[0]
+        reject_path = os.path.join(out_dir, f"rejects_{base}.npz")
+        if workers == 1:
+            cols, report = decode_csv(p, airports, reject_path=reject_path)
+        else:
+            cols, report = parse_csv_parallel(p, airports, workers=workers, reject_path=reject_path)
+        parts.append(cols)
+        rejects[base] = {"rejected": report.rejected, "reasons": report.counts}
+    names = [k for k in parts[0] if all(k in p for p in parts)]
+    cols = {k: np.concatenate([p[k] for p in parts]) for k in names}
+    if len(cols["ts"]) == 0:
+        raise RuntimeError("No rows decoded. Check the CSV column mappings.")
+
+    # Dictionary-encode text columns (sorted, so flight codes sort like flight_id text)
+    dictionaries = {}
+    for name in TEXT_COLUMNS:
+        if name in cols:
+            values, codes = np.unique(cols[name], return_inverse=True)
+            np.save(os.path.join(out_dir, f"dict_{name}.npy"), values)
+            dictionaries[name] = f"dict_{name}.npy"
+            cols[name] = codes.astype(np.int32)
+
+    day = cols["ts"].astype("datetime64[D]")
+    order = np.lexsort((cols["ts"], cols["flight"], day))
+    cols = {k: v[order] for k, v in cols.items()}
+    day = day[order]
+    bounds = np.flatnonzero(np.r_[True, day[1:] != day[:-1], True])
+
+    partitions = []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        name = _day_str(day[a])
+        pdir = os.path.join(out_dir, f"day={name}")
+        os.makedirs(pdir)
+        stats = {}
+        for k, v in cols.items():
+            chunk = v[a:b]
+            np.save(os.path.join(pdir, f"{k}.npy"), chunk)
+            if k == "ts":
+                stats[k] = [str(chunk.min()), str(chunk.max())]
+            elif k not in dictionaries and chunk.dtype.kind == "f" and not np.isnan(chunk).all():
+                stats[k] = [float(np.nanmin(chunk)), float(np.nanmax(chunk))]
+        partitions.append({"day": name, "rows": int(b - a), "stats": stats})
+
+    manifest = {
+        "version": 1,
+        "metro": metro,
+        "airports": list(airports),
+        "sources": [os.path.abspath(p) for p in csv_paths],
+        "columns": {k: str(v.dtype) for k, v in cols.items()},
+        "dictionaries": dictionaries,
+        "rejects": rejects,
+        "partitions": partitions,
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    print(f"Stored {len(day)} rows for {metro} in {len(partitions)} day partitions: {out_dir}")
+    return out_dir
+
+
+class ColumnStore:
+    """Read side of one metro directory written by build_store."""
+
+    def __init__(self, metro_dir):
+        self.path = metro_dir
+        with open(os.path.join(metro_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.airports = self.manifest["airports"]
+        self._dicts = {}
+
+    @property
+    def columns(self):
+        return list(self.manifest["columns"])
+
+    def dictionary(self, name):
+        if name not in self._dicts:
+            self._dicts[name] = np.load(os.path.join(self.path, self.manifest["dictionaries"][name]))
+        return self._dicts[name]
+
+    def partitions(self, start=None, end=None, bounds=None):
+        """
+        Partitions that can hold rows with start <= ts < end and, for each
+        (col, lo, hi) in bounds, lo <= col <= hi (None = unbounded). Pruning uses
+        the per-day min/max stats, so whole days are skipped without reading them.
+        """
+        start = None if start is None else np.datetime64(start, "ns")
+        end = None if end is None else np.datetime64(end, "ns")
+        keep = []
+        for p in self.manifest["partitions"]:
+            day0 = np.datetime64(p["day"], "ns")
+            if start is not None and day0 + np.timedelta64(1, "D") <= start:
+                continue
+            if end is not None and day0 >= end:
+                continue
+            pruned = False
+            for col, lo, hi in bounds or ():
+                st = p["stats"].get(col)
+                if st is None:
+                    # column is all NaN in this day: a range predicate can never match
+                    pruned = True
+                elif (lo is not None and st[1] < lo) or (hi is not None and st[0] > hi):
+                    pruned = True
+            if not pruned:
+                keep.append(p)
+        return keep
+
+    def read(self, columns, partitions):
+        """Concatenate the requested columns over the given partitions (memory-mapped reads)."""
+        out = {}
+        for col in columns:
+            dtype = np.dtype(self.manifest["columns"][col])
+            chunks = [np.load(os.path.join(self.path, f"day={p['day']}", f"{col}.npy"), mmap_mode="r")
+                      for p in partitions]
+            out[col] = np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+        return out
@@ -0,0 +1,61 @@
+# Packed Sort-Tile-Recursive (STR) R-tree over bounding boxes.
+#
+# Leaves are the items in STR order (sorted into vertical slices by x center,
+# each slice sorted by y center); every level above packs node_size
+# consecutive nodes of the level below. Queries are batched: all query boxes
+# descend the tree together as (query, node) pair arrays, so thousands of
+# queries cost a handful of NumPy operations per level.
+
+import math
+
+import numpy as np
+
+
+def _str_order(cx, cy, node_size):
+    n = len(cx)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    n_slices = int(math.ceil(math.sqrt(math.ceil(n / node_size))))
+    per_slice = n_slices * node_size
+    by_x = np.argsort(cx, kind="stable")
+    slice_id = np.empty(n, dtype=np.int64)
+    slice_id[by_x] = np.arange(n) // per_slice
+    return np.lexsort((cy, slice_id))
+
+
+class STRtree:
+    def __init__(self, xmin, ymin, xmax, ymax, node_size=16):
+        xmin, ymin, xmax, ymax = (np.asarray(a, dtype=np.float64) for a in (xmin, ymin, xmax, ymax))
+        self.node_size = node_size
+        self.size = len(xmin)
+        self.order = _str_order((xmin + xmax) / 2, (ymin + ymax) / 2, node_size)
+        level = np.stack([xmin, ymin, xmax, ymax], axis=1)[self.order]
+        # levels[0] = leaves (items in STR order), levels[-1] = root
+        self.levels = [level]
+        while len(level) > 1:
+            groups = np.arange(0, len(level), node_size)
+            level = np.stack([np.minimum.reduceat(level[:, 0], groups), np.minimum.reduceat(level[:, 1], groups),
+                              np.maximum.reduceat(level[:, 2], groups), np.maximum.reduceat(level[:, 3], groups)],
+                             axis=1)
+            self.levels.append(level)
+
+    def query(self, qxmin, qymin, qxmax, qymax):
+        """All (query index, item index) pairs whose boxes intersect (edges touching count)."""
+        q = np.stack([np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (qxmin, qymin, qxmax, qymax)], axis=1)
+        if self.size == 0 or len(q) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        qi = np.arange(len(q))
+        node = np.zeros(len(q), dtype=np.int64)
+        for depth in range(len(self.levels) - 1, -1, -1):
+            box = self.levels[depth][node]
+            hit = ((box[:, 0] <= q[qi, 2]) & (box[:, 2] >= q[qi, 0]) &
+                   (box[:, 1] <= q[qi, 3]) & (box[:, 3] >= q[qi, 1]))
+            qi, node = qi[hit], node[hit]
+            if depth == 0:
+                break
+            n_child = len(self.levels[depth - 1])
+            first = node * self.node_size
+            count = np.minimum(first + self.node_size, n_child) - first
+            qi = np.repeat(qi, count)
+            node = np.repeat(first - np.cumsum(count) + count, count) + np.arange(int(count.sum()))
+        return qi, self.order[node]
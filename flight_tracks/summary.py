@@ -0,0 +1,125 @@
+# Per-flight summary table.
+#
+# One row per flight computed with segmented reductions over the flat point
+# columns (ufunc.reduceat on the Tracks offsets), so no per-flight loop:
+# start/end time, duration, point count, altitude range, path length and the
+# distance from the airport where the track enters and leaves the selection.
+# write_summary puts the table on the track polylines (one record per flight)
+# and as a CSV keyed by flight_id (flight_id + piece for clipped tracks) for
+# joining to the ArcPy PointsToLine output.
+
+import csv
+import os
+
+import numpy as np
+
+from .airports import AIRPORTS, haversine_m
+from .vector_io import write_shapefile
+
+SUMMARY_FIELDS = [
+    ("flight_id", "C", 24, 0),
+    ("piece", "N", 4, 0),         # only for clipped tracks (clip_tracks): flight_id + piece is the key
+    ("start_time", "C", 19, 0),
+    ("end_time", "C", 19, 0),
+    ("duration_s", "N", 9, 0),
+    ("n_points", "N", 9, 0),
+    ("min_alt", "F", 9, 1),       # hundreds of feet
+    ("max_alt", "F", 9, 1),
+    ("length_km", "F", 10, 3),
+    ("entry_km", "F", 9, 3),
+    ("exit_km", "F", 9, 3),
+    ("phase", "C", 16, 0),
+]
+
+
+def _reduceat(ufunc, values, starts, has, fill):
+    out = np.full(len(has), fill, dtype=np.result_type(values.dtype, type(fill)))
+    if len(starts):
+        out[has] = ufunc.reduceat(values, starts)
+    return out
+
+
+def flight_summary(tracks, airport=None):
+    """
+    Dict of per-flight arrays (same order as tracks.flight_ids). Entry/exit
+    distances are to airport (code or (lon, lat)) and use its dist_<CODE>
+    column when the tracks carry one. Clipped tracks (attrs["piece"]) also
+    get a piece column, since a flight that leaves and re-enters the limits
+    then has several rows with the same flight_id.
+    """
+    has = tracks.counts > 0
+    starts = tracks.offsets[:-1][has]
+    ends = tracks.offsets[1:][has] - 1
+    lon, lat = tracks["lon"], tracks["lat"]
+
+    t = tracks["ts"].astype("datetime64[ns]")
+    t_start = np.full(len(tracks), np.datetime64("NaT"), dtype="datetime64[ns]")
+    t_end = t_start.copy()
+    t_start[has], t_end[has] = t[starts], t[ends]   # rows are time-sorted within a flight
+
+    step = np.zeros(len(lon))
+    step[1:] = haversine_m(lon[1:], lat[1:], lon[:-1], lat[:-1])
+    step[starts] = 0.0
+
+    alt = tracks["alt_100ft"].astype(np.float64)
+    summary = {
+        "flight_id": tracks.flight_ids,
+        "start_time": t_start,
+        "end_time": t_end,
+        "duration_s": np.where(has, (t_end - t_start).astype(np.int64) / 1e9, np.nan),
+        "n_points": tracks.counts,
+        "min_alt": _reduceat(np.fmin, alt, starts, has, np.nan),
+        "max_alt": _reduceat(np.fmax, alt, starts, has, np.nan),
+        "length_km": _reduceat(np.add, step, starts, has, 0.0) / 1000.0,
+    }
+
+    if airport is not None:
+        code = airport if isinstance(airport, str) else None
+        if code and f"dist_{code}" in tracks.columns:
+            d_km = tracks[f"dist_{code}"].astype(np.float64)
+        else:
+            lon0, lat0 = AIRPORTS[code] if code else airport
+            d_km = haversine_m(lon, lat, lon0, lat0) / 1000.0
+        entry = np.full(len(tracks), np.nan)
+        exit_ = entry.copy()
+        entry[has], exit_[has] = d_km[starts], d_km[ends]
+        summary["entry_km"], summary["exit_km"] = entry, exit_
+    if "piece" in tracks.attrs:
+        summary["piece"] = np.asarray(tracks.attrs["piece"])
+    if "phase" in tracks.attrs:
+        summary["phase"] = np.asarray(tracks.attrs["phase"])
+    return summary
+
+
+def summary_records(summary):
+    """(fields, records) of a flight_summary dict: the SUMMARY_FIELDS present and one tuple per flight."""
+    fields = [f for f in SUMMARY_FIELDS if f[0] in summary]
+    cols = []
+    for name, ftype, _, dec in fields:
+        v = summary[name]
+        if v.dtype.kind == "M":
+            cols.append([None if np.isnat(x) else str(x.astype("datetime64[s]")).replace("T", " ") for x in v])
+        elif ftype == "N":
+            cols.append([None if np.isnan(x) else int(round(x)) for x in v.astype(np.float64)])
+        elif ftype == "F":
+            cols.append([None if np.isnan(x) else round(x, dec) for x in v.astype(np.float64).tolist()])
+        else:
+            cols.append([str(x) for x in v])
+    return fields, list(zip(*cols))
+
+
+def write_summary(out_base, tracks, summary):
+    """
+    Write <out_base>.shp (one polyline per flight carrying the summary) and
+    <out_base>.csv. Returns (shp_path, csv_path).
+    """
+    fields, records = summary_records(summary)
+    geoms = [[np.column_stack([tracks["lon"][a:b], tracks["lat"][a:b]])]
+             for a, b in zip(tracks.offsets[:-1], tracks.offsets[1:])]
+    shp = write_shapefile(out_base + ".shp", 3, geoms, fields, records)
+    csv_path = os.path.splitext(out_base)[0] + ".csv"
+    with open(csv_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow([fl[0] for fl in fields])
+        w.writerows(records)
+    return shp, csv_path
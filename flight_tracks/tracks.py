@@ -0,0 +1,237 @@
+# Flight-grouped track arrays.
+#
+# A Tracks object keeps every point column as one flat NumPy array, sorted by
+# flight then time, plus an offsets array: the points of flight_ids[i] are
+# rows offsets[i]:offsets[i+1]. This is the in-memory equivalent of the
+# Sort + PointsToLine steps in the ArcPy scripts. Per-flight attributes
+# (phase, period, ...) live in attrs, one entry per flight.
+
+import numpy as np
+
+from .airports import NEAR_AIRPORT_M, haversine_m
+
+PHASES = ("Departure", "Arrival", "Local", "Overflight")
+
+# Cleaning in build_tracks: rows removed per reason end up in Tracks.removed
+CLEAN_REASONS = ("duplicate_ts", "speed_spike", "vrate_spike")
+MAX_GROUND_SPEED_KT = 700.0
+MAX_VERTICAL_RATE_FPM = 10000.0
+MAX_SPIKE_RUN = 3              # longest interior run of bad points removed as one spike
+KT_TO_MPS = 1852.0 / 3600.0
+
+
+class Tracks:
+    def __init__(self, flight_ids, offsets, columns, attrs=None):
+        self.flight_ids = np.asarray(flight_ids)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.columns = dict(columns)
+        self.attrs = dict(attrs or {})
+        self.removed = {}
+        if len(self.offsets) != len(self.flight_ids) + 1:
+            raise ValueError("offsets must have one more entry than flight_ids")
+
+    def __len__(self):
+        return len(self.flight_ids)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def n_points(self):
+        return int(self.offsets[-1])
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def flight_index(self):
+        """Row -> position of its flight in flight_ids (0..len-1) for every point."""
+        return np.repeat(np.arange(len(self.flight_ids)), self.counts)
+
+    def flight(self, i):
+        """Point columns of the i-th flight as a dict of array views."""
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return {k: v[a:b] for k, v in self.columns.items()}
+
+    def __iter__(self):
+        for i, fid in enumerate(self.flight_ids):
+            yield fid, self.flight(i)
+
+    def take(self, flights):
+        """Subset to the flights selected by a boolean mask or index array (order preserved)."""
+        sel = np.arange(len(self.flight_ids))[flights]
+        counts = self.counts[sel]
+        offsets = np.zeros(len(sel) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        rows = np.repeat(self.offsets[sel] - offsets[:-1], counts) + np.arange(offsets[-1])
+        out = Tracks(self.flight_ids[sel], offsets,
+                     {k: v[rows] for k, v in self.columns.items()},
+                     {k: v[sel] for k, v in self.attrs.items()})
+        out.removed = dict(self.removed)
+        return out
+
+
+def _spikes(flight, lon, lat, ts, alt, max_speed_mps, max_vrate_fps, max_run=MAX_SPIKE_RUN):
+    """
+    Spikes: a point whose segments in and out both exceed a limit (or, at a
+    flight end, whose only segment does while the next one is fine), and
+    interior runs of 2..max_run points entered and left by segments over the
+    limit when the segment bridging the run is within it and the points
+    either side of the run are good. Longer runs, and runs of more than one
+    point at a flight end, are kept. Returns (speed_mask, vrate_mask) over
+    the rows.
+    """
+    n = len(flight)
+    speed = np.zeros(n, dtype=bool)
+    vrate = np.zeros(n, dtype=bool)
+    if n < 2:
+        return speed, vrate
+    same = flight[1:] == flight[:-1]
+    t = ts.astype("datetime64[ns]").astype(np.int64) / 1e9
+
+    def rate(i, j, kind):
+        dt = t[j] - t[i]
+        dt = np.where(dt > 0, dt, np.nan)
+        if kind == "speed":
+            return haversine_m(lon[j], lat[j], lon[i], lat[i]) / dt
+        return np.abs(alt[j] - alt[i]).astype(np.float64) * 100.0 / dt
+
+    def flagged(kind, limit):
+        rows = np.arange(n - 1)
+        with np.errstate(invalid="ignore"):
+            bad_seg = same & (rate(rows, rows + 1, kind) > limit)
+            out = _bad_points(bad_seg, same)
+            b = np.flatnonzero(bad_seg)
+            k, m = b[:-1], b[1:]                   # run = rows k+1..m between two bad segments
+            cand = (m - k >= 2) & (m - k <= max_run) & (flight[k] == flight[m + 1])
+            k, m = k[cand], m[cand]
+            bridge_ok = rate(k, m + 1, kind) <= limit
+        # left to right, so a run sharing a bad segment with an earlier run (or
+        # ending on a single-point spike) is not taken: both rows bounding a
+        # run must be good points
+        for a, b in zip(k[bridge_ok].tolist(), m[bridge_ok].tolist()):
+            if not out[a] and not out[b + 1]:
+                out[a + 1:b + 1] = True
+        return out
+
+    if max_speed_mps is not None:
+        speed = flagged("speed", max_speed_mps)
+    if max_vrate_fps is not None and alt is not None:
+        vrate = flagged("vrate", max_vrate_fps) & ~speed
+    return speed, vrate
+
+
+def _bad_points(bad_seg, same):
+    """Rows flagged from per-segment flags (segment k joins rows k and k+1)."""
+    before = np.r_[False, bad_seg]                 # segment into the row
+    after = np.r_[bad_seg, False]                  # segment out of the row
+    has_before = np.r_[False, same]
+    has_after = np.r_[same, False]
+    ok_next = np.r_[~bad_seg[1:] & same[1:], False, False]    # segment out of the next row is fine
+    ok_prev = np.r_[False, False, ~bad_seg[:-1] & same[:-1]]  # segment into the previous row is fine
+    interior = before & after
+    first = ~has_before & after & ok_next
+    last = before & ~has_after & ok_prev
+    return interior | first | last
+
+
+def build_tracks(flight, columns, min_points=1, clean=False,
+                 max_speed_kt=MAX_GROUND_SPEED_KT, max_vrate_fpm=MAX_VERTICAL_RATE_FPM):
+    """
+    Group point columns into Tracks: sort by flight then ts (stable), find the
+    flight boundaries. Flights with fewer than min_points points are dropped
+    (PointsToLine needs at least 2 to make a line).
+
+    With clean=True, repeated (flight, ts) rows keep their first occurrence and
+    ground-speed / vertical-rate spikes are dropped: single points, and
+    interior runs of up to MAX_SPIKE_RUN points (see _spikes). The number of
+    rows removed per CLEAN_REASONS entry is left in tracks.removed.
+    """
+    flight = np.asarray(flight)
+    if "ts" in columns:
+        order = np.lexsort((columns["ts"], flight))
+    else:
+        order = np.argsort(flight, kind="stable")
+    flight = flight[order]
+    columns = {k: np.asarray(v)[order] for k, v in columns.items()}
+
+    removed = {}
+    if clean and "ts" in columns:
+        ts = columns["ts"]
+        dup = np.r_[False, (flight[1:] == flight[:-1]) & (ts[1:] == ts[:-1])]
+        keep = ~dup
+        flight = flight[keep]
+        columns = {k: v[keep] for k, v in columns.items()}
+        speed, vrate = _spikes(flight, columns["lon"], columns["lat"], columns["ts"],
+                               columns.get("alt_100ft"),
+                               None if max_speed_kt is None else max_speed_kt * KT_TO_MPS,
+                               None if max_vrate_fpm is None else max_vrate_fpm / 60.0)
+        keep = ~(speed | vrate)
+        flight = flight[keep]
+        columns = {k: v[keep] for k, v in columns.items()}
+        removed = dict(zip(CLEAN_REASONS, (int(dup.sum()), int(speed.sum()), int(vrate.sum()))))
+
+    if len(flight):
+        starts = np.flatnonzero(np.r_[True, flight[1:] != flight[:-1]])
+    else:
+        starts = np.zeros(0, dtype=np.int64)
+    offsets = np.r_[starts, len(flight)].astype(np.int64)
+    tracks = Tracks(flight[starts], offsets, columns)
+    if min_points > 1:
+        tracks = tracks.take(tracks.counts >= min_points)
+    tracks.removed = removed
+    return tracks
+
+
+def classify_phase(tracks, center, radius_m=NEAR_AIRPORT_M):
+    """
+    Same rule as the ArcPy codeblock: start near the airport only -> Departure,
+    end near only -> Arrival, both -> Local, neither -> Overflight.
+    Returns an array of phase strings, one per flight.
+    """
+    if len(tracks) == 0:
+        return np.zeros(0, dtype="<U10")
+    lon0, lat0 = center
+    first = tracks.offsets[:-1]
+    last = tracks.offsets[1:] - 1
+    lon, lat = tracks["lon"], tracks["lat"]
+    ns = haversine_m(lon[first], lat[first], lon0, lat0) <= radius_m
+    ne = haversine_m(lon[last], lat[last], lon0, lat0) <= radius_m
+    phase = np.full(len(tracks), "Overflight", dtype="<U10")
+    phase[ns & ~ne] = "Departure"
+    phase[ne & ~ns] = "Arrival"
+    phase[ns & ne] = "Local"
+    return phase
+
+
+def _self_check(n=12):
+    """Synthetic spike cases through _spikes; returns {case: (speed rows, vrate rows)}."""
+    cases = {                                  # name: (lat spike rows, alt spike rows, speed, vrate)
+        "single": ([6], [], [6], []),
+        "run_2": ([4, 5], [], [4, 5], []),
+        "run_3": ([4, 5, 6], [], [4, 5, 6], []),
+        "run_5_kept": ([3, 4, 5, 6, 7], [], [], []),
+        "two_spikes": ([4, 5, 9], [], [4, 5, 9], []),
+        "end_point": ([11], [], [11], []),
+        "climb_run_2": ([], [4, 5], [], [4, 5]),
+    }
+    flight = np.zeros(n, dtype=np.int64)
+    ts = np.datetime64("2013-06-03T12:00:00", "s") + np.arange(n).astype("timedelta64[s]") * 10
+    lon = np.full(n, -71.0)
+    got = {}
+    for name, (lat_rows, alt_rows, want_speed, want_vrate) in cases.items():
+        lat = 42.0 + 0.0005 * np.arange(n)
+        lat[lat_rows] += 0.5
+        alt = np.full(n, 30.0, dtype=np.float32)
+        alt[alt_rows] += 50.0
+        speed, vrate = _spikes(flight, lon, lat, ts, alt, MAX_GROUND_SPEED_KT * KT_TO_MPS,
+                               MAX_VERTICAL_RATE_FPM / 60.0)
+        got[name] = (np.flatnonzero(speed).tolist(), np.flatnonzero(vrate).tolist())
+        assert got[name] == (want_speed, want_vrate), f"{name}: flagged {got[name]}"
+    return got
+
+
+if __name__ == "__main__":
+    for name, (speed, vrate) in _self_check().items():
+        print(f"{name:<12} speed {speed}  vrate {vrate}")
+    print("Spike cleaning OK.")
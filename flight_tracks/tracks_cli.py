@@ -0,0 +1,322 @@
+# Command-line track builder without a module-level arcpy import.
+#
+# Does what the *_tracks.py / *_shapefile_*.py scripts do (read the CSV, keep
+# rows within the distance / altitude limits, sort into per-flight lines,
+# classify Departure / Arrival / Local / Overflight against the 3 nm circle)
+# with the flight_tracks package, then writes the tracks with one of two
+# backends:
+#   shapefile  pure Python .shp/.dbf (default, no ArcGIS needed)
+#   arcpy      polyline feature class in a file geodatabase; arcpy is
+#              imported only here, when this backend is chosen. The CSV is
+#              then streamed through the read -> parse -> insertRow pipeline
+#              (pipeline.py) into a <name>_pts point feature class, like step
+#              2 of the ArcPy scripts, while the tracks are built from the
+#              same batches
+#   geoparquet GeoParquet lines (<name>.parquet) and points
+#              (<name>_points.parquet); needs pyarrow
+#   flatgeobuf one indexed .fgb file
+#
+#   python -m flight_tracks.tracks_cli Boston_first_28_days.csv --metro Boston --max-km 30 --out out
+#   python -m flight_tracks.tracks_cli Boston_first_28_days.csv --metro Boston --dry-run
+#   python -m flight_tracks.tracks_cli Boston_first_28_days.csv --metro Boston --benchmark-startup 5
+#
+# --dry-run only reads the header and counts records: it checks that the
+# columns resolve and reports the row count, with no pandas or arcpy import.
+
+import argparse
+import csv
+import datetime
+import os
+import subprocess
+import sys
+import time
+
+from .airports import AIRPORTS, NEAR_AIRPORT_M, metro_airports
+
+BACKENDS = ("shapefile", "arcpy", "geoparquet", "flatgeobuf")
+SMOOTH_TOL_M = 200            # PAEK tolerance of the ArcPy scripts' SmoothLine step (0/None = off)
+# point feature class field -> decoded column, as in step 2 of the ArcPy scripts
+POINT_FIELDS = {"flight_id": "flight", "ts": "ts", "lat": "lat", "lon": "lon", "alt_100ft": "alt_100ft"}
+COUNT_BLOCK = 16 * 1024 * 1024
+
+
+def count_records(path):
+    """Data rows in a CSV: newline count when the file has no quotes, a csv.reader pass otherwise."""
+    newlines = quotes = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        f.readline()
+        while True:
+            block = f.read(COUNT_BLOCK)
+            if not block:
+                break
+            newlines += block.count(b"\n")
+            quotes += block.count(b'"')
+            last = block[-1:]
+    if quotes == 0:
+        return newlines + (last != b"\n")
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def validate(csv_path, airports):
+    """Resolve the columns from the header and count rows. Returns (resolved, n_rows)."""
+    from .decode import resolve_columns
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f), [])
+    resolved = resolve_columns(header, airports)
+    print("Resolved columns:", ", ".join(f"{k}={v}" for k, v in resolved.items()))
+    n = count_records(csv_path)
+    print(f"{n} data rows, {os.path.getsize(csv_path) / 1e6:.1f} MB")
+    return resolved, n
+
+
+def decode(csv_path, airports, workers=1):
+    """Typed columns of csv_path (parallel parse when workers != 1)."""
+    if workers == 1:
+        from .decode import decode_csv
+        cols, _ = decode_csv(csv_path, airports)
+    else:
+        from .parallel_parse import parse_csv_parallel
+        cols, _ = parse_csv_parallel(csv_path, airports, workers=workers)
+    return cols
+
+
+def _limits(airport, max_km=None, max_alt_100ft=None):
+    """batch_filter for run_pipeline: the distance / altitude limits, applied in the parser threads."""
+    def keep_rows(cols):
+        keep = None
+        if max_km is not None:
+            keep = cols[f"dist_{airport}"] <= max_km
+        if max_alt_100ft is not None:
+            below = cols["alt_100ft"] <= max_alt_100ft
+            keep = below if keep is None else keep & below
+        return cols if keep is None else {k: v[keep] for k, v in cols.items()}
+    return keep_rows
+
+
+def decode_pipeline(csv_path, airport, max_km=None, max_alt_100ft=None, workers=2, point_fc=None):
+    """
+    Typed columns of csv_path within the limits, read, parsed and collected by
+    overlapping stages (run_pipeline prints the per-stage busy / blocked
+    report). With point_fc the same batches are inserted into that point
+    feature class (see create_points_fc).
+    """
+    from .pipeline import ArcpyPointSink, MemorySink, TeeSink, run_pipeline
+    mem = MemorySink()
+    sink = mem
+    if point_fc is not None:
+        points = ArcpyPointSink(point_fc, POINT_FIELDS)
+        sink = TeeSink(mem, points)
+    run_pipeline(csv_path, [airport], sink, batch_filter=_limits(airport, max_km, max_alt_100ft),
+                 parse_workers=max(1, workers or os.cpu_count() or 1))
+    if point_fc is not None:
+        print(f"Loaded {points.inserted} points into {point_fc}")
+    return mem.columns()
+
+
+def tracks_from_columns(cols, airport, max_km=None, max_alt_100ft=None, phase=None, clean=True):
+    """Filter, build and classify: Tracks with attrs["phase"]."""
+    import numpy as np
+    from .tracks import PHASES, build_tracks, classify_phase
+    keep = np.ones(len(cols["ts"]), dtype=bool)
+    if max_km is not None:
+        if f"dist_{airport}" not in cols:
+            raise KeyError(f"No distance column for {airport}")
+        keep &= cols[f"dist_{airport}"] <= max_km
+    if max_alt_100ft is not None:
+        keep &= cols["alt_100ft"] <= max_alt_100ft
+    sub = {k: v[keep] for k, v in cols.items() if k != "flight"}
+    tracks = build_tracks(cols["flight"][keep], sub, min_points=2, clean=clean)
+    tracks.attrs["phase"] = classify_phase(tracks, AIRPORTS[airport], NEAR_AIRPORT_M)
+    if phase is not None:
+        if phase not in PHASES:
+            raise ValueError(f"phase must be one of {PHASES}")
+        tracks = tracks.take(tracks.attrs["phase"] == phase)
+    return tracks
+
+
+def build(csv_path, airport, max_km=None, max_alt_100ft=None, phase=None, clean=True, workers=1,
+          pipeline=False, point_fc=None):
+    """
+    Decode, filter, build and classify: Tracks with attrs["phase"]. pipeline
+    (or point_fc) decodes through decode_pipeline instead of in one pass.
+    """
+    if pipeline or point_fc is not None:
+        cols = decode_pipeline(csv_path, airport, max_km, max_alt_100ft, workers, point_fc)
+    else:
+        cols = decode(csv_path, [airport], workers)
+    return tracks_from_columns(cols, airport, max_km, max_alt_100ft, phase, clean)
+
+
+def create_points_fc(gdb_path, name):
+    """Empty point feature class gdb_path/name with the POINT_FIELDS (WGS 1984)."""
+    import arcpy
+    arcpy.env.overwriteOutput = True
+    if not arcpy.Exists(gdb_path):
+        arcpy.management.CreateFileGDB(os.path.dirname(gdb_path), os.path.basename(gdb_path))
+    fc = os.path.join(gdb_path, name)
+    if arcpy.Exists(fc):
+        arcpy.management.Delete(fc)
+    arcpy.management.CreateFeatureclass(gdb_path, name, "POINT", spatial_reference=arcpy.SpatialReference(4326))
+    arcpy.management.AddField(fc, "flight_id", "TEXT", field_length=64)
+    arcpy.management.AddField(fc, "ts", "DATE")
+    for field in ("lat", "lon", "alt_100ft"):
+        arcpy.management.AddField(fc, field, "DOUBLE")
+    return fc
+
+
+def write_arcpy(gdb_path, name, tracks, summary, smooth_tol_m=SMOOTH_TOL_M):
+    """
+    Polyline feature class gdb_path/name with the summary fields (WGS 1984).
+    With smooth_tol_m, also runs the scripts' PAEK SmoothLine step into
+    <name>_smooth and returns that feature class instead.
+    """
+    import arcpy
+    from .summary import summary_records
+    arcpy.env.overwriteOutput = True
+    if not arcpy.Exists(gdb_path):
+        arcpy.management.CreateFileGDB(os.path.dirname(gdb_path), os.path.basename(gdb_path))
+    sr = arcpy.SpatialReference(4326)
+    fc = os.path.join(gdb_path, name)
+    if arcpy.Exists(fc):
+        arcpy.management.Delete(fc)
+    arcpy.management.CreateFeatureclass(gdb_path, name, "POLYLINE", spatial_reference=sr)
+    fields, records = summary_records(summary)
+    types = {"C": "TEXT", "N": "LONG", "F": "DOUBLE"}
+    for fname, ftype, flen, _ in fields:
+        arcpy.management.AddField(fc, fname, types[ftype], field_length=flen if ftype == "C" else None)
+    lon, lat = tracks["lon"], tracks["lat"]
+    with arcpy.da.InsertCursor(fc, [f[0] for f in fields] + ["SHAPE@"]) as cur:
+        for i, rec in enumerate(records):
+            a, b = tracks.offsets[i], tracks.offsets[i + 1]
+            pts = arcpy.Array([arcpy.Point(x, y) for x, y in zip(lon[a:b].tolist(), lat[a:b].tolist())])
+            cur.insertRow(tuple(rec) + (arcpy.Polyline(pts, sr),))
+    if not smooth_tol_m:
+        return fc
+    smooth = fc + "_smooth"
+    if arcpy.Exists(smooth):
+        arcpy.management.Delete(smooth)
+    arcpy.cartography.SmoothLine(fc, smooth, "PAEK", f"{smooth_tol_m} Meters", "FIXED_CLOSED_ENDPOINT", "NO_CHECK")
+    return smooth
+
+
+def write_tracks(tracks, airport, out, backend="shapefile", phase=None, smooth_tol_m=SMOOTH_TOL_M):
+    """Write tracks with their per-flight summary; returns the output path (smoothing: arcpy only)."""
+    from .summary import flight_summary, write_summary
+    summary = flight_summary(tracks, airport)
+    name = f"{airport.lower()}_tracks" + (f"_{phase.lower()}" if phase else "")
+    if backend == "arcpy":
+        return write_arcpy(out, name, tracks, summary, smooth_tol_m)
+    os.makedirs(out, exist_ok=True)
+    if backend == "geoparquet":
+        from .geoparquet import write_geoparquet, write_geoparquet_points
+        path = os.path.join(out, name + ".parquet")
+        write_geoparquet(path, tracks)
+        write_geoparquet_points(os.path.join(out, name + "_points.parquet"), tracks)
+        return path
+    if backend == "flatgeobuf":
+        from .flatgeobuf import write_flatgeobuf
+        path = os.path.join(out, name + ".fgb")
+        write_flatgeobuf(path, tracks, summary)
+        return path
+    return write_summary(os.path.join(out, name), tracks, summary)[0]
+
+
+def run(csv_path, airport, out, backend="shapefile", max_km=None, max_alt_100ft=None, phase=None,
+        clean=True, workers=1, lods=None, scale=None, index=False, pipeline=False, smooth_tol_m=SMOOTH_TOL_M):
+    """
+    Build and write tracks. lods: tolerances (m) to store as <name>_lods.npz
+    next to the output; scale: export the level of detail for a 1:scale map;
+    index: store the segment index as <name>_segments.npz next to the output;
+    pipeline: decode with the overlapped reader/parser/writer stages (always
+    on for the arcpy backend, which also loads the points into <name>_pts);
+    smooth_tol_m: PAEK tolerance for the arcpy backend's smoothed lines.
+    """
+    base = f"{airport.lower()}_tracks" + (f"_{phase.lower()}" if phase else "")
+    point_fc = create_points_fc(out, base + "_pts") if backend == "arcpy" else None
+    tracks = build(csv_path, airport, max_km, max_alt_100ft, phase, clean, workers, pipeline, point_fc)
+    by_phase = ", ".join(f"{p}={int((tracks.attrs['phase'] == p).sum())}" for p in sorted(set(tracks.attrs["phase"])))
+    print(f"{len(tracks)} flights, {tracks.n_points} points ({by_phase})")
+    if tracks.removed:
+        from .tracks import CLEAN_REASONS
+        print("Cleaned rows: " + ", ".join(f"{r}={tracks.removed[r]}" for r in CLEAN_REASONS))
+    folder = os.path.dirname(out) if backend == "arcpy" else out
+    if index:
+        from .segment_index import SegmentIndex
+        os.makedirs(folder, exist_ok=True)
+        idx = SegmentIndex.build(tracks, AIRPORTS[airport])
+        print(f"Segment index ({len(idx)} segments): {idx.save(os.path.join(folder, base + '_segments.npz'))}")
+    if lods or scale:
+        from .lod import LOD_TOLERANCES_M, TrackLODs
+        levels = TrackLODs.build(tracks, lods or LOD_TOLERANCES_M, AIRPORTS[airport])
+        print("LOD vertices (full, " + ", ".join(f"{t:g} m" for t in levels.tolerances) + "): "
+              + ", ".join(str(n) for n in levels.vertex_counts()))
+        if lods:
+            os.makedirs(folder, exist_ok=True)
+            print(f"LODs: {levels.save(os.path.join(folder, base + '_lods.npz'))}")
+        if scale:
+            tracks = levels.for_scale(scale)
+    path = write_tracks(tracks, airport, out, backend, phase, smooth_tol_m)
+    print(f"Tracks: {path}")
+    return path
+
+
+def benchmark_startup(argv, repeats=5):
+    """Wall time of `python -m flight_tracks.tracks_cli <argv> --dry-run` in fresh processes."""
+    cmd = [sys.executable, "-m", "flight_tracks.tracks_cli"] + list(argv) + ["--dry-run"]
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t)
+    times.sort()
+    print(f"--dry-run startup over {repeats} runs: min {times[0]:.3f} s, "
+          f"median {times[len(times) // 2]:.3f} s, max {times[-1]:.3f} s")
+    return times
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build classified flight tracks from a raw metro CSV.")
+    ap.add_argument("csv")
+    ap.add_argument("--metro", required=True, help="Boston, Seattle, Phoenix or NorCal")
+    ap.add_argument("--airport", help="airport code (default: the metro's first airport)")
+    ap.add_argument("--out", help="output folder (shapefile) or .gdb path (arcpy); default next to the CSV")
+    ap.add_argument("--backend", choices=BACKENDS, default="shapefile")
+    ap.add_argument("--max-km", type=float)
+    ap.add_argument("--max-alt-100ft", type=float)
+    ap.add_argument("--phase", help="keep only Departure, Arrival, Local or Overflight")
+    ap.add_argument("--no-clean", action="store_true", help="keep duplicate timestamps and speed/climb spikes")
+    ap.add_argument("--workers", type=int, default=1, help="CSV parser processes (0 = all cores)")
+    ap.add_argument("--pipeline", action="store_true",
+                    help="overlap reading and parsing (parser threads = --workers) and report the bottleneck stage")
+    ap.add_argument("--lods", help="store levels of detail, e.g. 10,50,250 (meters)")
+    ap.add_argument("--scale", type=float, help="export the level of detail for a 1:SCALE map")
+    ap.add_argument("--smooth-m", type=float, default=SMOOTH_TOL_M,
+                    help="PAEK smoothing tolerance for the arcpy backend, as in the ArcPy scripts (0 = off)")
+    ap.add_argument("--index", action="store_true", help="store a segment index for point/time queries")
+    ap.add_argument("--dry-run", action="store_true", help="check the header and count rows only")
+    ap.add_argument("--benchmark-startup", type=int, metavar="N",
+                    help="time N fresh --dry-run processes and exit")
+    args = ap.parse_args(argv)
+
+    if args.benchmark_startup:
+        benchmark_startup([args.csv, "--metro", args.metro] + (["--airport", args.airport] if args.airport else []),
+                          args.benchmark_startup)
+        return
+    airport = args.airport or metro_airports(args.metro)[0]
+    if args.dry_run:
+        t = time.perf_counter()
+        validate(args.csv, [airport])
+        print(f"Validated in {time.perf_counter() - t:.3f} s; arcpy loaded: {'arcpy' in sys.modules}")
+        return
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    default = os.path.join(os.path.dirname(os.path.abspath(args.csv)), f"tracks_{args.metro}_{stamp}")
+    out = args.out or (default + ".gdb" if args.backend == "arcpy" else default)
+    run(args.csv, airport, out, args.backend, args.max_km, args.max_alt_100ft, args.phase,
+        not args.no_clean, args.workers or None,
+        [float(t) for t in args.lods.split(",")] if args.lods else None, args.scale, args.index, args.pipeline, args.smooth_m)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Per-polygon overflight counts (census tracts, counties, municipalities, ...).
+#
+# A flight touches a polygon when one of its points lies inside it or one of
+# its segments crosses its boundary. Because a track is continuous, it is
+# enough to test containment for a few "entry" points per flight (its first
+# point and the first point after each altitude-band change) and to find every
+# segment/boundary-edge crossing; together they give every (flight, polygon,
+# band) a flight enters. Both steps go through packed STR-trees (feature
+# boxes for containment, boundary edges for crossings), so the cost grows with
+# the number of candidate pairs, not segments x polygons.
+#
+# Geometry is tested planar in lon/lat degrees, which is exact enough at
+# tract scale.
+
+import csv
+
+import numpy as np
+
+from .strtree import STRtree
+from .tracks import PHASES
+
+# altitude band edges in units of 100 ft (altitudex100ft), last band open-ended
+ALT_BANDS_100FT = (0, 30, 50, 100, 180)
+
+
+def band_labels(edges):
+    labels = []
+    for lo, hi in zip(edges, list(edges[1:]) + [None]):
+        labels.append(f"{int(lo * 100)}ft+" if hi is None else f"{int(lo * 100)}-{int(hi * 100)}ft")
+    return labels
+
+
+class PolygonCounts:
+    """counts[polygon, phase, band] = distinct flights; flights[polygon] = distinct flights overall."""
+
+    def __init__(self, labels, phases, bands, counts, flights):
+        self.labels = labels
+        self.phases = phases
+        self.bands = bands
+        self.counts = counts
+        self.flights = flights
+
+    def write_csv(self, path, label_field="polygon"):
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow([label_field, "flights"] + [f"{p}_{b}" for p in self.phases for b in self.bands])
+            for i, lab in enumerate(self.labels):
+                w.writerow([lab, int(self.flights[i])] + self.counts[i].ravel().astype(int).tolist())
+        return path
+
+
+def _points_in_polygons(px, py, layer, tree, edges):
+    """(point index, feature index) for points inside features (even-odd rule)."""
+    qi, feat = tree.query(px, py, px, py)
+    ex0, ey0, ex1, ey1, eown = edges
+    order = np.argsort(eown, kind="stable")
+    starts = np.searchsorted(eown[order], np.arange(len(layer) + 1))
+    out_p, out_f = [], []
+    for f in np.unique(feat):
+        pts = qi[feat == f]
+        e = order[starts[f]:starts[f + 1]]
+        inside = np.zeros(len(pts), dtype=bool)
+        for a in range(0, len(e), 256):          # chunk edges to bound the points x edges matrix
+            ee = e[a:a + 256]
+            y0, y1 = ey0[ee][None, :], ey1[ee][None, :]
+            x0, x1 = ex0[ee][None, :], ex1[ee][None, :]
+            yp, xp = py[pts][:, None], px[pts][:, None]
+            straddle = (y0 > yp) != (y1 > yp)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xc = x0 + (yp - y0) * (x1 - x0) / (y1 - y0)
+            inside ^= (np.count_nonzero(straddle & (xp < xc), axis=1) % 2).astype(bool)
+        out_p.append(pts[inside])
+        out_f.append(np.full(int(inside.sum()), f, dtype=np.int64))
+    if not out_p:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(out_p), np.concatenate(out_f)
+
+
+def _orient(ax, ay, bx, by, cx, cy):
+    return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+
+def _segments_crossing(sx0, sy0, sx1, sy1, edge_tree, edges):
+    """(segment index, feature index) for segments that intersect a boundary edge."""
+    ex0, ey0, ex1, ey1, eown = edges
+    si, ei = edge_tree.query(np.minimum(sx0, sx1), np.minimum(sy0, sy1),
+                             np.maximum(sx0, sx1), np.maximum(sy0, sy1))
+    ax, ay, bx, by = sx0[si], sy0[si], sx1[si], sy1[si]
+    cx, cy, dx, dy = ex0[ei], ey0[ei], ex1[ei], ey1[ei]
+    hit = ((_orient(ax, ay, bx, by, cx, cy) * _orient(ax, ay, bx, by, dx, dy) <= 0) &
+           (_orient(cx, cy, dx, dy, ax, ay) * _orient(cx, cy, dx, dy, bx, by) <= 0))
+    return si[hit], eown[ei[hit]]
+
+
+def polygon_overflights(tracks, layer, band_edges=ALT_BANDS_100FT, label_fields=("GEOID", "NAME"),
+                        chunk_segments=500_000):
+    """
+    Distinct flights per polygon of layer, by phase (tracks.attrs["phase"], or
+    "All" when absent) and altitude band. A segment's band is that of its lower
+    endpoint. Returns PolygonCounts.
+    """
+    xmin, ymin, xmax, ymax = layer.bounds()
+    feat_tree = STRtree(xmin, ymin, xmax, ymax)
+    edges = layer.edges()
+    edge_tree = STRtree(np.minimum(edges[0], edges[2]), np.minimum(edges[1], edges[3]),
+                        np.maximum(edges[0], edges[2]), np.maximum(edges[1], edges[3]))
+
+    lon, lat = tracks["lon"], tracks["lat"]
+    alt = np.nan_to_num(tracks["alt_100ft"].astype(np.float64), nan=0.0)
+    band = np.clip(np.searchsorted(np.asarray(band_edges), alt, side="right") - 1, 0, len(band_edges) - 1)
+    flight = tracks.flight_index()
+    phases = list(PHASES) if "phase" in tracks.attrs else ["All"]
+    if "phase" in tracks.attrs:
+        phase_idx = np.array([PHASES.index(p) for p in tracks.attrs["phase"]], dtype=np.int64)
+    else:
+        phase_idx = np.zeros(len(tracks), dtype=np.int64)
+
+    # 1) entry points: first point of each flight and first point after a band change
+    entry = np.zeros(len(lon), dtype=bool)
+    entry[tracks.offsets[:-1][tracks.counts > 0]] = True
+    entry[1:] |= band[1:] != band[:-1]
+    ep = np.flatnonzero(entry)
+    pi, pf = _points_in_polygons(lon[ep], lat[ep], layer, feat_tree, edges)
+    keys = [(flight[ep[pi]] * len(layer) + pf) * len(band_edges) + band[ep[pi]]]
+
+    # 2) boundary crossings, segment by segment in chunks
+    seg = np.ones(len(lon), dtype=bool)
+    seg[tracks.offsets[1:] - 1] = False
+    seg = np.flatnonzero(seg[:len(lon)])
+    for a in range(0, len(seg), chunk_segments):
+        s = seg[a:a + chunk_segments]
+        si, sf = _segments_crossing(lon[s], lat[s], lon[s + 1], lat[s + 1], edge_tree, edges)
+        s_band = np.minimum(band[s[si]], band[s[si] + 1])
+        keys.append((flight[s[si]] * len(layer) + sf) * len(band_edges) + s_band)
+
+    keys = np.unique(np.concatenate(keys))
+    b = keys % len(band_edges)
+    fp = keys // len(band_edges)
+    poly = fp % len(layer)
+    fl = fp // len(layer)
+    counts = np.zeros((len(layer), len(phases), len(band_edges)), dtype=np.int64)
+    np.add.at(counts, (poly, phase_idx[fl], b), 1)
+    flights = np.bincount(np.unique(fp) % len(layer), minlength=len(layer))
+    return PolygonCounts(layer.label(*label_fields), phases, band_labels(band_edges), counts, flights)
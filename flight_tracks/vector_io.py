@@ -0,0 +1,322 @@
+# Minimal vector I/O without ArcGIS, GDAL or R.
+#
+# Readers: polygon and point layers from ESRI shapefiles and GeoPackages. A
+# polygon layer comes back as a list of features, each a list of rings
+# (float64 arrays of shape (k, 2), lon/lat), plus one attribute dict per
+# feature. Rings keep their file orientation; callers use the even-odd rule,
+# so holes and multipart features need no special handling.
+#
+# Writer: write_shapefile streams point / polyline / polygon features with a
+# .dbf, .shx and a WGS 1984 .prj in one pass.
+
+import datetime
+import os
+import sqlite3
+import struct
+
+import numpy as np
+
+SHP_POLYGON_TYPES = (5, 15, 25)   # Polygon, PolygonZ, PolygonM
+SHP_POINT_TYPES = (1, 11, 21)     # Point, PointZ, PointM
+
+WGS84_PRJ = ('GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+             'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]')
+
+
+class PolygonLayer:
+    def __init__(self, features, attrs, source=""):
+        self.features = features
+        self.attrs = attrs
+        self.source = source
+
+    def __len__(self):
+        return len(self.features)
+
+    def bounds(self):
+        """(xmin, ymin, xmax, ymax) arrays, one entry per feature."""
+        b = np.array([[min(r[:, 0].min() for r in f), min(r[:, 1].min() for r in f),
+                       max(r[:, 0].max() for r in f), max(r[:, 1].max() for r in f)]
+                      if f else [np.nan] * 4 for f in self.features]).reshape(-1, 4)
+        return b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+
+    def edges(self):
+        """All ring edges as (x0, y0, x1, y1, feature index) arrays; rings are closed if needed."""
+        parts, owner = [], []
+        for i, f in enumerate(self.features):
+            for r in f:
+                if len(r) < 2:
+                    continue
+                if not np.array_equal(r[0], r[-1]):
+                    r = np.vstack([r, r[:1]])
+                parts.append(np.hstack([r[:-1], r[1:]]))
+                owner.append(np.full(len(r) - 1, i, dtype=np.int64))
+        if not parts:
+            return (np.zeros(0),) * 4 + (np.zeros(0, dtype=np.int64),)
+        e = np.vstack(parts)
+        return e[:, 0], e[:, 1], e[:, 2], e[:, 3], np.concatenate(owner)
+
+    def label(self, *fields):
+        """First attribute among fields present in the layer (e.g. GEOID, NAME) per feature."""
+        for fld in fields:
+            if self.attrs and all(fld in a for a in self.attrs):
+                return [str(a[fld]) for a in self.attrs]
+        return [str(i) for i in range(len(self))]
+
+
+def _read_dbf(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        head = f.read(32)
+        n_rec, head_len, rec_len = struct.unpack("<IHH", head[4:12])
+        fields = []
+        while True:
+            d = f.read(32)
+            if not d or d[0] == 0x0D:
+                break
+            name = d[:11].split(b"\x00")[0].decode("latin-1")
+            fields.append((name, chr(d[11]), d[16], d[17]))
+        f.seek(head_len)
+        rows = []
+        for _ in range(n_rec):
+            rec = f.read(rec_len)
+            pos, row = 1, {}
+            for name, ftype, flen, dec in fields:
+                raw = rec[pos:pos + flen].decode("latin-1").strip()
+                pos += flen
+                if ftype in "NF" and raw:
+                    try:
+                        raw = float(raw) if (dec or "." in raw) else int(raw)
+                    except ValueError:
+                        pass
+                row[name] = raw
+            rows.append(row)
+    return rows
+
+
+def read_shapefile(path):
+    """Polygon shapefile (+ .dbf attributes when present) -> PolygonLayer."""
+    features = []
+    with open(path, "rb") as f:
+        data = f.read()
+    shape_type = struct.unpack("<i", data[32:36])[0]
+    if shape_type not in SHP_POLYGON_TYPES:
+        raise ValueError(f"{path} is shape type {shape_type}, expected a polygon layer")
+    pos = 100
+    while pos + 8 <= len(data):
+        content_len = struct.unpack(">i", data[pos + 4:pos + 8])[0] * 2
+        rec = data[pos + 8:pos + 8 + content_len]
+        pos += 8 + content_len
+        if struct.unpack("<i", rec[:4])[0] == 0:   # null shape
+            features.append([])
+            continue
+        n_parts, n_points = struct.unpack("<2i", rec[36:44])
+        parts = np.frombuffer(rec, "<i4", n_parts, 44)
+        pts = np.frombuffer(rec, "<f8", 2 * n_points, 44 + 4 * n_parts).reshape(-1, 2)
+        bounds = list(parts) + [n_points]
+        features.append([pts[a:b].copy() for a, b in zip(bounds[:-1], bounds[1:])])
+    attrs = _read_dbf(os.path.splitext(path)[0] + ".dbf") or [{} for _ in features]
+    prj = os.path.splitext(path)[0] + ".prj"
+    if os.path.exists(prj) and open(prj).read().lstrip().upper().startswith("PROJCS"):
+        print(f"Warning: {path} is projected; coordinates are expected in lon/lat degrees.")
+    return PolygonLayer(features, attrs, path)
+
+
+def _gpkg_layer(con, path, layer):
+    """(table, geometry column) of a GeoPackage layer (first feature table when layer is None)."""
+    rows = con.execute("SELECT table_name, column_name FROM gpkg_geometry_columns").fetchall()
+    if not rows:
+        raise ValueError(f"{path} has no feature tables")
+    match = [r for r in rows if layer is None or r[0] == layer]
+    if not match:
+        raise KeyError(f"Layer {layer!r} not in {path}: {[r[0] for r in rows]}")
+    return match[0]
+
+
+def _warn_skipped(path, n):
+    if n:
+        print(f"Warning: skipped {n} point(s) without geometry in {path}.")
+
+
+def read_points(path, layer=None):
+    """
+    Point layer (shapefile or GeoPackage) -> (lon array, lat array, attribute
+    dicts). Rows with a NULL/empty geometry are skipped with a warning.
+    """
+    if path.lower().endswith(".gpkg"):
+        con = sqlite3.connect(path)
+        try:
+            table, geom_col = _gpkg_layer(con, path, layer)
+            cur = con.execute(f'SELECT * FROM "{table}"')
+            names = [d[0] for d in cur.description]
+            gi = names.index(geom_col)
+            xs, ys, attrs = [], [], []
+            skipped = 0
+            for rec in cur:
+                blob = rec[gi]
+                if blob is None or blob[3] & 0x10:          # NULL or empty geometry
+                    skipped += 1
+                    continue
+                blob = bytes(blob)
+                pos = 8 + (0, 32, 48, 48, 64)[(blob[3] >> 1) & 0x07]
+                order = "<" if blob[pos] == 1 else ">"
+                x, y = struct.unpack(order + "2d", blob[pos + 5:pos + 21])
+                xs.append(x)
+                ys.append(y)
+                attrs.append({k: v for k, v in zip(names, rec) if k != geom_col})
+        finally:
+            con.close()
+        _warn_skipped(path, skipped)
+        return np.array(xs), np.array(ys), attrs
+    with open(path, "rb") as f:
+        data = f.read()
+    if struct.unpack("<i", data[32:36])[0] not in SHP_POINT_TYPES:
+        raise ValueError(f"{path} is not a point shapefile")
+    xs, ys, keep = [], [], []
+    pos = 100
+    while pos + 8 <= len(data):
+        content_len = struct.unpack(">i", data[pos + 4:pos + 8])[0] * 2
+        rec = data[pos + 8:pos + 8 + content_len]
+        pos += 8 + content_len
+        keep.append(struct.unpack("<i", rec[:4])[0] != 0)   # null shape
+        if keep[-1]:
+            x, y = struct.unpack("<2d", rec[4:20])
+            xs.append(x)
+            ys.append(y)
+    attrs = _read_dbf(os.path.splitext(path)[0] + ".dbf") or [{} for _ in keep]
+    attrs = [a for a, k in zip(attrs, keep) if k]
+    _warn_skipped(path, len(keep) - len(xs))
+    return np.array(xs), np.array(ys), attrs
+
+
+def _wkb_polygons(buf, pos=0):
+    """Parse a WKB Polygon/MultiPolygon (2D/Z/M/ZM, ISO or EWKB flags) -> (rings, next pos)."""
+    order = "<" if buf[pos] == 1 else ">"
+    gtype = struct.unpack(order + "I", buf[pos + 1:pos + 5])[0]
+    pos += 5
+    has_z = bool(gtype & 0x80000000) or (gtype % 10000) // 1000 in (1, 3)
+    has_m = bool(gtype & 0x40000000) or (gtype % 10000) // 1000 in (2, 3)
+    if gtype & 0x20000000:   # EWKB SRID
+        pos += 4
+    base = (gtype & 0x0FFFFFFF) % 1000
+    dims = 2 + has_z + has_m
+    if base == 3:
+        n_rings = struct.unpack(order + "I", buf[pos:pos + 4])[0]
+        pos += 4
+        rings = []
+        for _ in range(n_rings):
+            n = struct.unpack(order + "I", buf[pos:pos + 4])[0]
+            pos += 4
+            arr = np.frombuffer(buf, order + "f8", n * dims, pos).reshape(n, dims)[:, :2].astype(np.float64)
+            rings.append(arr)
+            pos += 8 * n * dims
+        return rings, pos
+    if base == 6:
+        n = struct.unpack(order + "I", buf[pos:pos + 4])[0]
+        pos += 4
+        rings = []
+        for _ in range(n):
+            part, pos = _wkb_polygons(buf, pos)
+            rings.extend(part)
+        return rings, pos
+    raise ValueError(f"Unsupported WKB geometry type {gtype}")
+
+
+def read_geopackage(path, layer=None):
+    """Polygon layer of a GeoPackage (first feature table when layer is None) -> PolygonLayer."""
+    con = sqlite3.connect(path)
+    try:
+        table, geom_col = _gpkg_layer(con, path, layer)
+        cur = con.execute(f'SELECT * FROM "{table}"')
+        names = [d[0] for d in cur.description]
+        gi = names.index(geom_col)
+        features, attrs = [], []
+        for rec in cur:
+            blob = rec[gi]
+            if blob is None:
+                features.append([])
+            else:
+                flags = blob[3]
+                env = (0, 32, 48, 48, 64)[(flags >> 1) & 0x07]
+                features.append(_wkb_polygons(bytes(blob), 8 + env)[0])
+            attrs.append({k: v for k, v in zip(names, rec) if k != geom_col})
+    finally:
+        con.close()
+    return PolygonLayer(features, attrs, path)
+
+
+def read_polygons(path, layer=None):
+    if path.lower().endswith(".gpkg"):
+        return read_geopackage(path, layer)
+    return read_shapefile(path)
+
+
+def _dbf_value(value, ftype, flen, dec):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        text = ""
+    elif ftype in "NF":
+        text = f"{value:.{dec}f}" if dec else str(int(value))
+        return text.rjust(flen)[:flen].encode("latin-1")
+    else:
+        text = str(value)
+    return text.ljust(flen)[:flen].encode("latin-1", "replace")
+
+
+def write_shapefile(path, shape_type, geoms, fields, records, prj=WGS84_PRJ):
+    """
+    Write <path>.shp/.shx/.dbf/.prj. shape_type 1 (point: geoms are (x, y)),
+    3 (polyline) or 5 (polygon: geoms are lists of (k, 2) part arrays).
+    fields = [(name, "C"|"N"|"F", length, decimals)], records = one tuple per geom.
+    """
+    base = os.path.splitext(path)[0]
+    contents = []
+    for g in geoms:
+        if shape_type == 1:
+            contents.append(struct.pack("<i2d", 1, float(g[0]), float(g[1])))
+            continue
+        parts = [np.asarray(p, dtype="<f8").reshape(-1, 2) for p in g]
+        pts = np.vstack(parts) if parts else np.zeros((0, 2))
+        box = (pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max()) if len(pts) else (0.0,) * 4
+        starts = np.cumsum([0] + [len(p) for p in parts[:-1]]).astype("<i4")
+        contents.append(struct.pack("<i4d2i", shape_type, *box, len(parts), len(pts))
+                        + starts.tobytes() + pts.astype("<f8").tobytes())
+
+    if geoms and shape_type == 1:
+        xy = np.array([[g[0], g[1]] for g in geoms], dtype=float)
+        bbox = (xy[:, 0].min(), xy[:, 1].min(), xy[:, 0].max(), xy[:, 1].max())
+    elif geoms:
+        boxes = np.array([struct.unpack("<4d", c[4:36]) for c in contents])
+        bbox = (boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max())
+    else:
+        bbox = (0.0, 0.0, 0.0, 0.0)
+
+    def header(length_words):
+        return (struct.pack(">7i", 9994, 0, 0, 0, 0, 0, length_words)
+                + struct.pack("<2i8d", 1000, shape_type, *bbox, 0.0, 0.0, 0.0, 0.0))
+
+    shp_len = 50 + sum(4 + len(c) // 2 for c in contents)
+    with open(base + ".shp", "wb") as shp, open(base + ".shx", "wb") as shx:
+        shp.write(header(shp_len))
+        shx.write(header(50 + 4 * len(contents)))
+        offset = 50
+        for i, c in enumerate(contents):
+            shp.write(struct.pack(">2i", i + 1, len(c) // 2) + c)
+            shx.write(struct.pack(">2i", offset, len(c) // 2))
+            offset += 4 + len(c) // 2
+
+    rec_len = 1 + sum(f[2] for f in fields)
+    with open(base + ".dbf", "wb") as dbf:
+        today = datetime.date.today()
+        dbf.write(struct.pack("<4BIHH20x", 3, today.year - 1900, today.month, today.day,
+                              len(records), 32 + 32 * len(fields) + 1, rec_len))
+        for name, ftype, flen, dec in fields:
+            dbf.write(struct.pack("<11sc4xBB14x", name.encode("latin-1")[:10], ftype.encode(), flen, dec))
+        dbf.write(b"\x0d")
+        for rec in records:
+            dbf.write(b" " + b"".join(_dbf_value(v, *f[1:]) for v, f in zip(rec, fields)))
+        dbf.write(b"\x1a")
+
+    if prj:
+        with open(base + ".prj", "w") as f:
+            f.write(prj)
+    return base + ".shp"